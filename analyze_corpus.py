@@ -0,0 +1,206 @@
+# analyze_corpus.py
+"""
+Run the full contract analysis pipeline over a corpus of documents.
+
+Files are fanned out to a pool of worker processes that each load the
+models once. Results are written as compact JSONL shards, and a manifest
+of finished content hashes and the options they were analyzed with lets
+an interrupted run pick up where it left off; a rerun with other options
+analyzes the documents again. With NEAR_DUPLICATES=1 each worker keeps an
+index of the clauses it has analyzed, so near-duplicate boilerplate reuses
+an earlier analysis.
+
+Example:
+    python analyze_corpus.py contracts/ "more/**/*.pdf" --output corpus_result --workers 4
+"""
+import argparse
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app")
+sys.path.insert(0, APP_DIR)
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.txt')
+MANIFEST_NAME = "manifest.tsv"
+
+
+def find_documents(inputs):
+    """Expand directories (recursively) and glob patterns into document paths"""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                paths.extend(os.path.join(root, name) for name in files)
+        else:
+            paths.extend(glob.glob(item, recursive=True))
+    return sorted({p for p in paths if p.lower().endswith(SUPPORTED_EXTENSIONS) and os.path.isfile(p)})
+
+
+def file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def options_key(options):
+    """The enabled stages, e.g. 'classify_clauses,extract_entities'"""
+    return ",".join(sorted(name for name, enabled in options.items() if enabled)) or "none"
+
+
+def load_manifest(path, key):
+    """Content hashes of documents that already have results for the options `key`"""
+    if not os.path.exists(path):
+        return set()
+    done = set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            fields = line.rstrip("\n").split("\t")
+            # Lines of older manifests (hash, source) do not say which options were used
+            if len(fields) == 3 and fields[1] == key:
+                done.add(fields[0])
+    return done
+
+
+class ShardWriter:
+    """Appends JSONL records, starting a new shard file every `shard_size` records"""
+
+    def __init__(self, output_dir, shard_size):
+        self.output_dir = output_dir
+        self.shard_size = shard_size
+        self.prefix = time.strftime("results-%Y%m%d-%H%M%S")
+        self.shard_index = 0
+        self.count = 0
+        self.file = None
+
+    def write(self, record):
+        if self.file is None or self.count >= self.shard_size:
+            self.close()
+            path = os.path.join(self.output_dir, f"{self.prefix}-{self.shard_index:05d}.jsonl")
+            self.file = open(path, "a", encoding="utf-8")
+            self.shard_index += 1
+            self.count = 0
+        self.file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self.file.flush()
+        self.count += 1
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def _init_worker(torch_threads, options):
+    """Load the models the enabled stages need, once per worker process"""
+    import torch
+    torch.set_num_threads(torch_threads)
+    from utils.pipeline import warm_up
+    warm_up(options)
+
+
+def _analyze_file(path, content_hash, options):
+    from utils.pipeline import analyze_document
+
+    warnings = []
+    try:
+        result = analyze_document(path, options, warnings=warnings)
+    except Exception as e:
+        return {"source": path, "sha256": content_hash, "options": options, "error": str(e)}
+    return {"source": path, "sha256": content_hash, "options": options, **result, "warnings": warnings}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyze a corpus of contracts in bulk")
+    parser.add_argument("inputs", nargs="+", help="directories or glob patterns")
+    parser.add_argument("--output", default="corpus_result", help="output directory")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--shard-size", type=int, default=1000, help="documents per JSONL shard")
+    parser.add_argument("--no-entities", action="store_true", help="skip entity extraction")
+    parser.add_argument("--no-classify", action="store_true", help="skip clause classification")
+    parser.add_argument("--no-summary", action="store_true", help="skip summarization")
+    args = parser.parse_args()
+
+    options = {
+        'extract_entities': not args.no_entities,
+        'classify_clauses': not args.no_classify,
+        'summarize': not args.no_summary
+    }
+    os.makedirs(args.output, exist_ok=True)
+    manifest_path = os.path.join(args.output, MANIFEST_NAME)
+    key = options_key(options)
+    done = load_manifest(manifest_path, key)
+
+    documents = find_documents(args.inputs)
+    pending = []
+    for path in documents:
+        content_hash = file_hash(path)
+        if content_hash not in done:
+            done.add(content_hash)  # also skips duplicates within this run
+            pending.append((path, content_hash))
+    print(f"{len(documents)} documents found, {len(documents) - len(pending)} already analyzed "
+          f"or duplicates, {len(pending)} to go")
+    if not pending:
+        return
+
+    torch_threads = max(1, (os.cpu_count() or 1) // args.workers)
+    # Each worker is one of --workers processes already; a page pool per worker would multiply them
+    os.environ.setdefault("PDF_WORKERS", "1")
+    writer = ShardWriter(args.output, args.shard_size)
+    start_time = time.time()
+    completed = failed = 0
+    clause_count = near_duplicates = 0
+
+    # spawn keeps torch/tokenizer thread pools out of forked children
+    with ProcessPoolExecutor(max_workers=args.workers,
+                             mp_context=multiprocessing.get_context("spawn"),
+                             initializer=_init_worker,
+                             initargs=(torch_threads, options)) as pool, \
+            open(manifest_path, "a", encoding="utf-8") as manifest:
+        queue = iter(pending)
+        in_flight = set()
+        # Bounded submission keeps memory flat on very large corpora
+        for path, content_hash in queue:
+            in_flight.add(pool.submit(_analyze_file, path, content_hash, options))
+            if len(in_flight) >= args.workers * 4:
+                break
+
+        while in_flight:
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                record = future.result()
+                writer.write(record)
+                if "error" in record:
+                    failed += 1
+                    print(f"  failed: {record['source']}: {record['error']}")
+                else:
+                    # Only recorded once the result is on disk
+                    manifest.write(f"{record['sha256']}\t{key}\t{record['source']}\n")
+                    manifest.flush()
+                    completed += 1
+                    clause_count += len(record.get("clauses", []))
+                    near_duplicates += record.get("near_duplicates", 0)
+
+                next_item = next(queue, None)
+                if next_item is not None:
+                    in_flight.add(pool.submit(_analyze_file, *next_item, options))
+
+            elapsed = time.time() - start_time
+            print(f"{completed + failed}/{len(pending)} documents "
+                  f"({(completed + failed) / elapsed:.2f} docs/sec, {failed} failed)", end="\r")
+
+    writer.close()
+    print(f"\nAnalysis finished: {completed} succeeded, {failed} failed. Outputs saved to '{args.output}'")
+    if clause_count:
+        print(f"{near_duplicates} of {clause_count} clauses ({near_duplicates / clause_count:.1%}) "
+              f"reused the analysis of a near-duplicate")
+
+
+if __name__ == "__main__":
+    main()
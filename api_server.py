@@ -0,0 +1,199 @@
+"""
+Local HTTP API around the analysis pipeline, for other internal services.
+
+    python api_server.py --port 8600
+
+Endpoints (JSON responses):
+    GET  /health                      model loading status
+    GET  /metrics                     Prometheus text metrics
+    POST /classify   {"clauses": [...]}  -> {"results": [{"type", "tier"}, ...]}
+    POST /entities   {"clauses": [...]}  -> {"entities": [[{"text", "label"}, ...], ...]}
+    POST /parse?filename=c.pdf       raw file bytes -> {"clauses": [...], "characters": n}
+    POST /analyze?filename=c.pdf     raw file bytes -> {"clauses", "summary", "timings"}
+                                     (entities=0, classify=0 or summary=0 skip a stage)
+
+Concurrent /classify and /entities requests share model batches through
+a MicroBatcher per model (--max-batch, --max-wait-ms; --no-batching to compare).
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "app"))
+
+from utils import model_registry
+from utils.batcher import MicroBatcher, MAX_BATCH_SIZE, MAX_WAIT_MS
+from utils.classifier import classify_clauses
+from utils.document_parser import parse_document, split_into_clauses
+from utils.ner_model import extract_entities_batch
+from utils.pipeline import analyze_document, clean_display_text, warm_up
+from utils.tracing import render_metrics
+
+MAX_BODY_BYTES = 50 * 2**20
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.txt')
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def entities_as_dicts(texts):
+    return [[{'text': text, 'label': label} for text, label in entities]
+            for entities in extract_entities_batch(texts)]
+
+
+class AnalysisServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # the default backlog of 5 drops connections under load
+
+    def __init__(self, address, batching=True, max_batch=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+        super().__init__(address, AnalysisHandler)
+        if batching:
+            self.classify = MicroBatcher(classify_clauses, "classify", max_batch, max_wait_ms)
+            self.entities = MicroBatcher(entities_as_dicts, "entities", max_batch, max_wait_ms)
+        else:
+            self.classify = classify_clauses
+            self.entities = entities_as_dicts
+
+
+class AnalysisHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        if path == "/health":
+            status = model_registry.status()
+            self.send_json(200, {'ready': model_registry.is_ready(), 'models': status})
+        elif path == "/metrics":
+            self.send_body(200, render_metrics().encode("utf-8"), "text/plain; version=0.0.4")
+        else:
+            self.send_json(404, {'error': f"Unknown endpoint {path}"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        routes = {
+            "/classify": self.handle_classify,
+            "/entities": self.handle_entities,
+            "/parse": self.handle_parse,
+            "/analyze": self.handle_analyze,
+        }
+        try:
+            # Always consume the body so a kept-alive connection stays in sync
+            self.body = self.read_body()
+            if url.path not in routes:
+                raise ApiError(404, f"Unknown endpoint {url.path}")
+            self.send_json(200, routes[url.path](parse_qs(url.query)))
+        except ApiError as e:
+            self.send_json(e.status, {'error': str(e)})
+        except Exception as e:
+            self.send_json(500, {'error': str(e)})
+
+    def handle_classify(self, query):
+        return {'results': self.server.classify(self.read_clauses())}
+
+    def handle_entities(self, query):
+        return {'entities': self.server.entities(self.read_clauses())}
+
+    def handle_parse(self, query):
+        with self.uploaded_file(query) as path:
+            text = parse_document(path)
+        clauses = [clean_display_text(c) for c in split_into_clauses(text) if c.strip()]
+        return {'characters': len(text), 'clauses': clauses}
+
+    def handle_analyze(self, query):
+        options = {
+            'extract_entities': query.get('entities', ['1'])[0] != '0',
+            'classify_clauses': query.get('classify', ['1'])[0] != '0',
+            'summarize': query.get('summary', ['1'])[0] != '0'
+        }
+        warnings = []
+        with self.uploaded_file(query) as path:
+            result = analyze_document(path, options, warnings=warnings)
+        return {**result, 'warnings': warnings}
+
+    def read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self.close_connection = True
+            raise ApiError(413, f"Request body larger than {MAX_BODY_BYTES} bytes")
+        return self.rfile.read(length)
+
+    def read_clauses(self):
+        try:
+            clauses = json.loads(self.body or b"{}").get("clauses")
+        except (ValueError, AttributeError):
+            raise ApiError(400, "Body must be a JSON object")
+        if not isinstance(clauses, list) or not all(isinstance(c, str) for c in clauses):
+            raise ApiError(400, '"clauses" must be a list of strings')
+        return clauses
+
+    def uploaded_file(self, query):
+        filename = query.get('filename', [''])[0]
+        extension = os.path.splitext(filename)[1].lower()
+        if extension not in SUPPORTED_EXTENSIONS:
+            raise ApiError(400, "Pass ?filename= with a .pdf, .docx or .txt name")
+        if not self.body:
+            raise ApiError(400, "Empty file")
+        return TemporaryUpload(self.body, extension)
+
+    def send_json(self, status, payload):
+        self.send_body(status, json.dumps(payload).encode("utf-8"), "application/json")
+
+    def send_body(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # request logging would dominate the output under load
+
+
+class TemporaryUpload:
+    """Uploaded bytes in a temporary file for the path-based parsers"""
+
+    def __init__(self, data, extension):
+        self.data = data
+        self.extension = extension
+
+    def __enter__(self):
+        handle, self.path = tempfile.mkstemp(suffix=self.extension)
+        with os.fdopen(handle, "wb") as f:
+            f.write(self.data)
+        return self.path
+
+    def __exit__(self, *exc):
+        os.remove(self.path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH_SIZE, help="clauses per shared model batch")
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS,
+                        help="how long a batch waits for concurrent requests")
+    parser.add_argument("--no-batching", action="store_true", help="call the models per request")
+    args = parser.parse_args()
+
+    print("Loading models...")
+    warm_up()
+    server = AnalysisServer((args.host, args.port), not args.no_batching, args.max_batch, args.max_wait_ms)
+    print(f"Serving on http://{args.host}:{args.port} (batching {'off' if args.no_batching else 'on'})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
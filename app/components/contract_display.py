@@ -1,20 +1,69 @@
 
 import os
 import streamlit as st
-import pandas as pd
-import base64
-import re
+import html
 import time
+import uuid
+import weakref
 from typing import List, Dict
-from utils.document_parser import parse_document, split_into_clauses
-from utils.ner_model import extract_entities
-from utils.classifier import classify_clauses
-from utils.summarizer import generate_summary
+from utils.pipeline import run_analysis_job, run_revision_job, warm_up
+from utils.clause_store import ClauseStore, ClauseView, is_complete_clause
+from utils.jobs import JobManager, JobLimitError, DONE, FAILED
+from utils.result_cache import ResultCache, analysis_key
+from utils.exporter import EXPORT_FORMATS, export_analysis
+from utils.revisions import MODIFIED, INSERTED, REMOVED, word_diff
+from utils.tracing import add_total
+
+# How often a session checks on its running analysis job
+JOB_POLL_SECONDS = 1.0
+# Clauses rendered per page of the clause view
+CLAUSES_PER_PAGE = int(os.environ.get("CLAUSES_PER_PAGE", "25"))
+# Changes listed in the changes view of a revised document
+CHANGES_SHOWN = 100
+
+TYPE_COLORS = {
+    'Risky': '#ff4444',
+    'Important': '#ffbb33',
+    'Standard': '#00C851',
+    'Unknown': '#aaaaaa'
+}
+ENTITY_COLORS = {
+    'PARTY': '#4285F4',
+    'DATE': '#EA4335',
+    'AMOUNT': '#FBBC05',
+    'TERM': '#34A853',
+    'LAW': '#9C27B0',
+    'GOVERNING_LAW': '#9C27B0'
+}
+
+@st.cache_resource
+def get_result_cache() -> ResultCache:
+    """Analysis results shared by all sessions, keyed by file hash and options"""
+    return ResultCache()
+
+@st.cache_resource
+def get_job_manager() -> JobManager:
+    """Bounded analysis worker pool shared by all sessions; results land in the result cache"""
+    return JobManager(result_cache=get_result_cache(), initializer=warm_up)
+
+@st.cache_resource
+def get_clause_html_cache() -> weakref.WeakKeyDictionary:
+    """Rendered clause HTML per ClauseStore; entries go away with their store"""
+    return weakref.WeakKeyDictionary()
+
+def analysis_options() -> Dict:
+    return {
+        'extract_entities': st.session_state.get('extract_entities', True),
+        'classify_clauses': st.session_state.get('classify_clauses', True),
+        'summarize': st.session_state.get('summarize', True)
+    }
 
-def clean_display_text(text: str) -> str:
-    text = re.sub(r'(\[REDACTED\]\s*){2,}', '[REDACTED]', text)
-    text = re.sub(r'\s+', ' ', text).strip()
-    return text[:5000] + "..." if len(text) > 5000 else text
+def job_owner() -> str:
+    """Who a job counts against for the per-user limit; each guest session is its own user"""
+    username = st.session_state.get('username', 'Guest')
+    if username != 'Guest':
+        return username
+    return st.session_state.setdefault('guest_id', f"guest:{uuid.uuid4().hex}")
 
 def analyze_contract():
     if 'uploaded_file' not in st.session_state:
@@ -27,16 +76,26 @@ def analyze_contract():
     if 'current_file' in st.session_state:
         st.subheader(f"Analyzing: `{st.session_state.current_file}`")
 
-    if not st.session_state.get('analysis_done', False):
-        with st.spinner("🔍 Analyzing contract content..."):
-            try:
-                perform_contract_analysis()
-            except Exception as e:
-                st.error(f"❌ Analysis failed: {str(e)}")
-                if "PDF" in str(e):
-                    st.warning("Ensure the PDF is not scanned or password-protected")
+    key = current_analysis_key(analysis_options())
+    if st.session_state.get('analysis_key') != key:
+        st.session_state['analysis_done'] = False
+
+    if not st.session_state.get('analysis_done', False) and not restore_cached_analysis(key):
+        # Reconnecting sessions attach to a job that is still running for this file
+        job = get_job_manager().find(key)
+        own_job = job is not None and job.id == st.session_state.get('job_id')
+        if job is None or (not job.active and not own_job):
+            job = submit_analysis_job(key)
+            if job is None:
                 return
 
+        if job.active:
+            show_job_progress(job.id)
+        else:
+            show_job_outcome(job, key)
+        return
+
+    announce_finished_job()
     if 'clauses' in st.session_state:
         display_analysis_results()
 
@@ -57,68 +116,129 @@ def validate_uploaded_file() -> bool:
 
     return True
 
-def perform_contract_analysis():
-    start_time = time.time()
-
-    text = parse_document(st.session_state.uploaded_file)
-    raw_clauses = split_into_clauses(text)
-
-    processed_clauses = []
-    for clause in raw_clauses:
-        if not clause.strip():
-            continue
-
-        display_text = clean_display_text(clause)
-        processed_clause = {
-            'text': display_text,
-            'entities': [],
-            'type': 'General'
-        }
-
-        if st.session_state.get('extract_entities', True):
-            try:
-                entities = extract_entities(display_text)
-                processed_clause['entities'] = [
-                    {'text': ent[0], 'label': ent[1]} 
-                    for ent in entities
-                ]
-            except Exception as e:
-                st.warning(f"Entity extraction failed for a clause: {str(e)}")
-
-        if st.session_state.get('classify_clauses', True):
-            try:
-                classification = classify_clauses(display_text)
-                processed_clause['type'] = classification.get('type', 'General')
-            except Exception as e:
-                st.warning(f"Classification failed for a clause: {str(e)}")
-                processed_clause['type'] = 'General'
-
-        processed_clauses.append(processed_clause)
-
-    if st.session_state.get('summarize', True):
-        full_text = " ".join(c['text'] for c in processed_clauses)
-        try:
-            st.session_state['summary'] = generate_summary(full_text)
-        except Exception as e:
-            st.warning(f"Summary generation failed: {str(e)}")
-            st.session_state['summary'] = "Summary unavailable"
+def restore_cached_analysis(key: str) -> bool:
+    """Load a previous analysis of the same file and options into the session"""
+    cached = get_result_cache().get(key)
+    if cached is None:
+        # Evicted from the cache, but its job may still hold the result
+        job = get_job_manager().find(key)
+        cached = job.result if job is not None and job.status == DONE else None
+    if cached is None:
+        return False
 
+    st.session_state.pop('summary', None)
+    st.session_state.pop('summary_sentences', None)
+    st.session_state.pop('revision', None)
+    st.session_state.update(cached)
     st.session_state.update({
-        'clauses': processed_clauses,
+        'analysis_key': key,
+        'analysis_options': analysis_options(),
         'analysis_done': True
     })
+    return True
 
-    st.success(f"Analysis completed in {time.time()-start_time:.1f} seconds")
+def revision_base_key(options: Dict):
+    """Analysis key of the previous upload when this one is a new version of it analyzed with the same options"""
+    if st.session_state.get('base_options') != options:
+        return None
+    return st.session_state.get('base_analysis_key')
+
+def current_analysis_key(options: Dict) -> str:
+    file_hash = st.session_state.get('file_hash', st.session_state.uploaded_file)
+    base_key = revision_base_key(options)
+    if base_key is None:
+        return analysis_key(file_hash, options)
+    # A revision carries the previous version's text in its changes, so it is
+    # never shared with a fresh analysis of the same file, nor with other bases
+    return analysis_key(file_hash, {**options, 'base': base_key})
+
+def revision_base(options: Dict):
+    """The finished analysis of the previous upload, when this one is a new version of it"""
+    key = revision_base_key(options)
+    if key is None:
+        return None
+    base = get_result_cache().get(key)
+    if base is None:
+        job = get_job_manager().find(key)
+        base = job.result if job is not None and job.status == DONE else None
+    return base
+
+def submit_analysis_job(key: str):
+    """Queue the analysis of the uploaded file; None when the user is at the job limit"""
+    options = analysis_options()
+    profile = st.session_state.pop('profile_next_analysis', False)
+    file_path, source, file_hash = (st.session_state.uploaded_file, st.session_state.get('current_file'),
+                                    st.session_state.get('file_hash'))
+    base = revision_base(options)
+    try:
+        if base is None:
+            job = get_job_manager().submit(job_owner(), key, run_analysis_job,
+                                           file_path, options, profile, source, file_hash)
+        else:
+            # A new version of an analyzed document only re-analyzes its changed clauses
+            job = get_job_manager().submit(job_owner(), key, run_revision_job, file_path, base, options,
+                                           profile, source, file_hash, st.session_state['base_file_hash'])
+    except JobLimitError as e:
+        st.warning(f"⏳ {str(e)}. Please wait for one of them to finish.")
+        return None
+    st.session_state['job_id'] = job.id
+    return job
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def show_job_progress(job_id: str):
+    """Polls the job; the whole page reruns once it has finished"""
+    job = get_job_manager().get(job_id)
+    if job is None or not job.active:
+        st.rerun()
+
+    st.caption(f"Job `{job.id}` · {job.status} · waited {job.wait_seconds:.1f}s · running {job.run_seconds:.1f}s")
+    st.progress(job.progress, text=job.message)
+    if st.button("✖ Cancel analysis", key=f"cancel_{job.id}", disabled=job.cancel_requested):
+        job.cancel()
+    # Live preview of the first clauses while the rest are analyzed
+    display_clause_preview(list(job.batches))
+
+def show_job_outcome(job, key: str):
+    """A failed or cancelled job of this session, with the option to start again"""
+    if job.status == FAILED:
+        st.error(f"❌ Analysis failed: {job.error}")
+        if "PDF" in (job.error or ""):
+            st.warning("Ensure the PDF is not scanned or password-protected")
+    else:
+        st.info("Analysis cancelled")
+    if st.button("🔁 Analyze again"):
+        st.session_state.pop('job_id', None)
+        st.rerun()
+
+def announce_finished_job():
+    """Completion message, once, in the session whose job just finished"""
+    job_id = st.session_state.pop('job_id', None)
+    job = get_job_manager().get(job_id) if job_id else None
+    if job is None or job.status != DONE:
+        return
 
-def apply_filters(clauses: List[Dict]) -> List[Dict]:
+    for message in job.result.get('warnings', []):
+        st.warning(message)
+    timings = job.result['timings']
+    if timings['first_clause'] is not None:
+        st.success(f"Analysis completed in {timings['total']:.1f} seconds "
+                   f"(first clauses shown after {timings['first_clause']:.1f} seconds)")
+    else:
+        st.success(f"Analysis completed in {timings['total']:.1f} seconds")
+    if job.result.get('near_duplicates'):
+        st.caption(f"{job.result['near_duplicates']} near-duplicate clauses reused the analysis of an earlier clause")
+    if job.result.get('profile_path'):
+        st.caption(f"cProfile stats saved to `{job.result['profile_path']}`")
+
+def apply_filters(clauses: ClauseStore) -> ClauseView:
     if 'type_filter' not in st.session_state:
         st.session_state.type_filter = "All"
 
-    current_filter = st.session_state.type_filter
-    if current_filter == "All":
-        return clauses
-
-    return [c for c in clauses if c.get('type') == current_filter]
+    return clauses.filter(
+        st.session_state.type_filter,
+        st.session_state.get('entity_filter'),
+        st.session_state.get('clause_query')
+    )
 
 def display_analysis_results():
     if 'summary' in st.session_state:
@@ -128,100 +248,158 @@ def display_analysis_results():
                 {st.session_state['summary']}
             </div>
             """, unsafe_allow_html=True)
-            if st.button("💾 Download Summary"):
-                st.markdown(create_download_link(
-                    st.session_state['summary'],
-                    "summary.txt",
-                    "text/plain"
-                ), unsafe_allow_html=True)
+            st.download_button("💾 Download Summary", st.session_state['summary'],
+                               file_name="summary.txt", mime="text/plain")
 
     filtered_clauses = apply_filters(st.session_state['clauses'])
 
-    tab1, tab2 = st.tabs(["📜 Clause View", "📊 Analysis"])
-    with tab1:
+    revision = st.session_state.get('revision')
+    tabs = st.tabs(["📜 Clause View", "📊 Analysis"] + (["🔀 Changes"] if revision else []))
+    with tabs[0]:
         display_clause_view(filtered_clauses)
-    with tab2:
+    with tabs[1]:
         display_analysis_view(filtered_clauses)
-
-def display_clause_view(clauses: List[Dict]):
-    for clause in clauses:
-        if not is_complete_clause(clause['text']):
-            continue
-
-        border_color = {
-            'Risky': '#ff4444',
-            'Important': '#ffbb33',
-            'Standard': '#00C851',
-            'Unknown': '#aaaaaa'
-        }.get(clause.get('type', 'Unknown'), '#aaaaaa')
-
-        with st.container():
-            st.markdown(f"""
-                <div style='border-left: 4px solid {border_color}; padding: 1rem; margin: 1rem 0; background: #f8f9fa; border-radius: 0 8px 8px 0; line-height: 1.6;'>
-                    <div style='display: flex; justify-content: space-between; margin-bottom: 0.5rem;'>
-                        <strong>{clause.get('type', 'Clause')}</strong>
-                        <span style='background: {border_color}; color: white; padding: 0.2rem 0.8rem; border-radius: 12px; font-size: 0.8rem;'>
-                            {clause.get('type', 'Unknown')}
-                        </span>
-                    </div>
-                    <div style='margin: 0.5rem 0;'>{clause['text']}</div>
-            """, unsafe_allow_html=True)
-
-            if clause.get('entities'):
-                render_entities(clause['entities'])
-
-            st.markdown("</div>", unsafe_allow_html=True)
-
-def render_entities(entities: List[Dict]):
-    with st.expander("🔍 Identified Entities", expanded=False):
-        cols = st.columns(4)
-        for i, entity in enumerate(entities):
-            color = {
-                'PARTY': '#4285F4',
-                'DATE': '#EA4335',
-                'AMOUNT': '#FBBC05',
-                'TERM': '#34A853',
-                'LAW': '#9C27B0',
-                'GOVERNING_LAW': '#9C27B0'
-            }.get(entity['label'], '#9E9E9E')
-
-            with cols[i % 4]:
-                st.markdown(
-                    f"<span style='background: {color}; color: white; padding: 2px 8px; border-radius: 8px; font-size: 0.8em;'>{entity['text']} ({entity['label']})</span>",
-                    unsafe_allow_html=True
-                )
-
-def is_complete_clause(text: str) -> bool:
-    text = text.strip()
-    return len(text) > 30 and len(text.split()) > 5 and not re.match(r'^[-\d\s]+$', text)
-
-def display_analysis_view(clauses: List[Dict]):
+    if revision:
+        with tabs[2]:
+            display_changes_view(revision, st.session_state['clauses'])
+
+def display_clause_view(clauses: ClauseView):
+    """One page of the complete clauses, from HTML rendered once per clause"""
+    start = time.perf_counter()
+    visible = clauses.complete()
+    if not len(visible):
+        st.info("No clauses match the current filters")
+        return
+    page = clause_page(len(visible))
+    rows = visible.indices[page * CLAUSES_PER_PAGE:(page + 1) * CLAUSES_PER_PAGE]
+    st.markdown("".join(stored_clause_html(clauses.store, i) for i in rows), unsafe_allow_html=True)
+
+    elapsed = time.perf_counter() - start
+    st.session_state['clause_view_render_ms'] = elapsed * 1000
+    add_total("clause_view_renders")
+    add_total("clause_view_render_seconds", elapsed)
+
+def display_clause_preview(batches: List[List[Dict]]):
+    """Clauses of a running job; few enough to render directly"""
+    st.markdown("".join(
+        clause_html(clause['text'], clause.get('type', 'Unknown'), clause.get('entities'))
+        for batch in batches for clause in batch if is_complete_clause(clause['text'])
+    ), unsafe_allow_html=True)
+
+def clause_page(total: int) -> int:
+    """Zero-based page of the clause view; back to the first page when the selection changes"""
+    pages = max(1, -(-total // CLAUSES_PER_PAGE))
+    selection = tuple(st.session_state.get(k) for k in ('analysis_key', 'type_filter', 'entity_filter', 'clause_query'))
+    if st.session_state.get('clause_page_selection') != selection or st.session_state.get('clause_page', 1) > pages:
+        st.session_state['clause_page_selection'] = selection
+        st.session_state['clause_page'] = 1
+    if pages > 1:
+        st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, step=1, key='clause_page')
+    page = st.session_state['clause_page'] - 1
+    if total:
+        st.caption(f"Clauses {page * CLAUSES_PER_PAGE + 1}-{min(total, (page + 1) * CLAUSES_PER_PAGE)} of {total}")
+    return page
+
+def stored_clause_html(store: ClauseStore, i: int) -> str:
+    cache = get_clause_html_cache().setdefault(store, {})
+    i = int(i)
+    if i not in cache:
+        cache[i] = clause_html(store.text_of(i), store.type_of(i), store.entities_of(i))
+    return cache[i]
+
+def clause_html(text: str, clause_type: str, entities: List[Dict]) -> str:
+    border_color = TYPE_COLORS.get(clause_type, '#aaaaaa')
+    block = (
+        f"<div style='border-left: 4px solid {border_color}; padding: 1rem; margin: 1rem 0; background: #f8f9fa; border-radius: 0 8px 8px 0; line-height: 1.6;'>"
+        f"<div style='display: flex; justify-content: space-between; margin-bottom: 0.5rem;'>"
+        f"<strong>{clause_type}</strong>"
+        f"<span style='background: {border_color}; color: white; padding: 0.2rem 0.8rem; border-radius: 12px; font-size: 0.8rem;'>{clause_type}</span>"
+        f"</div>"
+        f"<div style='margin: 0.5rem 0;'>{html.escape(text)}</div>"
+    )
+    if entities:
+        block += entities_html(entities)
+    return block + "</div>"
+
+def entities_html(entities: List[Dict]) -> str:
+    chips = "".join(
+        f"<span style='background: {ENTITY_COLORS.get(entity['label'], '#9E9E9E')}; color: white; padding: 2px 8px; border-radius: 8px; font-size: 0.8em;'>"
+        f"{html.escape(entity['text'])} ({entity['label']})</span>"
+        for entity in entities
+    )
+    return (f"<details><summary>🔍 Identified Entities</summary>"
+            f"<div style='display: flex; flex-wrap: wrap; gap: 0.5rem; margin-top: 0.5rem;'>{chips}</div></details>")
+
+def display_analysis_view(clauses: ClauseView):
     st.subheader("Clause Distribution")
-    type_counts = {
-        'Standard': len([c for c in clauses if c.get('type') == 'Standard']),
-        'Important': len([c for c in clauses if c.get('type') == 'Important']),
-        'Risky': len([c for c in clauses if c.get('type') == 'Risky'])
-    }
+    type_counts = clauses.type_counts()
     cols = st.columns(3)
     cols[0].metric("Standard", type_counts['Standard'])
     cols[1].metric("Important", type_counts['Important'])
     cols[2].metric("Risky", type_counts['Risky'])
 
     st.subheader("All Clauses")
-    df = pd.DataFrame([{
-        'Clause': c['text'][:200] + ('...' if len(c['text']) > 200 else ''),
-        'Type': c.get('type', 'Unknown'),
-        'Entities': ', '.join([e['text'] for e in c.get('entities', [])])
-    } for c in clauses])
-    st.dataframe(df)
-
-    if st.button("💾 Export to CSV"):
-        st.markdown(create_download_link(
-            df.to_csv(index=False),
-            "contract_analysis.csv",
-            "text/csv"
-        ), unsafe_allow_html=True)
-
-def create_download_link(data: str, filename: str, mime: str) -> str:
-    b64 = base64.b64encode(data.encode()).decode()
-    return f'<a href="data:{mime};base64,{b64}" download="{filename}">Download {filename}</a>'
+    st.dataframe(clauses.to_frame(max_chars=200))
+    display_export_options()
+
+def display_changes_view(revision: Dict, store: ClauseStore):
+    """Clauses modified, inserted or removed since the previous version"""
+    changes = revision['changes']
+    kinds = [change['kind'] for change in changes]
+    cols = st.columns(4)
+    cols[0].metric("Modified", kinds.count(MODIFIED))
+    cols[1].metric("Inserted", kinds.count(INSERTED))
+    cols[2].metric("Removed", kinds.count(REMOVED))
+    cols[3].metric("Reused", revision['reused'])
+    st.caption(f"{revision['analyzed']} clauses re-analyzed, {revision['reused']} reused from the previous version")
+    if not changes:
+        st.info("No clause changed since the previous version")
+        return
+    if len(changes) > CHANGES_SHOWN:
+        st.caption(f"Showing the first {CHANGES_SHOWN} of {len(changes)} changes")
+    st.markdown("".join(change_html(change, store) for change in changes[:CHANGES_SHOWN]), unsafe_allow_html=True)
+
+def change_html(change: Dict, store: ClauseStore) -> str:
+    if change['kind'] == REMOVED:
+        return (f"<div style='border-left: 4px solid #aaaaaa; padding: 1rem; margin: 1rem 0; background: #f8f9fa; border-radius: 0 8px 8px 0; line-height: 1.6;'>"
+                f"<strong>Removed</strong><div style='margin: 0.5rem 0;'><del>{html.escape(change['old_text'])}</del></div></div>")
+    i = change['new']
+    if change['kind'] == INSERTED:
+        return ("<div style='margin-top: 1rem;'><strong>Inserted</strong></div>"
+                + clause_html(store.text_of(i), store.type_of(i), store.entities_of(i)))
+    diff = "".join(
+        html.escape(text) if tag == "equal" else
+        f"<del style='background: #ffd7d5;'>{html.escape(text)}</del>" if tag == "delete" else
+        f"<ins style='background: #ccffd8; text-decoration: none;'>{html.escape(text)}</ins>"
+        for tag, text in word_diff(change['old_text'], store.text_of(i))
+    )
+    border_color = TYPE_COLORS.get(store.type_of(i), '#aaaaaa')
+    return (f"<div style='border-left: 4px solid {border_color}; padding: 1rem; margin: 1rem 0; background: #f8f9fa; border-radius: 0 8px 8px 0; line-height: 1.6;'>"
+            f"<strong>Modified · {store.type_of(i)}</strong><div style='margin: 0.5rem 0;'>{diff}</div></div>")
+
+@st.fragment
+def display_export_options():
+    """Full-text export of the whole analysis, written once per analysis and served from disk"""
+    key = st.session_state.get('analysis_key')
+    if key is None:
+        return
+    fmt = st.selectbox("Export format", list(EXPORT_FORMATS), format_func=str.upper, key='export_format')
+    # The download button holds the whole file in memory, so it is only built
+    # on the run the user asks for it, not on every page flip or filter change
+    if not st.button("💾 Prepare download", key=f'export_prepare_{fmt}'):
+        return
+    with st.spinner("Writing export..."):
+        try:
+            # Served from disk when another run or session already wrote it
+            path = export_analysis(key, st.session_state['clauses'], fmt)
+            try:
+                f = open(path, "rb")
+            except FileNotFoundError:
+                # Pruned by another session in between; write it again
+                f = open(export_analysis(key, st.session_state['clauses'], fmt), "rb")
+        except Exception as e:
+            st.error(f"❌ {str(e)}")
+            return
+    with f:
+        st.download_button(f"⬇️ Download {fmt.upper()}", f, file_name=f"contract_analysis.{fmt}",
+                           mime=EXPORT_FORMATS[fmt], key='export_download')
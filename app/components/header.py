@@ -1,38 +1,38 @@
 import streamlit as st
 
+from utils.assets import LOGO, image_data_uri
 
-import base64
+# Display height of the header logo in CSS pixels
+LOGO_HEIGHT = 60
 
-def show_header():
-    # Encode the logo image to base64
-    with open("assets/logo.png", "rb") as image_file:
-        encoded_logo = base64.b64encode(image_file.read()).decode()
+# Part of the page's stylesheet bundle (main.py)
+HEADER_CSS = f"""
+.header-container {{
+    display: flex;
+    align-items: center;
+    gap: 16px;
+    padding: 1rem 0;
+}}
+.header-container img {{
+    height: {LOGO_HEIGHT}px;
+}}
+.header-title {{
+    font-size: 1.9rem;
+    font-weight: 700;
+    margin: 0;
+}}
+.header-subtitle {{
+    font-size: 1rem;
+    color: #555;
+    margin-top: 0.3rem;
+}}
+"""
 
+def show_header():
+    # The logo is scaled and encoded once per process
     st.markdown(f"""
-    <style>
-    .header-container {{
-        display: flex;
-        align-items: center;
-        gap: 16px;
-        padding: 1rem 0;
-    }}
-    .header-container img {{
-        height: 60px;
-    }}
-    .header-title {{
-        font-size: 1.9rem;
-        font-weight: 700;
-        margin: 0;
-    }}
-    .header-subtitle {{
-        font-size: 1rem;
-        color: #555;
-        margin-top: 0.3rem;
-    }}
-    </style>
-
     <div class="header-container">
-        <img src="data:image/png;base64,{encoded_logo}" alt="Logo">
+        <img src="{image_data_uri(LOGO, LOGO_HEIGHT)}" alt="Logo">
         <div>
             <div class="header-title">LegaLens</div>
             <div class="header-subtitle">AI-powered contract analysis with risk assessment, entity extraction, and summarization</div>
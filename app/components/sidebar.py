@@ -1,6 +1,12 @@
 import streamlit as st 
 import os
 from datetime import datetime
+from utils.result_cache import hash_bytes
+from utils import model_registry
+from utils.assets import LOGO, image_asset
+
+# Display width of the sidebar logo in CSS pixels
+SIDEBAR_LOGO_WIDTH = 80
 
 def reset_analysis_state():
     """Reset all analysis-related session state variables"""
@@ -9,14 +15,21 @@ def reset_analysis_state():
     st.session_state.pop('clause_types', None)
     st.session_state.pop('summary', None)
     st.session_state.pop('importance_filter', None)
+    st.session_state.pop('entity_filter', None)
+    st.session_state.pop('analysis_key', None)
+    st.session_state.pop('revision', None)
 
 def show_sidebar():
     with st.sidebar:
-        st.image("assets/logo.png", width=80)
+        st.image(image_asset(LOGO, width=SIDEBAR_LOGO_WIDTH), width=SIDEBAR_LOGO_WIDTH)
         st.markdown(f"**Welcome, {st.session_state.get('username', 'Guest')}**")
 
         st.markdown("---")
 
+        if 'file_hash' in st.session_state:
+            st.checkbox("Next upload is a new version of this contract", key="revision_mode",
+                        help="Only the clauses that changed since this analysis are analyzed again")
+
         # File uploader (keep existing code)
         uploaded_file = st.file_uploader(
             "Upload Contract Document",
@@ -25,17 +38,38 @@ def show_sidebar():
             key="file_uploader"
         )
 
-        if uploaded_file:
-            reset_analysis_state()
-            file_path = os.path.join("uploads", uploaded_file.name)
-            os.makedirs("uploads", exist_ok=True)
-            with open(file_path, "wb") as f:
-                f.write(uploaded_file.getbuffer())
+        # The uploader returns the same file on every rerun; only a new
+        # upload should reset the analysis and be written to disk
+        if uploaded_file and st.session_state.get('upload_id') != uploaded_file.file_id:
+            file_hash = hash_bytes(uploaded_file.getbuffer())
+            st.session_state['upload_id'] = uploaded_file.file_id
 
-            st.session_state['uploaded_file'] = file_path
+            if st.session_state.get('file_hash') != file_hash:
+                # A new version builds on the analysis of the upload before it
+                if st.session_state.get('revision_mode') and st.session_state.get('analysis_done'):
+                    st.session_state['base_file_hash'] = st.session_state['file_hash']
+                    st.session_state['base_analysis_key'] = st.session_state.get('analysis_key')
+                    st.session_state['base_options'] = st.session_state.get('analysis_options')
+                else:
+                    for name in ('base_file_hash', 'base_analysis_key', 'base_options'):
+                        st.session_state.pop(name, None)
+                reset_analysis_state()
+                file_path = os.path.join("uploads", uploaded_file.name)
+                os.makedirs("uploads", exist_ok=True)
+                with open(file_path, "wb") as f:
+                    f.write(uploaded_file.getbuffer())
+
+                st.session_state['uploaded_file'] = file_path
+                st.session_state['file_hash'] = file_hash
             st.session_state['current_file'] = uploaded_file.name
+
+        if uploaded_file:
             st.success(f"📄 {uploaded_file.name} uploaded successfully!")
 
+        # Models load in a background thread after the login page is shown
+        if not model_registry.is_ready():
+            st.caption("⏳ Analysis models are loading; the first analysis may take longer")
+
         st.markdown("---")
 
         if 'uploaded_file' in st.session_state:
@@ -54,6 +88,33 @@ def show_sidebar():
                 st.session_state["type_filter"] = new_value
                 st.rerun()
 
+            # Answered from the document's clause index (ClauseStore.filter)
+            from components.contract_display import ENTITY_COLORS
+            labels = set(ENTITY_COLORS)
+            if 'clauses' in st.session_state:
+                labels.update(st.session_state['clauses'].entity_labels)
+            label_options = ["All"] + sorted(labels)
+            if st.session_state.get("entity_filter") not in label_options:
+                st.session_state["entity_filter"] = "All"
+            st.selectbox("Filter by Entity", label_options, key="entity_filter")
+            st.text_input("Search Clauses", key="clause_query", placeholder="e.g. indemnif termination",
+                          help="Shows clauses containing all of the words; a word also matches as a prefix")
+
+        with st.expander("Diagnostics", expanded=False):
+            if st.button("Profile next analysis (cProfile)",
+                         help="Saves cProfile stats for the next analyzed document under traces/"):
+                st.session_state['profile_next_analysis'] = True
+            if st.session_state.get('profile_next_analysis'):
+                st.caption("The next analysis will be profiled")
+            for name, state in model_registry.status().items():
+                st.caption(f"{name}: {state}")
+            from components.contract_display import get_job_manager
+            jobs = get_job_manager().stats()
+            st.caption(f"Analysis jobs: {jobs['running']}/{jobs['workers']} running, {jobs['queued']} queued, "
+                       f"avg wait {jobs['avg_wait_seconds']:.1f}s, avg run {jobs['avg_run_seconds']:.1f}s")
+            if 'clause_view_render_ms' in st.session_state:
+                st.caption(f"Clause view rendered in {st.session_state['clause_view_render_ms']:.1f} ms")
+
         st.markdown("---")
         st.caption(f"© {datetime.now().year} LegaLens | v2.1")
 
@@ -1,16 +1,30 @@
 import streamlit as st
-import base64
 import os
+import threading
 
 from auth import init_db, login_user, add_user
-from components.header import show_header
+from components.header import show_header, HEADER_CSS
 from components.sidebar import show_sidebar
 from components.footer import show_footer
-from components.contract_display import analyze_contract
+from utils.assets import background_data_uri, style_bundle
 
 # Initialize DB
 init_db()
 
+def warm_up_models():
+    # Imported here so the login page never waits for the analysis stack
+    from utils.pipeline import warm_up
+    warm_up()
+
+@st.cache_resource
+def start_model_warm_up():
+    """Load the analysis models in the background, once per server process"""
+    thread = threading.Thread(target=warm_up_models, name="model-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+start_model_warm_up()
+
 # Page config
 st.set_page_config(
     page_title="LegalLens",
@@ -18,49 +32,56 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Set background image
-def set_background(image_file):
-    with open(image_file, "rb") as f:
-        encoded = base64.b64encode(f.read()).decode()
-    st.markdown(
-        f"""
-        <style>
-        .stApp {{
-            background-image: url("data:image/jpg;base64,{encoded}");
-            background-size: cover;
-            background-position: center;
-            background-repeat: no-repeat;
-            background-attachment: fixed;
-        }}
-        .main .block-container {{
-            padding-top: 3rem;
-        }}
-        </style>
-        """,
-        unsafe_allow_html=True
-    )
-
-# Show background only if not authenticated
-if not st.session_state.get("authenticated"):
-    set_background("assets/login_bg.jpg")
-
-# Custom CSS for compact and centered fields
-st.markdown("""
-    <style>
-    div[data-baseweb="input"] {
-        max-width: 300px;
-        margin: 0 auto;
-    }
-    button[kind="secondary"], button[kind="primary"] {
-        max-width: 300px;
-        margin: 1rem auto;
-        display: block;
-    }
-    </style>
-""", unsafe_allow_html=True)
+# Compact and centered fields, on every page
+FIELD_CSS = """
+div[data-baseweb="input"] {
+    max-width: 300px;
+    margin: 0 auto;
+}
+button[kind="secondary"], button[kind="primary"] {
+    max-width: 300px;
+    margin: 1rem auto;
+    display: block;
+}
+"""
+
+LOGIN_CSS = """
+.stApp {
+    background-size: cover;
+    background-position: center;
+    background-repeat: no-repeat;
+    background-attachment: fixed;
+}
+.main .block-container {
+    padding-top: 3rem;
+}
+.main-title {
+    text-align: center;
+    font-size: 2.5rem;
+    font-weight: bold;
+    margin-bottom: 0.5rem;
+}
+.main-title .lens {
+    color: #2F80ED;  /* blue tone, change as needed */
+}
+.centered-subheader {
+    text-align: center;
+    font-size: 1.5rem;
+    font-weight: 600;
+    margin-top: 2rem;
+    margin-bottom: 1.5rem;
+}
+"""
+
+def login_background_css():
+    return f'.stApp {{ background-image: url("{background_data_uri()}"); }}'
 
 # If authenticated, show full dashboard
 if st.session_state.get("authenticated"):
+    from components.contract_display import analyze_contract
+
+    # Stylesheets of the page in one block, built once per process
+    st.markdown(style_bundle(FIELD_CSS, HEADER_CSS), unsafe_allow_html=True)
     show_header()
     show_sidebar()
 
@@ -72,26 +93,10 @@ if st.session_state.get("authenticated"):
 # LOGIN / SIGNUP PAGE (if not authenticated)
 # ---------------------------
 
-st.markdown("""
-    <style>
-        .main-title {
-            text-align: center;
-            font-size: 2.5rem;
-            font-weight: bold;
-            margin-bottom: 0.5rem;
-        }
-        .main-title .lens {
-            color: #2F80ED;  /* blue tone, change as needed */
-        }
-        .centered-subheader {
-            text-align: center;
-            font-size: 1.5rem;
-            font-weight: 600;
-            margin-top: 2rem;
-            margin-bottom: 1.5rem;
-        }
-    </style>
+# Show background only if not authenticated
+st.markdown(style_bundle(FIELD_CSS, LOGIN_CSS, login_background_css()), unsafe_allow_html=True)
 
+st.markdown("""
     <div class="main-title">
         Legal<span class="lens">Lens</span>
     </div>
@@ -0,0 +1,74 @@
+# assets.py
+import base64
+import io
+import os
+import re
+from functools import lru_cache
+
+ASSET_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "assets")
+STYLESHEET = "style.css"
+LOGO = "logo.png"
+LOGIN_BACKGROUND = "login_bg.jpg"
+# Images are scaled to twice their display size, enough for high-DPI screens
+DISPLAY_SCALE = 2
+WEBP_QUALITY = 90
+CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+CSS_SPACE = re.compile(r"\s*([{};,])\s*|\s+")
+
+
+@lru_cache(maxsize=None)
+def read_asset(name: str) -> bytes:
+    with open(os.path.join(ASSET_DIR, name), "rb") as f:
+        return f.read()
+
+
+@lru_cache(maxsize=None)
+def image_asset(name: str, height: int = None, width: int = None) -> bytes:
+    """
+    An image scaled down to its display `height` or `width` in CSS pixels
+    and re-encoded as WebP, once per process; the original bytes when that
+    would not be smaller
+    """
+    # Pillow comes with Streamlit; imported here so the login page does not wait for it
+    from PIL import Image
+
+    data = read_asset(name)
+    image = Image.open(io.BytesIO(data))
+    scale = min(DISPLAY_SCALE * height / image.height if height else 1.0,
+                DISPLAY_SCALE * width / image.width if width else 1.0)
+    if scale < 1.0:
+        image = image.resize((max(1, round(image.width * scale)), max(1, round(image.height * scale))), Image.LANCZOS)
+    output = io.BytesIO()
+    image.save(output, "WEBP", quality=WEBP_QUALITY, method=6)
+    return output.getvalue() if output.tell() < len(data) else data
+
+
+def image_mime(data: bytes) -> str:
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return "image/png"
+    return "image/jpeg"
+
+
+@lru_cache(maxsize=None)
+def image_data_uri(name: str, height: int) -> str:
+    data = image_asset(name, height=height)
+    return f"data:{image_mime(data)};base64,{base64.b64encode(data).decode()}"
+
+
+@lru_cache(maxsize=None)
+def background_data_uri() -> str:
+    # Already a small JPEG; encoded as is
+    return f"data:image/jpeg;base64,{base64.b64encode(read_asset(LOGIN_BACKGROUND)).decode()}"
+
+
+def minify_css(css: str) -> str:
+    """Drop comments and the whitespace around braces, semicolons and commas"""
+    return CSS_SPACE.sub(lambda m: m.group(1) or " ", CSS_COMMENT.sub("", css)).strip()
+
+
+@lru_cache(maxsize=64)
+def style_bundle(*css: str) -> str:
+    """One minified <style> block: assets/style.css followed by the given page CSS, built once per combination"""
+    return "<style>" + minify_css("\n".join((read_asset(STYLESHEET).decode("utf-8"),) + css)) + "</style>"
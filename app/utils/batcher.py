@@ -0,0 +1,82 @@
+# batcher.py
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from utils.tracing import add_total
+
+MAX_BATCH_SIZE = 64
+MAX_WAIT_MS = 5.0
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent calls of a batch function into shared batches.
+
+    submit(items) returns a Future for that caller's results. A single worker
+    thread takes the oldest request, adds whatever else is already queued and,
+    while requests keep arriving concurrently, waits up to max_wait_ms for more
+    until max_batch_size items are collected. It then calls func(all_items)
+    once and hands each caller its slice. A lone request on an idle batcher
+    is dispatched at once, so it pays no extra latency.
+    """
+
+    def __init__(self, func, name, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+        self.func = func
+        self.name = name
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._last_batch_requests = 0
+        self._thread = threading.Thread(target=self._run, name=f"batcher-{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, items):
+        future = Future()
+        self._queue.put((list(items), future))
+        return future
+
+    def __call__(self, items):
+        """Blocking convenience wrapper around submit()"""
+        return self.submit(items).result()
+
+    def _collect(self):
+        requests = [self._queue.get()]
+        size = len(requests[0][0])
+        # Only wait for stragglers when there is concurrent traffic
+        deadline = time.monotonic() + self.max_wait if self._last_batch_requests > 1 else None
+
+        while size < self.max_batch_size:
+            try:
+                if deadline is None:
+                    request = self._queue.get_nowait()
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    request = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            requests.append(request)
+            size += len(request[0])
+        return requests, size
+
+    def _run(self):
+        while True:
+            requests, size = self._collect()
+            self._last_batch_requests = len(requests)
+            items = [item for request_items, _ in requests for item in request_items]
+            try:
+                results = self.func(items) if items else []
+            except Exception as e:
+                for _, future in requests:
+                    future.set_exception(e)
+                continue
+
+            add_total(f"batcher_{self.name}_batches")
+            add_total(f"batcher_{self.name}_items", size)
+            position = 0
+            for request_items, future in requests:
+                future.set_result(results[position:position + len(request_items)])
+                position += len(request_items)
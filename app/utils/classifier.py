@@ -1,45 +1,253 @@
-import joblib
-import torch
-from transformers import AutoTokenizer, AutoModel
+import os
 import numpy as np
 
-# Load model and tokenizer at module level
-MODEL_PATH = "app/models/logreg_model.pkl"
-BERT_MODEL = "nlpaueb/legal-bert-base-uncased"
+from utils import model_registry
+from utils.embedding_cache import EmbeddingCache
+from utils.tracing import span, count
 
-# Load models once when module is imported
-try:
-    classifier = joblib.load(MODEL_PATH)
-    tokenizer = AutoTokenizer.from_pretrained(BERT_MODEL)
-    bert_model = AutoModel.from_pretrained(BERT_MODEL)
-except Exception as e:
-    raise ImportError(f"Failed to load models: {str(e)}")
+# Models are loaded on first use through the model registry
+# (overridable, e.g. to point the benchmarks at small local stand-in models)
+MODEL_PATH = os.environ.get("CLAUSE_CLASSIFIER_PATH", "app/models/logreg_model.pkl")
+BERT_MODEL = os.environ.get("LEGAL_BERT_MODEL", "nlpaueb/legal-bert-base-uncased")
+MAX_LENGTH = 128
+BATCH_SIZE = 32
+
+# Optional CPU inference mode: int8 dynamic quantization of BERT's linear layers
+QUANTIZE = os.environ.get("LEGAL_BERT_QUANTIZE", "0") == "1"
+# Quantized weights are saved here on first use and reloaded afterwards
+QUANTIZED_MODEL_PATH = os.environ.get("LEGAL_BERT_QUANTIZED_PATH", "")
+# Intra-op threads for the forward pass (0 keeps torch's default)
+TORCH_THREADS = int(os.environ.get("TORCH_THREADS", "0"))
+
+# Optional first tier: hashed n-grams with a linear model, trained on the same labels.
+# Clauses it is confident about skip BERT; the rest escalate to the BERT head.
+LEXICAL_MODEL_PATH = os.environ.get("LEXICAL_CLASSIFIER_PATH", "app/models/lexical_model.pkl")
+CASCADE = os.environ.get("CLASSIFIER_CASCADE", "0") == "1"
+CASCADE_THRESHOLD = float(os.environ.get("CASCADE_THRESHOLD", "0.9"))
+
+TYPE_MAP = {0: "Standard", 1: "Important", 2: "Risky"}
+
+def _load_classifier():
+    import joblib
+    return joblib.load(MODEL_PATH)
+
+def _load_lexical_classifier():
+    import joblib
+    if not os.path.exists(LEXICAL_MODEL_PATH):
+        return None  # cascade unavailable: every clause goes to BERT
+    return joblib.load(LEXICAL_MODEL_PATH)
+
+def _load_tokenizer():
+    from transformers import AutoTokenizer
+    return AutoTokenizer.from_pretrained(BERT_MODEL)
+
+def _load_bert():
+    import torch
+    from transformers import AutoModel
+    if TORCH_THREADS > 0:
+        torch.set_num_threads(TORCH_THREADS)
+    if not QUANTIZE:
+        return AutoModel.from_pretrained(BERT_MODEL)
+    if QUANTIZED_MODEL_PATH and os.path.exists(QUANTIZED_MODEL_PATH):
+        return load_quantized_model(QUANTIZED_MODEL_PATH)
+
+    model = quantize_model(AutoModel.from_pretrained(BERT_MODEL))
+    if QUANTIZED_MODEL_PATH:
+        save_quantized_model(model, QUANTIZED_MODEL_PATH)
+    return model
+
+def quantize_model(model):
+    """Dynamic int8 quantization of all nn.Linear layers (weights int8, activations quantized per batch)"""
+    import torch
+    model.eval()
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+def save_quantized_model(model, path):
+    import torch
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    torch.save(model.state_dict(), path)
+
+def load_quantized_model(path):
+    """
+    Rebuild the quantized model from BERT's config and the saved int8 weights,
+    without loading the fp32 checkpoint first.
+    """
+    import torch
+    from transformers import AutoConfig, AutoModel
+    model = quantize_model(AutoModel.from_config(AutoConfig.from_pretrained(BERT_MODEL)))
+    model.load_state_dict(torch.load(path, weights_only=True))
+    return model
+
+def _load_embedding_cache():
+    """
+    Disk-backed embedding cache shared by all worker processes.
+    Only needs the config and tokenizer, so a fully cached document never
+    loads the BERT weights.
+    """
+    from transformers import AutoConfig
+    hidden_size = AutoConfig.from_pretrained(BERT_MODEL).hidden_size
+    lowercase = getattr(get_tokenizer(), "do_lower_case", False)
+    # Quantized embeddings differ slightly, so they are cached separately
+    model_id = f"{BERT_MODEL}:int8" if QUANTIZE else BERT_MODEL
+    try:
+        return EmbeddingCache(model_id, hidden_size, lowercase=lowercase)
+    except Exception:
+        return None  # read-only or unavailable disk: run uncached
+
+model_registry.register("clause_classifier", _load_classifier)
+model_registry.register("lexical_classifier", _load_lexical_classifier)
+model_registry.register("legal_bert_tokenizer", _load_tokenizer)
+model_registry.register("legal_bert", _load_bert)
+model_registry.register("embedding_cache", _load_embedding_cache)
+
+def get_classifier():
+    return model_registry.get("clause_classifier")
+
+def get_lexical_classifier():
+    """The first-tier lexical model, or None when it has not been trained"""
+    return model_registry.get("lexical_classifier")
+
+def get_tokenizer():
+    return model_registry.get("legal_bert_tokenizer")
+
+def get_bert_model():
+    return model_registry.get("legal_bert")
+
+def get_embedding_cache():
+    """The shared embedding cache, or None when it cannot be opened"""
+    return model_registry.get("embedding_cache")
 
 def get_embedding(text):
     """Generate BERT embedding for a single text"""
-    inputs = tokenizer(text, return_tensors='pt', padding=True, truncation=True, max_length=128)
+    import torch
+    inputs = get_tokenizer()(text, return_tensors='pt', padding=True, truncation=True, max_length=MAX_LENGTH)
     with torch.no_grad():
-        outputs = bert_model(**inputs)
+        outputs = get_bert_model()(**inputs)
     return outputs.last_hidden_state.mean(dim=1).squeeze().numpy()
 
-def classify_clauses(text):
+def get_embeddings(texts, batch_size=BATCH_SIZE, use_cache=True):
+    """
+    Generate BERT embeddings for a list of texts.
+    Cached vectors are reused and only the misses go through BERT.
+    Returns: float32 array of shape (len(texts), hidden_size)
+    """
+    texts = list(texts)
+    embedding_cache = get_embedding_cache() if use_cache else None
+    if embedding_cache is None:
+        return _embed_batched(texts, batch_size)
+
+    with span("embedding_cache_lookup"):
+        found, misses = embedding_cache.get_many(texts)
+    count("embedding_cache_hits", len(found))
+    count("embedding_cache_misses", len(misses))
+    embeddings = np.empty((len(texts), embedding_cache.dim), dtype=np.float32)
+    for position, vector in found.items():
+        embeddings[position] = vector
+
+    if misses:
+        computed = _embed_batched([texts[i] for i in misses], batch_size)
+        embeddings[misses] = computed
+        embedding_cache.put_many([texts[i] for i in misses], computed)
+
+    return embeddings
+
+def cache_stats():
+    """Hit/miss counters of the embedding cache (None when caching is off)"""
+    embedding_cache = get_embedding_cache()
+    return embedding_cache.stats() if embedding_cache is not None else None
+
+def _embed_batched(texts, batch_size):
+    """
+    Run BERT over texts in length-sorted batches.
+    Texts are tokenized once, grouped by token length and each group is
+    padded only to its own longest member. Padding is masked out of the
+    mean pooling, so every row matches get_embedding() for that text.
+    """
+    import torch
+    tokenizer = get_tokenizer()
+    bert_model = get_bert_model()
+    if not texts:
+        return np.zeros((0, bert_model.config.hidden_size), dtype=np.float32)
+
+    with span("tokenize"):
+        encoded = tokenizer(list(texts), truncation=True, max_length=MAX_LENGTH)['input_ids']
+    count("bert_clauses", len(encoded))
+    count("bert_tokens", sum(len(ids) for ids in encoded))
+    order = sorted(range(len(encoded)), key=lambda i: len(encoded[i]))
+    embeddings = np.empty((len(texts), bert_model.config.hidden_size), dtype=np.float32)
+
+    for start in range(0, len(order), batch_size):
+        batch_ids = order[start:start + batch_size]
+        inputs = tokenizer.pad(
+            {'input_ids': [encoded[i] for i in batch_ids]},
+            padding='longest',
+            return_tensors='pt'
+        )
+        with span("bert_forward", batch=len(batch_ids)), torch.no_grad():
+            outputs = bert_model(**inputs)
+        count("padded_tokens", inputs['input_ids'].numel())
+        mask = inputs['attention_mask'].unsqueeze(-1).to(outputs.last_hidden_state.dtype)
+        summed = (outputs.last_hidden_state * mask).sum(dim=1)
+        embeddings[batch_ids] = (summed / mask.sum(dim=1)).numpy()
+
+    return embeddings
+
+def build_lexical_classifier(texts, labels):
+    """Fit the first-tier model: hashed word 1-2 grams and a logistic regression"""
+    from sklearn.feature_extraction.text import HashingVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import make_pipeline
+    return make_pipeline(
+        HashingVectorizer(ngram_range=(1, 2), n_features=2 ** 20, alternate_sign=False),
+        LogisticRegression(C=10, max_iter=1000)
+    ).fit(texts, labels)
+
+def _classify(texts, batch_size, use_cache, cascade, threshold):
+    cascade = CASCADE if cascade is None else cascade
+    threshold = CASCADE_THRESHOLD if threshold is None else threshold
+    results = [None] * len(texts)
+
+    lexical = get_lexical_classifier() if cascade else None
+    if lexical is not None:
+        with span("lexical_classify"):
+            probabilities = lexical.predict_proba(texts)
+        best = probabilities.argmax(axis=1)
+        confident = probabilities[np.arange(len(texts)), best] >= threshold
+        for i in np.flatnonzero(confident):
+            results[i] = {"type": TYPE_MAP.get(int(lexical.classes_[best[i]]), "Unknown"), "tier": "lexical"}
+        count("lexical_tier_clauses", int(confident.sum()))
+
+    escalated = [i for i, result in enumerate(results) if result is None]
+    if escalated:
+        embeddings = get_embeddings([texts[i] for i in escalated], batch_size=batch_size, use_cache=use_cache)
+        for i, prediction in zip(escalated, get_classifier().predict(embeddings)):
+            results[i] = {"type": TYPE_MAP.get(prediction, "Unknown"), "tier": "bert"}
+    return results
+
+def classify_clauses(text, batch_size=BATCH_SIZE, use_cache=True, cascade=None, threshold=None):
     """
     Classify a single clause or list of clauses
-    Returns: Dictionary with only 'type' key (removed 'risk')
+    With cascade (default: CLASSIFIER_CASCADE) the lexical tier decides every clause
+    it is at least `threshold` confident about and only the rest go through BERT.
+    Returns: Dictionary with 'type' and 'tier' ("lexical" or "bert") keys for a string,
+             list of such dictionaries (one per clause) for a list
     """
     if isinstance(text, str):
-        embeddings = get_embedding(text)
-        prediction = classifier.predict([embeddings])[0]
+        return _classify([text], batch_size, use_cache, cascade, threshold)[0]
     elif isinstance(text, list):
-        embeddings = np.array([get_embedding(t) for t in text])
-        prediction = classifier.predict(embeddings)[0]
+        if not text:
+            return []
+        with span("classify_clauses"):
+            results = _classify(text, batch_size, use_cache, cascade, threshold)
+        count("classified_clauses", len(text))
+        return results
     else:
         raise ValueError("Input must be string or list of strings")
 
-    type_map = {0: "Standard", 1: "Important", 2: "Risky"}
-    return {"type": type_map.get(prediction, "Unknown")}
-
 if __name__ == "__main__":
     # Test classification
     test_clause = "This Agreement shall be governed by the laws of the State of California."
     print(classify_clauses(test_clause))
+    print(classify_clauses([test_clause, "The Supplier may terminate this Agreement at any time without notice."]))
@@ -0,0 +1,272 @@
+# clause_store.py
+import re
+from bisect import bisect_left
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+# Categorical clause types; 'General' is the pipeline default when classification is off
+CLAUSE_TYPES = ("General", "Standard", "Important", "Risky", "Unknown")
+TYPE_CODES = {name: code for code, name in enumerate(CLAUSE_TYPES)}
+SEPARATOR = " "
+NUMBERING_ONLY = re.compile(r'^[-\d\s]+$')
+# Words of the clause search index; single characters are not indexed
+INDEX_TOKEN = re.compile(r"\w\w+")
+# Filter combinations whose clause ids are remembered per document
+SELECTIONS_KEPT = 64
+
+
+def is_complete_clause(text: str) -> bool:
+    """Whether a clause is worth showing in the clause view (not a stray fragment or number)"""
+    text = text.strip()
+    return len(text) > 30 and len(text.split()) > 5 and not NUMBERING_ONLY.match(text)
+
+
+class ClauseStore:
+    """
+    Analyzed clauses of one document in a few flat arrays instead of a dict
+    per clause. All clause texts live in one string, joined with spaces so it
+    doubles as the summarizer input; types are int8 codes into CLAUSE_TYPES.
+    Entities are a flat table: clause i owns rows entity_ptr[i]:entity_ptr[i + 1].
+    `complete` flags the clauses the clause view shows (is_complete_clause),
+    computed once when the store is built, as is its ClauseIndex.
+    The store is never modified after it is built, so sessions can share it.
+    """
+
+    def __init__(self, text, starts, ends, type_codes, entity_text, entity_starts, entity_ends,
+                 entity_label_codes, entity_labels, entity_ptr, complete):
+        self.text = text
+        self.starts = starts
+        self.ends = ends
+        self.type_codes = type_codes
+        self.entity_text = entity_text
+        self.entity_starts = entity_starts
+        self.entity_ends = entity_ends
+        self.entity_label_codes = entity_label_codes
+        self.entity_labels = entity_labels
+        self.entity_ptr = entity_ptr
+        self.complete = complete
+        self.index = ClauseIndex(self)
+
+    @classmethod
+    def from_clauses(cls, clauses):
+        """Build a store from clause dicts ({'text', 'type', 'entities'})"""
+        builder = ClauseStoreBuilder()
+        builder.extend(clauses)
+        return builder.build()
+
+    def __len__(self):
+        return len(self.starts)
+
+    def text_of(self, i):
+        return self.text[self.starts[i]:self.ends[i]]
+
+    def type_of(self, i):
+        return CLAUSE_TYPES[self.type_codes[i]]
+
+    def entities_of(self, i):
+        rows = range(self.entity_ptr[i], self.entity_ptr[i + 1])
+        return [{'text': self.entity_text[self.entity_starts[r]:self.entity_ends[r]],
+                 'label': self.entity_labels[self.entity_label_codes[r]]} for r in rows]
+
+    def clause(self, i):
+        """One clause as the dict the rest of the app used to store"""
+        return {'text': self.text_of(i), 'entities': self.entities_of(i), 'type': self.type_of(i)}
+
+    def view(self, indices=None):
+        return ClauseView(self, np.arange(len(self)) if indices is None else np.asarray(indices))
+
+    def filter(self, clause_type=None, entity_label=None, query=None):
+        """
+        Clauses of one type, with an entity of one label and containing every
+        word of `query` ('All', None or an empty query skip that filter).
+        Answered from the index without copying any text.
+        """
+        indices, counts = self.index.select(clause_type, entity_label, query)
+        return ClauseView(self, indices, counts)
+
+    @property
+    def nbytes(self):
+        """Approximate memory held by the store"""
+        arrays = (self.starts, self.ends, self.type_codes, self.entity_starts,
+                  self.entity_ends, self.entity_label_codes, self.entity_ptr, self.complete)
+        strings = len(self.text.encode("utf-8")) + len(self.entity_text.encode("utf-8"))
+        return strings + sum(a.nbytes for a in arrays) + self.index.nbytes
+
+
+class ClauseIndex:
+    """
+    Lookup tables for one store: sorted clause ids per type and per entity
+    label, an inverted index from lowercased words to clause ids (all int32),
+    and the type counts. A filter intersects a few id arrays, so its cost
+    follows the size of the lists involved rather than a scan of every
+    clause, and the last SELECTIONS_KEPT results are memoized for reruns.
+    """
+
+    def __init__(self, store):
+        self.all = np.arange(len(store), dtype=np.int32)
+        self.by_type = {name: self.all[store.type_codes == code] for code, name in enumerate(CLAUSE_TYPES)}
+        self.type_counts = {name: len(ids) for name, ids in self.by_type.items()}
+
+        clause_of_entity = np.repeat(self.all, np.diff(store.entity_ptr))
+        self.by_label = {label: np.unique(clause_of_entity[store.entity_label_codes == code])
+                         for code, label in enumerate(store.entity_labels)}
+
+        postings = defaultdict(list)
+        for i, (start, end) in enumerate(zip(store.starts.tolist(), store.ends.tolist())):
+            for word in set(INDEX_TOKEN.findall(store.text[start:end].lower())):
+                postings[word].append(i)
+        self.vocabulary = sorted(postings)
+        self.postings = [np.array(postings[word], dtype=np.int32) for word in self.vocabulary]
+        self._selections = {}
+
+    def search(self, query):
+        """Clause ids containing every word of the query; each word also matches as a prefix"""
+        ids = self.all
+        for word in INDEX_TOKEN.findall(query.lower()):
+            lo = bisect_left(self.vocabulary, word)
+            hi = bisect_left(self.vocabulary, word[:-1] + chr(ord(word[-1]) + 1), lo)
+            if hi == lo:
+                return self.all[:0]
+            matches = self.postings[lo] if hi == lo + 1 else np.unique(np.concatenate(self.postings[lo:hi]))
+            ids = np.intersect1d(ids, matches, assume_unique=True)
+        return ids
+
+    def select(self, clause_type=None, entity_label=None, query=None):
+        """Sorted clause ids matching all given filters, and their type counts"""
+        query = (query or "").strip()
+        key = (clause_type, entity_label, query)
+        if key in self._selections:
+            return self._selections[key]
+
+        lists = []
+        if clause_type not in (None, "All"):
+            lists.append(self.by_type.get(clause_type, self.all[:0]))
+        if entity_label not in (None, "All"):
+            lists.append(self.by_label.get(entity_label, self.all[:0]))
+        if query:
+            lists.append(self.search(query))
+        ids = self.all
+        for other in sorted(lists, key=len):
+            ids = other if ids is self.all else np.intersect1d(ids, other, assume_unique=True)
+
+        if not lists:
+            counts = self.type_counts
+        elif len(lists) == 1 and clause_type not in (None, "All"):
+            counts = {name: len(ids) if name == clause_type else 0 for name in CLAUSE_TYPES}
+        else:
+            counts = None  # counted from the selection when asked for
+        if len(self._selections) >= SELECTIONS_KEPT:
+            self._selections.clear()
+        self._selections[key] = (ids, counts)
+        return ids, counts
+
+    @property
+    def nbytes(self):
+        arrays = [self.all, *self.by_type.values(), *self.by_label.values(), *self.postings]
+        return sum(a.nbytes for a in arrays) + sum(len(word) for word in self.vocabulary)
+
+
+class ClauseView:
+    """A selection of clauses from a store: just the store and an index array"""
+
+    def __init__(self, store, indices, counts=None):
+        self.store = store
+        self.indices = indices
+        self._counts = counts
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __iter__(self):
+        for i in self.indices:
+            yield self.store.clause(i)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return ClauseView(self.store, self.indices[position])
+        return self.store.clause(self.indices[position])
+
+    def complete(self):
+        """The part of the selection the clause view shows"""
+        return ClauseView(self.store, self.indices[self.store.complete[self.indices]])
+
+    def type_counts(self):
+        if self._counts is None:
+            counts = np.bincount(self.store.type_codes[self.indices], minlength=len(CLAUSE_TYPES))
+            self._counts = {name: int(counts[code]) for code, name in enumerate(CLAUSE_TYPES)}
+        return self._counts
+
+    def to_frame(self, max_chars=200):
+        """DataFrame of the selection; Type is a categorical over the stored codes"""
+        store = self.store
+        texts = [store.text[s:e] for s, e in zip(store.starts[self.indices], store.ends[self.indices])]
+        if max_chars is not None:
+            texts = [t[:max_chars] + ('...' if len(t) > max_chars else '') for t in texts]
+        entities = [
+            ', '.join(store.entity_text[store.entity_starts[r]:store.entity_ends[r]]
+                      for r in range(store.entity_ptr[i], store.entity_ptr[i + 1]))
+            for i in self.indices
+        ]
+        return pd.DataFrame({
+            'Clause': texts,
+            'Type': pd.Categorical.from_codes(store.type_codes[self.indices], categories=CLAUSE_TYPES),
+            'Entities': entities
+        })
+
+
+class ClauseStoreBuilder:
+    """Collects clause batches as they are analyzed, then packs them once"""
+
+    def __init__(self):
+        self._texts = []
+        self._type_codes = []
+        self._entity_texts = []
+        self._entity_labels = []
+        self._entity_counts = []
+        self._complete = []
+
+    def __len__(self):
+        return len(self._texts)
+
+    def extend(self, clauses):
+        for clause in clauses:
+            self._texts.append(clause['text'])
+            self._type_codes.append(TYPE_CODES.get(clause.get('type'), TYPE_CODES['Unknown']))
+            self._complete.append(is_complete_clause(clause['text']))
+            entities = clause.get('entities') or []
+            self._entity_counts.append(len(entities))
+            for entity in entities:
+                self._entity_texts.append(entity['text'])
+                self._entity_labels.append(entity['label'])
+
+    def build(self):
+        lengths = np.fromiter(map(len, self._texts), dtype=np.int64, count=len(self._texts))
+        starts = np.zeros(len(lengths), dtype=np.int64)
+        if len(lengths):
+            starts[1:] = np.cumsum(lengths + len(SEPARATOR))[:-1]
+
+        entity_lengths = np.fromiter(map(len, self._entity_texts), dtype=np.int64, count=len(self._entity_texts))
+        entity_starts = np.zeros(len(entity_lengths), dtype=np.int64)
+        if len(entity_lengths):
+            entity_starts[1:] = np.cumsum(entity_lengths)[:-1]
+
+        labels = sorted(set(self._entity_labels))
+        label_codes = {label: code for code, label in enumerate(labels)}
+        entity_ptr = np.zeros(len(self._entity_counts) + 1, dtype=np.int64)
+        np.cumsum(self._entity_counts, out=entity_ptr[1:])
+
+        return ClauseStore(
+            text=SEPARATOR.join(self._texts),
+            starts=starts,
+            ends=starts + lengths,
+            type_codes=np.array(self._type_codes, dtype=np.int8),
+            entity_text="".join(self._entity_texts),
+            entity_starts=entity_starts,
+            entity_ends=entity_starts + entity_lengths,
+            entity_label_codes=np.array([label_codes[l] for l in self._entity_labels], dtype=np.int16),
+            entity_labels=tuple(labels),
+            entity_ptr=entity_ptr,
+            complete=np.array(self._complete, dtype=bool)
+        )
@@ -0,0 +1,460 @@
+# corpus_index.py
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from utils.vector_index import VectorIndex, NPROBE
+
+# Analyzed documents live in the same SQLite file as the users (auth.py)
+DB_PATH = os.environ.get("CORPUS_DB_PATH", "users.db")
+VECTOR_DIR = os.environ.get("CORPUS_VECTOR_DIR", os.path.join("cache", "corpus_vectors"))
+# Store every analysis finished in the app; 0 turns it off
+CORPUS_INDEXING = os.environ.get("CORPUS_INDEXING", "1") != "0"
+LOCK_TIMEOUT = 60.0  # seconds to wait for another writer
+SEARCH_LIMIT = 50
+# Keyword matches scored with bm25 per query; scoring every match of a
+# common word would cost several microseconds per matching clause
+RANK_CANDIDATES = 1000
+# A query word is expanded to the stored words it prefixes when there are at
+# most this many; FTS5 prefix queries are several times slower than exact terms
+PREFIX_TERMS = 16
+# The vector index is rebuilt in a background thread once its unindexed tail
+# exceeds this share of it
+REBUILD_FRACTION = 0.2
+REBUILD_MIN_VECTORS = 20000
+
+# Stages recorded with each document; an analysis that ran all the stages of
+# the stored one and more replaces it
+ANALYSIS_STAGES = ('extract_entities', 'classify_clauses', 'summarize')
+
+# Letters and digits, as FTS5's unicode61 tokenizer splits words
+FTS_WORD = re.compile(r"[^\W_]+")
+
+
+def tag(kind, *values):
+    """
+    A single-token FTS5 term standing for a clause property, e.g. its type
+    or an entity it mentions, so filters run inside the full-text index
+    """
+    key = "\t".join(value.lower() for value in values)
+    return kind + hashlib.blake2b(key.encode("utf-8"), digest_size=8).hexdigest()
+
+
+def analysis_stages(options):
+    """The stages an analysis ran, as stored on its document, e.g. 'classify_clauses,extract_entities'"""
+    return ",".join(sorted(stage for stage in ANALYSIS_STAGES if (options or {}).get(stage)))
+
+
+def clause_tags(clause_type, entities):
+    """Tag terms of a clause: its type, and label, text and both for each entity"""
+    tags = {tag("t", clause_type or "")}
+    for text, label in entities:
+        tags.update((tag("l", label), tag("x", text), tag("e", label, text)))
+    return " ".join(sorted(tags))
+
+
+class CorpusIndex:
+    """
+    Analyzed clauses of every document, persisted for cross-contract search.
+
+    Documents, clauses and entities are SQLite tables (keyed by the file's
+    content hash, so a document is stored once, from the analysis that ran
+    the most stages). A contentless FTS5 index
+    holds the clause texts plus tag terms for each clause's type and
+    entities, so keyword, type and clause-entity filters are one full-text
+    query; clause_terms lists the words seen, to expand query prefixes into
+    exact terms (words of deleted documents stay listed and match nothing).
+    Clause embeddings go into an on-disk VectorIndex keyed by
+    clause id; clause ids are never reused, so vectors of replaced documents
+    simply stop matching until the next build drops them. The database
+    write transaction covers the row inserts only; the vector index has its
+    own lock, and rebuilds run in a background thread or from
+    `corpus_search.py build`, never inside the caller's save.
+    """
+
+    def __init__(self, db_path=DB_PATH, vector_dir=VECTOR_DIR):
+        self.db_path = db_path
+        self.vector_dir = vector_dir
+        self._vectors = None
+        self._vectors_lock = threading.Lock()
+        self._rebuild_thread = None
+        self._init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=LOCK_TIMEOUT, isolation_level=None)
+
+    def _init_db(self):
+        conn = self._connect()
+        try:
+            conn.executescript('''
+                CREATE TABLE IF NOT EXISTS documents (
+                    id INTEGER PRIMARY KEY,
+                    sha256 TEXT UNIQUE,
+                    source TEXT,
+                    summary TEXT,
+                    analyzed_at REAL,
+                    options TEXT
+                );
+                CREATE TABLE IF NOT EXISTS clauses (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    document_id INTEGER,
+                    position INTEGER,
+                    type TEXT,
+                    text TEXT
+                );
+                CREATE INDEX IF NOT EXISTS clauses_document ON clauses (document_id);
+                CREATE INDEX IF NOT EXISTS clauses_type ON clauses (type);
+                CREATE TABLE IF NOT EXISTS entities (
+                    clause_id INTEGER,
+                    label TEXT,
+                    text TEXT COLLATE NOCASE
+                );
+                CREATE INDEX IF NOT EXISTS entities_label_text ON entities (label, text, clause_id);
+                CREATE INDEX IF NOT EXISTS entities_clause ON entities (clause_id);
+                CREATE TABLE IF NOT EXISTS document_entities (
+                    label TEXT,
+                    text TEXT COLLATE NOCASE,
+                    document_id INTEGER,
+                    PRIMARY KEY (label, text, document_id)
+                ) WITHOUT ROWID;
+                CREATE VIRTUAL TABLE IF NOT EXISTS clauses_fts USING fts5(text, tags, content='');
+                CREATE TABLE IF NOT EXISTS clause_terms (term TEXT PRIMARY KEY) WITHOUT ROWID;
+                CREATE TABLE IF NOT EXISTS corpus_meta (name TEXT PRIMARY KEY, value TEXT);
+            ''')
+            if 'options' not in [row[1] for row in conn.execute("PRAGMA table_info(documents)")]:
+                # Documents stored before the options were recorded count as analyzed with none
+                try:
+                    conn.execute("ALTER TABLE documents ADD COLUMN options TEXT")
+                except sqlite3.OperationalError:
+                    pass  # added by another process in the meantime
+        finally:
+            conn.close()
+
+    def vectors(self, dim=None):
+        """
+        The clause vector index, or None before any vectors were added; its
+        dimension is fixed by the first ones.
+        """
+        with self._vectors_lock:
+            if self._vectors is None:
+                conn = self._connect()
+                try:
+                    if dim is not None:
+                        # Whoever stores vectors first sets it; every process then reads that value
+                        conn.execute("INSERT OR IGNORE INTO corpus_meta (name, value) VALUES ('vector_dim', ?)",
+                                     (str(int(dim)),))
+                    row = conn.execute("SELECT value FROM corpus_meta WHERE name = 'vector_dim'").fetchone()
+                finally:
+                    conn.close()
+                if row is None:
+                    return None
+                self._vectors = VectorIndex(self.vector_dir, int(row[0]))
+            return self._vectors
+
+    def add_documents(self, documents, embed=None, replace=False, rebuild=True):
+        """
+        Store analyzed documents: dicts with 'sha256', 'source', 'clauses'
+        (clause dicts or a ClauseStore) and optionally 'summary' and
+        'options' (the analysis options they ran with).
+        `embed(texts)` returns clause embeddings; without it no vectors are stored.
+        A document already stored is replaced when this analysis ran every
+        stage of the stored one and more (e.g. entities that the stored one
+        skipped), or with replace=True; otherwise it is skipped. With
+        `rebuild`, a vector index whose unindexed tail has grown too large is
+        rebuilt in a background thread.
+        Returns the number of documents added.
+        """
+        if not replace:
+            conn = self._connect()
+            try:
+                documents = [d for d in documents if _supersedes(conn, d)]
+            finally:
+                conn.close()
+        if not documents:
+            return 0
+        clause_lists = [list(_clause_rows(d['clauses'])) for d in documents]
+        embeddings = None
+        if embed is not None:
+            texts = [text for clauses in clause_lists for _, text, _ in clauses]
+            embeddings = embed(texts) if texts else None
+
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            added, clause_ids = 0, []
+            now = time.time()
+            for document, clauses in zip(documents, clause_lists):
+                existing = conn.execute("SELECT id FROM documents WHERE sha256 = ?",
+                                        (document['sha256'],)).fetchone()
+                if existing is not None:
+                    # Checked again: another writer may have stored it since
+                    if not replace and not _supersedes(conn, document):
+                        clause_ids.extend([None] * len(clauses))
+                        continue
+                    _delete_document(conn, existing[0])
+
+                document_id = conn.execute(
+                    "INSERT INTO documents (sha256, source, summary, analyzed_at, options) VALUES (?, ?, ?, ?, ?)",
+                    (document['sha256'], document.get('source'), document.get('summary'), now,
+                     analysis_stages(document.get('options')))
+                ).lastrowid
+                row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'clauses'").fetchone()
+                first_id = (row[0] if row else 0) + 1
+                ids = list(range(first_id, first_id + len(clauses)))
+                conn.executemany(
+                    "INSERT INTO clauses (id, document_id, position, type, text) VALUES (?, ?, ?, ?, ?)",
+                    [(clause_id, document_id, position, clause_type, text)
+                     for clause_id, (position, (clause_type, text, _)) in zip(ids, enumerate(clauses))]
+                )
+                conn.executemany("INSERT INTO clauses_fts (rowid, text, tags) VALUES (?, ?, ?)",
+                                 [(clause_id, text, clause_tags(clause_type, entities))
+                                  for clause_id, (clause_type, text, entities) in zip(ids, clauses)])
+                conn.executemany("INSERT OR IGNORE INTO clause_terms (term) VALUES (?)",
+                                 [(term,) for term in {word.lower() for _, text, _ in clauses
+                                                       for word in FTS_WORD.findall(text)}])
+                entity_rows = [(clause_id, label, text) for clause_id, (_, _, entities) in zip(ids, clauses)
+                               for text, label in entities]
+                conn.executemany("INSERT INTO entities (clause_id, label, text) VALUES (?, ?, ?)", entity_rows)
+                conn.executemany("INSERT OR IGNORE INTO document_entities (label, text, document_id) VALUES (?, ?, ?)",
+                                 [(label, text, document_id) for _, label, text in entity_rows])
+                clause_ids.extend(ids)
+                added += 1
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+        # Vectors only for committed clauses; a crash in between leaves clauses without vectors
+        keep = [i for i, clause_id in enumerate(clause_ids) if clause_id is not None]
+        if embeddings is not None and keep:
+            vectors = self.vectors(dim=embeddings.shape[1])
+            vectors.add([clause_ids[i] for i in keep], embeddings[keep])
+            if rebuild and vectors.pending_count > max(REBUILD_MIN_VECTORS, REBUILD_FRACTION * vectors.count):
+                self._start_rebuild()
+        return added
+
+    def build_vectors(self, wait=True):
+        """
+        Re-cluster the vector index now, e.g. after a bulk ingest, dropping
+        the vectors of deleted and replaced documents. With wait=False,
+        returns False at once when another process or thread is building.
+        """
+        vectors = self.vectors()
+        if vectors is None:
+            return False
+        return vectors.build(live_ids=self._clause_ids, wait=wait)
+
+    def _clause_ids(self):
+        conn = self._connect()
+        try:
+            return [row[0] for row in conn.execute("SELECT id FROM clauses")]
+        finally:
+            conn.close()
+
+    def _start_rebuild(self):
+        """Rebuild the vector index in a background thread, unless one is running"""
+        with self._vectors_lock:
+            if self._rebuild_thread is not None and self._rebuild_thread.is_alive():
+                return
+            self._rebuild_thread = threading.Thread(target=self.build_vectors, kwargs={'wait': False},
+                                                    name="corpus-vector-rebuild", daemon=True)
+            self._rebuild_thread.start()
+
+    def search(self, query=None, clause_type=None, entity_label=None, entity_text=None,
+               entity_scope="document", limit=SEARCH_LIMIT, ranked=True):
+        """
+        Clauses matching every given filter, e.g. Risky clauses mentioning
+        "indemnif" in documents with a GOVERNING_LAW entity "Delaware".
+        Query words also match as prefixes. entity_scope "document" matches
+        the entity anywhere in the clause's document, "clause" only within
+        the clause. With `ranked`, keyword matches come best first by bm25
+        among the first RANK_CANDIDATES matches (exact whenever there are
+        fewer); otherwise in storage order.
+        Returns: list of {'clause_id', 'source', 'sha256', 'type', 'text', 'score'}
+        """
+        conn = self._connect()
+        try:
+            terms = [self._word_query(conn, word.lower()) for word in FTS_WORD.findall(query or "")]
+            tags, conditions, params = [], [], []
+            if clause_type:
+                tags.append(tag("t", clause_type))
+            if entity_scope == "clause":
+                if entity_label and entity_text:
+                    tags.append(tag("e", entity_label, entity_text))
+                elif entity_label or entity_text:
+                    tags.append(tag("l", entity_label) if entity_label else tag("x", entity_text))
+            elif entity_label or entity_text:
+                entity_conditions = []
+                if entity_label:
+                    entity_conditions.append("label = ?")
+                    params.append(entity_label)
+                if entity_text:
+                    entity_conditions.append("text = ?")
+                    params.append(entity_text)
+                conditions.append("c.document_id IN (SELECT document_id FROM document_entities "
+                                  f"WHERE {' AND '.join(entity_conditions)})")
+
+            scored = bool(terms) and ranked
+            if terms or tags:
+                # CROSS JOIN keeps the full-text match as the outer loop; the planner
+                # would otherwise run the MATCH once per clause passing the other filters
+                source = "clauses_fts" + (" CROSS JOIN clauses c ON c.id = clauses_fts.rowid" if conditions else "")
+                columns = f"clauses_fts.rowid AS id, {'bm25(clauses_fts, 1.0, 0.0)' if scored else 'NULL'} AS score"
+                conditions.insert(0, "clauses_fts MATCH ?")
+                params.insert(0, " AND ".join(terms + [f"tags : {t}" for t in tags]))
+            else:
+                source, columns = "clauses c", "c.id AS id, NULL AS score"
+            matches = (f"SELECT {columns} FROM {source} "
+                       + (f"WHERE {' AND '.join(conditions)} " if conditions else "") + "LIMIT ?")
+            params.append(RANK_CANDIDATES if scored else limit)
+            if scored:
+                matches = f"SELECT id, score FROM ({matches}) ORDER BY score LIMIT ?"
+                params.append(limit)
+            # Texts and sources are read for the returned clauses only
+            sql = (f"SELECT c.id, d.source, d.sha256, c.type, c.text, m.score FROM ({matches}) m "
+                   f"JOIN clauses c ON c.id = m.id JOIN documents d ON d.id = c.document_id "
+                   + ("ORDER BY m.score" if scored else ""))
+            rows = conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+        return [{'clause_id': row[0], 'source': row[1], 'sha256': row[2], 'type': row[3],
+                 'text': row[4], 'score': row[5]} for row in rows]
+
+    @staticmethod
+    def _word_query(conn, word):
+        """FTS5 expression for one query word: the stored words it prefixes, or a prefix query"""
+        words = [row[0] for row in conn.execute(
+            "SELECT term FROM clause_terms WHERE term >= ? AND term < ? LIMIT ?",
+            (word, word + "\U0010ffff", PREFIX_TERMS + 1)
+        )]
+        if not words or len(words) > PREFIX_TERMS:
+            return f'text : "{word}"*'
+        return "(" + " OR ".join(f'text : "{w}"' for w in words) + ")"
+
+    def similar(self, vector, k=10, clause_type=None, nprobe=NPROBE):
+        """
+        Clauses whose embeddings are closest to `vector` (cosine similarity).
+        Returns: list of {'clause_id', 'source', 'sha256', 'type', 'text', 'score'}
+        """
+        vectors = self.vectors()
+        if vectors is None:
+            return []
+        # Extra candidates make up for replaced documents and the type filter
+        ids, scores = vectors.search(vector, k=k * 4 if clause_type else k * 2, nprobe=nprobe)
+        if not len(ids):
+            return []
+        conn = self._connect()
+        try:
+            rows = {}
+            id_list = [int(i) for i in ids]
+            for start in range(0, len(id_list), 500):
+                chunk = id_list[start:start + 500]
+                rows.update((row[0], row) for row in conn.execute(
+                    f"SELECT c.id, d.source, d.sha256, c.type, c.text FROM clauses c "
+                    f"JOIN documents d ON d.id = c.document_id WHERE c.id IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ))
+        finally:
+            conn.close()
+
+        results = []
+        for clause_id, score in zip(id_list, scores):
+            row = rows.get(clause_id)
+            if row is None or (clause_type and row[3] != clause_type):
+                continue
+            results.append({'clause_id': row[0], 'source': row[1], 'sha256': row[2], 'type': row[3],
+                            'text': row[4], 'score': float(score)})
+            if len(results) == k:
+                break
+        return results
+
+    def stats(self):
+        conn = self._connect()
+        try:
+            documents = conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+            clauses = conn.execute("SELECT COUNT(*) FROM clauses").fetchone()[0]
+        finally:
+            conn.close()
+        vectors = self.vectors()
+        return {
+            'documents': documents,
+            'clauses': clauses,
+            'vectors': len(vectors) if vectors is not None else 0,
+            'unindexed_vectors': vectors.pending_count if vectors is not None else 0,
+        }
+
+
+def _clause_rows(clauses):
+    """(type, text, [(entity text, label), ...]) per clause of a ClauseStore or clause dicts"""
+    if hasattr(clauses, 'text_of'):
+        for i in range(len(clauses)):
+            yield (clauses.type_of(i), clauses.text_of(i),
+                   [(e['text'], e['label']) for e in clauses.entities_of(i)])
+    else:
+        for clause in clauses:
+            yield (clause.get('type', 'Unknown'), clause['text'],
+                   [(e['text'], e['label']) for e in clause.get('entities') or []])
+
+
+def _supersedes(conn, document):
+    """True when `document` is not stored yet, or its analysis ran every stage of the stored one and more"""
+    row = conn.execute("SELECT options FROM documents WHERE sha256 = ?", (document['sha256'],)).fetchone()
+    if row is None:
+        return True
+    stored = set(filter(None, (row[0] or "").split(",")))
+    return set(filter(None, analysis_stages(document.get('options')).split(","))) > stored
+
+
+def _delete_document(conn, document_id):
+    # A contentless FTS5 row is deleted by passing back the values it was indexed with
+    clauses = conn.execute("SELECT id, type, text FROM clauses WHERE document_id = ?", (document_id,)).fetchall()
+    entities = {}
+    for clause_id, label, text in conn.execute(
+            "SELECT clause_id, label, text FROM entities "
+            "WHERE clause_id IN (SELECT id FROM clauses WHERE document_id = ?) ORDER BY rowid", (document_id,)):
+        entities.setdefault(clause_id, []).append((text, label))
+    conn.executemany("INSERT INTO clauses_fts (clauses_fts, rowid, text, tags) VALUES ('delete', ?, ?, ?)",
+                     [(clause_id, text, clause_tags(clause_type, entities.get(clause_id, [])))
+                      for clause_id, clause_type, text in clauses])
+    conn.execute("DELETE FROM entities WHERE clause_id IN (SELECT id FROM clauses WHERE document_id = ?)",
+                 (document_id,))
+    conn.execute("DELETE FROM document_entities WHERE document_id = ?", (document_id,))
+    conn.execute("DELETE FROM clauses WHERE document_id = ?", (document_id,))
+    conn.execute("DELETE FROM documents WHERE id = ?", (document_id,))
+
+
+def read_batch_output(paths):
+    """Successful document records from analyze_corpus.py JSONL shards (files or directories)"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith(".jsonl")))
+        else:
+            files.append(path)
+    for file_path in files:
+        with open(file_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    if "error" not in record:
+                        yield record
+
+
+_default_index = None
+_default_lock = threading.Lock()
+
+
+def get_corpus_index():
+    """The process-wide CorpusIndex at DB_PATH / VECTOR_DIR"""
+    global _default_index
+    with _default_lock:
+        if _default_index is None:
+            _default_index = CorpusIndex()
+        return _default_index
@@ -1,10 +1,24 @@
 import os
+import multiprocessing
 import pdfplumber
 import docx2txt
 import re
-from nltk.tokenize import sent_tokenize
-import nltk
-nltk.download('punkt')
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from utils import model_registry
+from utils.tracing import span, count
+
+# Page-parallel PDF extraction settings; processes that already run one
+# document per core (analyze_corpus.py workers) set PDF_WORKERS=1
+PDF_WORKERS = int(os.environ.get("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+PAGES_PER_SHARD = 25
+PARALLEL_MIN_PAGES = 50  # below this a process pool costs more than it saves
+
+# Clause segmentation patterns, compiled once
+SECTION_HEADER = re.compile(r'\n\d+\.\d+\s+.+?\n')  # e.g. "\n4.2 Termination\n"
+NUMERIC_ONLY = re.compile(r'[-\d\s]+')
+SECTION_NUMBER = re.compile(r'\d+\.\d+')
+CONNECTORS = (':', ';', ',')
 
 def clean_text(text):
     """Enhanced text cleaning"""
@@ -23,49 +37,78 @@ def clean_text(text):
     text = re.sub(r'\n{3,}', '\n\n', text)
     return text.strip()
 
-def parse_document(file_path):
+def parse_document(file_path, workers=PDF_WORKERS):
     """Handle file parsing with better error checking"""
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"File not found: {file_path}")
     
     try:
-        if file_path.lower().endswith('.pdf'):
-            with pdfplumber.open(file_path) as pdf:
-                return "\n".join(page.extract_text() for page in pdf.pages if page.extract_text())
-        elif file_path.lower().endswith('.docx'):
-            return docx2txt.process(file_path)
-        elif file_path.lower().endswith('.txt'):
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read()
-        else:
-            raise ValueError("Unsupported file format")
+        with span("parse_document", format=os.path.splitext(file_path)[1].lower()):
+            count("bytes_read", os.path.getsize(file_path))
+            if file_path.lower().endswith('.pdf'):
+                return "\n".join(text for text in extract_pdf_pages(file_path, workers=workers) if text)
+            elif file_path.lower().endswith('.docx'):
+                return docx2txt.process(file_path)
+            elif file_path.lower().endswith('.txt'):
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    return f.read()
+            else:
+                raise ValueError("Unsupported file format")
     except Exception as e:
         raise Exception(f"Error parsing {file_path}: {str(e)}")
 
-def parse_pdf(file_path):
+def extract_page_text(page, extract_kwargs=None):
+    """Extract one page's text, retrying with layout=True only if it comes back empty"""
+    text = page.extract_text(**(extract_kwargs or {}))
+    if not text or not text.strip():
+        text = page.extract_text(layout=True)
+        if not text or not text.strip():
+            text = ""
+    page.close()  # drop the cached layout objects of this page
+    return text
+
+def _extract_page_range(file_path, start, stop, extract_kwargs):
+    """Worker: extract pages [start, stop) of a PDF"""
+    with pdfplumber.open(file_path) as pdf:
+        return [extract_page_text(pdf.pages[i], extract_kwargs) for i in range(start, stop)]
+
+def extract_pdf_pages(file_path, workers=PDF_WORKERS, extract_kwargs=None):
+    """
+    Extract the text of every PDF page exactly once.
+    Large documents are split into page ranges that run in a process pool;
+    the result is one string per page, in page order ('' for empty pages).
+    """
+    with pdfplumber.open(file_path) as pdf:
+        page_count = len(pdf.pages)
+        count("pdf_pages", page_count)
+        if workers <= 1 or page_count < PARALLEL_MIN_PAGES:
+            return [extract_page_text(page, extract_kwargs) for page in pdf.pages]
+
+    shards = [(start, min(start + PAGES_PER_SHARD, page_count))
+              for start in range(0, page_count, PAGES_PER_SHARD)]
+    # spawn: the pool is started from job and request threads of processes that
+    # have torch and the tokenizers loaded, which fork would copy mid-flight
+    with ProcessPoolExecutor(max_workers=min(workers, len(shards)),
+                             mp_context=multiprocessing.get_context("spawn")) as pool:
+        futures = [pool.submit(_extract_page_range, file_path, start, stop, extract_kwargs)
+                   for start, stop in shards]
+        pages = []
+        for future in futures:
+            pages.extend(future.result())
+    return pages
+
+def parse_pdf(file_path, workers=PDF_WORKERS):
     """Robust PDF parser with improved text extraction"""
-    full_text = ""
     try:
-        with pdfplumber.open(file_path) as pdf:
-            for page in pdf.pages:
-                # Improved text extraction with layout preservation
-                text = page.extract_text(
-                    x_tolerance=1,
-                    y_tolerance=1,
-                    layout=False,  # Change to True if dealing with complex layouts
-                    keep_blank_chars=False
-                )
-                if text:
-                    full_text += text + "\n"
-                    
-        # Fallback if no text extracted (try with layout=True)
-        if not full_text.strip():
-            with pdfplumber.open(file_path) as pdf:
-                for page in pdf.pages:
-                    text = page.extract_text(layout=True)
-                    if text:
-                        full_text += text + "\n"
-                        
+        # Layout mode is tried per page, only for pages that come back empty
+        pages = extract_pdf_pages(file_path, workers=workers, extract_kwargs={
+            'x_tolerance': 1,
+            'y_tolerance': 1,
+            'layout': False,
+            'keep_blank_chars': False
+        })
+        full_text = "".join(text + "\n" for text in pages if text)
+
         if not full_text.strip():
             raise ValueError("No text could be extracted from PDF")
             
@@ -102,24 +145,76 @@ def parse_txt(file_path):
 
 def split_into_clauses(text):
     """Improved clause splitting for legal documents"""
-    # First split by major sections
-    sections = re.split(r'(\n\d+\.\d+\s+.+?\n)', text)
-    
-    clauses = []
-    current_section = ""
-    
-    for part in sections:
-        if re.match(r'\n\d+\.\d+\s+.+?\n', part):
-            current_section = part.strip()
+    with span("split_into_clauses"):
+        clauses = [_clause_text(text, group) for group in _segment(text)]
+    count("clauses", len(clauses))
+    return clauses
+
+def segment_clauses(text):
+    """
+    The clauses of split_into_clauses as (start, end, section) offsets into
+    `text`, without copying them. start/end exclude surrounding whitespace;
+    section is the heading of the clause's first sentence ("" before any).
+    """
+    with span("segment_clauses"):
+        segments = [(group[0][0], group[-1][1], group[0][2]) for group in _segment(text)]
+    count("clauses", len(segments))
+    return segments
+
+def _sentence_spans(text):
+    """(start, end, section) of every sentence; sentences never cross a heading"""
+    tokenizer = model_registry.get("punkt")
+    section = ""
+    position = 0
+    for header in chain(SECTION_HEADER.finditer(text), [None]):
+        part_end = header.start() if header else len(text)
+        for start, end in tokenizer.span_tokenize(text[position:part_end]):
+            yield position + start, position + end, section
+        if header:
+            section = header.group().strip()
+            position = header.end()
+
+def _segment(text):
+    """
+    Valid sentences in one pass, grouped the way clauses are merged: short
+    sentences and sentences ending in a connector are joined with their
+    buffered neighbours, longer ones stand alone.
+    Each group is a list of (start, end, section, raw_start) sentences.
+    """
+    groups = []
+    buffer = []
+    section_words = {"": 0}
+
+    for raw_start, raw_end, section in _sentence_spans(text):
+        sentence = text[raw_start:raw_end]
+        words = sentence.split()
+        if len(words) < 4 or NUMERIC_ONLY.fullmatch(sentence):
+            continue
+        if section not in section_words:
+            section_words[section] = len(section.split())
+
+        start = raw_start + len(sentence) - len(sentence.lstrip())
+        end = raw_start + len(sentence.rstrip())
+        piece = (start, end, section, raw_start)
+        # Word count of the clause including its "section: " prefix
+        if words[-1].endswith(CONNECTORS) or len(words) + section_words[section] < 8:
+            buffer.append(piece)
         else:
-            # Split into sentences but keep context
-            sentences = sent_tokenize(part)
-            for sentence in sentences:
-                if is_valid_clause(sentence):
-                    clause = f"{current_section}: {sentence}" if current_section else sentence
-                    clauses.append(clause.strip())
-    
-    return merge_split_clauses([c for c in clauses if is_valid_clause(c)])
+            if buffer:
+                groups.append(buffer)
+                buffer = []
+            groups.append([piece])
+
+    if buffer:
+        groups.append(buffer)
+    return groups
+
+def _clause_text(text, group):
+    # A sentence keeps its leading whitespace after the section prefix
+    return " ".join(
+        f"{section}: {text[raw_start:end]}" if section else text[start:end]
+        for start, end, section, raw_start in group
+    )
 
 def is_valid_clause(text):
     """Determine if text is a complete clause"""
@@ -128,28 +223,8 @@ def is_valid_clause(text):
         return False
     if len(text.split()) < 4:
         return False
-    if re.match(r'^[-\d\s]+$', text):
+    if NUMERIC_ONLY.fullmatch(text):
         return False
-    if re.match(r'^\d+\.\d+$', text):
+    if SECTION_NUMBER.fullmatch(text):
         return False
     return True
-
-def merge_split_clauses(clauses):
-    """Combine clauses that were incorrectly split"""
-    merged = []
-    buffer = ""
-    
-    for clause in clauses:
-        # If clause ends with connector or is short, buffer it
-        if clause.endswith((':', ';', ',')) or len(clause.split()) < 8:
-            buffer += " " + clause
-        else:
-            if buffer:
-                merged.append(buffer.strip())
-                buffer = ""
-            merged.append(clause)
-    
-    if buffer:
-        merged.append(buffer.strip())
-    
-    return [c for c in merged if is_valid_clause(c)]
\ No newline at end of file
@@ -0,0 +1,216 @@
+# embedding_cache.py
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+# Default location and size of the on-disk cache
+CACHE_DIR = os.path.join("cache", "embeddings")
+CACHE_CAPACITY = 20000  # vectors per model (768-d float32 -> ~60 MB)
+LOCK_TIMEOUT = 30.0  # seconds to wait for another worker's lock
+
+
+def normalize_text(text, lowercase=False):
+    """Collapse whitespace (and optionally case) so equivalent clauses share a key"""
+    text = " ".join(text.split())
+    return text.lower() if lowercase else text
+
+
+class EmbeddingCache:
+    """
+    Content-addressed, size-capped cache of clause embeddings.
+
+    Vectors live in a memory-mapped float32 matrix (one row per slot) and a
+    small SQLite index maps hash(model_id, normalized text) to a slot plus a
+    last-used timestamp for LRU eviction. Writers take an exclusive SQLite
+    lock and readers hold a shared one while copying rows out, so several
+    Streamlit worker processes can use the same directory safely.
+    """
+
+    def __init__(self, model_id, dim, cache_dir=CACHE_DIR, capacity=CACHE_CAPACITY, lowercase=False):
+        self.model_id = model_id
+        self.dim = int(dim)
+        self.capacity = int(capacity)
+        self.lowercase = lowercase
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        model_dir = hashlib.sha1(model_id.encode("utf-8")).hexdigest()[:16]
+        self.path = os.path.join(cache_dir, model_dir)
+        os.makedirs(self.path, exist_ok=True)
+        self.index_path = os.path.join(self.path, "index.db")
+        self.vectors_path = os.path.join(self.path, "vectors.f32")
+
+        self._init_storage()
+        self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+",
+                                 shape=(self.capacity, self.dim))
+
+    def _connect(self):
+        # Rollback-journal mode (the default) is required: a shared read lock
+        # must block writers until rows have been copied out of the matrix.
+        conn = sqlite3.connect(self.index_path, timeout=LOCK_TIMEOUT, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=DELETE")
+        return conn
+
+    def _init_storage(self):
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN EXCLUSIVE")
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    slot INTEGER UNIQUE,
+                    last_used REAL
+                )
+            ''')
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+            meta = dict(conn.execute("SELECT name, value FROM meta").fetchall())
+            layout = {"model_id": self.model_id, "dim": str(self.dim), "capacity": str(self.capacity)}
+
+            expected_size = self.capacity * self.dim * 4
+            if meta != layout or not os.path.exists(self.vectors_path) \
+                    or os.path.getsize(self.vectors_path) != expected_size:
+                # New cache or changed layout: start over with an empty matrix
+                conn.execute("DELETE FROM entries")
+                conn.execute("DELETE FROM meta")
+                conn.executemany("INSERT INTO meta (name, value) VALUES (?, ?)", layout.items())
+                with open(self.vectors_path, "wb") as f:
+                    f.truncate(expected_size)
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def key(self, text):
+        """Content hash of the normalized text and the model ID"""
+        normalized = normalize_text(text, self.lowercase)
+        return hashlib.sha256(f"{self.model_id}\0{normalized}".encode("utf-8")).hexdigest()
+
+    def get_many(self, texts):
+        """
+        Look up embeddings for a list of texts.
+        Returns: (dict of position -> vector for hits, list of miss positions)
+        """
+        keys = [self.key(t) for t in texts]
+        found = {}
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN")
+            slots = {}
+            for chunk_start in range(0, len(keys), 500):
+                chunk = list(set(keys[chunk_start:chunk_start + 500]))
+                rows = conn.execute(
+                    f"SELECT key, slot FROM entries WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                slots.update(rows)
+            # Copy rows while still holding the shared lock so no writer can
+            # recycle a slot underneath us
+            for position, key in enumerate(keys):
+                if key in slots:
+                    found[position] = np.array(self.vectors[slots[key]])
+            conn.execute("COMMIT")
+
+            if slots:
+                conn.execute("BEGIN IMMEDIATE")
+                now = time.time()
+                conn.executemany("UPDATE entries SET last_used = ? WHERE key = ?",
+                                 [(now, key) for key in slots])
+                conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+        misses = [i for i in range(len(texts)) if i not in found]
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(misses)
+        return found, misses
+
+    def put_many(self, texts, vectors):
+        """Store embeddings, evicting the least recently used entries when full"""
+        pending = {}
+        for text, vector in zip(texts, vectors):
+            pending[self.key(text)] = vector
+        if not pending:
+            return
+        # A batch larger than the cache can only keep its tail
+        items = list(pending.items())[-self.capacity:]
+
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN EXCLUSIVE")
+            items = self._new_items(conn, items)
+            shortfall = len(items) - len(self._free_slots(conn, len(items)))
+            if shortfall > 0:
+                # Evictions are committed before their slots are overwritten: if
+                # anything fails later, a rollback cannot bring back keys that
+                # would point at other clauses' vectors
+                evicted = conn.execute("SELECT key FROM entries ORDER BY last_used LIMIT ?", (shortfall,)).fetchall()
+                conn.executemany("DELETE FROM entries WHERE key = ?", evicted)
+                conn.execute("COMMIT")
+                conn.execute("BEGIN EXCLUSIVE")
+                # Another writer may have stored some of the keys or taken some slots in between
+                items = self._new_items(conn, items)
+            if not items:
+                conn.execute("COMMIT")
+                return
+
+            # Only slots no committed key refers to are written
+            free = self._free_slots(conn, len(items))
+            now = time.time()
+            for (key, vector), slot in zip(items, free):
+                self.vectors[slot] = vector
+            self.vectors.flush()
+            conn.executemany("INSERT INTO entries (key, slot, last_used) VALUES (?, ?, ?)",
+                             [(key, slot, now) for (key, _), slot in zip(items, free)])
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _new_items(conn, items):
+        """The (key, vector) items whose keys are not stored yet"""
+        keys = [k for k, _ in items]
+        existing = set()
+        for chunk_start in range(0, len(keys), 500):
+            chunk = keys[chunk_start:chunk_start + 500]
+            existing.update(row[0] for row in conn.execute(
+                f"SELECT key FROM entries WHERE key IN ({','.join('?' * len(chunk))})", chunk
+            ))
+        return [(k, v) for k, v in items if k not in existing]
+
+    def _free_slots(self, conn, limit):
+        """Up to `limit` slots that no stored key refers to"""
+        count, top = conn.execute("SELECT COUNT(*), MAX(slot) FROM entries").fetchone()
+        if top is None or top < count:
+            # Slots 0..count-1 are in use, as they are unless an eviction was left unfilled
+            return list(range(count, min(count + limit, self.capacity)))
+        used = {row[0] for row in conn.execute("SELECT slot FROM entries")}
+        return [slot for slot in range(self.capacity) if slot not in used][:limit]
+
+    def stats(self):
+        """Hit/miss counters for this process and current cache occupancy"""
+        conn = self._connect()
+        try:
+            entries = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        finally:
+            conn.close()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "capacity": self.capacity,
+        }
@@ -0,0 +1,135 @@
+# exporter.py
+import csv
+import io
+import json
+import os
+import threading
+import uuid
+
+from utils.clause_store import CLAUSE_TYPES
+
+EXPORT_DIR = os.environ.get("EXPORT_DIR", os.path.join("cache", "exports"))
+# Disk space the cached exports may use; the least recently written go first
+EXPORT_CACHE_MB = int(os.environ.get("EXPORT_CACHE_MB", "512"))
+# Clauses converted and written at once, so memory does not grow with the document
+EXPORT_CHUNK_ROWS = 2000
+
+EXPORT_FORMATS = {
+    'csv': "text/csv",
+    'jsonl': "application/x-ndjson",
+    'parquet': "application/vnd.apache.parquet",
+}
+
+_write_lock = threading.Lock()
+
+
+def export_path(key: str, fmt: str) -> str:
+    return os.path.join(EXPORT_DIR, f"{key}.{fmt}")
+
+
+def export_analysis(key: str, store, fmt: str) -> str:
+    """
+    Write every clause of an analysis (full text, type, entities) as CSV,
+    JSONL or Parquet, once per analysis key, and return the file's path.
+    Sessions and reruns asking for the same export get the same file.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    path = export_path(key, fmt)
+    with _write_lock:
+        if os.path.exists(path):
+            return path
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        temporary = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            WRITERS[fmt](store, temporary)
+            os.replace(temporary, path)
+        except Exception as e:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise Exception(f"Export failed: {str(e)}")
+        prune_exports(keep=path)
+    return path
+
+
+def prune_exports(max_bytes: int = EXPORT_CACHE_MB * 2**20, keep: str = None):
+    """Delete the oldest exports until the cache fits in max_bytes"""
+    files = []
+    for name in os.listdir(EXPORT_DIR):
+        path = os.path.join(EXPORT_DIR, name)
+        if not name.endswith(".tmp") and path != keep:
+            stat = os.stat(path)
+            files.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in files) + (os.path.getsize(keep) if keep else 0)
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        os.remove(path)
+        total -= size
+
+
+def export_chunks(store, rows: int = EXPORT_CHUNK_ROWS):
+    """(positions, types, texts, entity lists) for consecutive runs of clauses"""
+    for start in range(0, len(store), rows):
+        end = min(len(store), start + rows)
+        ptr = store.entity_ptr[start:end + 1].tolist()
+        entity_rows = range(ptr[0], ptr[-1])
+        entity_texts = [store.entity_text[s:e] for s, e in zip(store.entity_starts[entity_rows].tolist(),
+                                                               store.entity_ends[entity_rows].tolist())]
+        entity_labels = [store.entity_labels[c] for c in store.entity_label_codes[entity_rows].tolist()]
+        base = ptr[0]
+        yield (range(start, end),
+               [CLAUSE_TYPES[c] for c in store.type_codes[start:end].tolist()],
+               [store.text[s:e] for s, e in zip(store.starts[start:end].tolist(), store.ends[start:end].tolist())],
+               [[{'text': entity_texts[r - base], 'label': entity_labels[r - base]}
+                 for r in range(ptr[i], ptr[i + 1])] for i in range(end - start)])
+
+
+def write_csv(store, path: str):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Position", "Type", "Clause", "Entities"])
+        for positions, types, texts, entities in export_chunks(store):
+            writer.writerows(
+                (i, clause_type, text, "; ".join(f"{e['text']} ({e['label']})" for e in clause_entities))
+                for i, clause_type, text, clause_entities in zip(positions, types, texts, entities)
+            )
+
+
+def write_jsonl(store, path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        for positions, types, texts, entities in export_chunks(store):
+            buffer = io.StringIO()
+            for i, clause_type, text, clause_entities in zip(positions, types, texts, entities):
+                buffer.write(json.dumps({'position': i, 'type': clause_type, 'text': text,
+                                         'entities': clause_entities}, ensure_ascii=False))
+                buffer.write("\n")
+            f.write(buffer.getvalue())
+
+
+def write_parquet(store, path: str):
+    # pyarrow comes with Streamlit; imported here so the app starts without it
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ('position', pa.int32()),
+        ('type', pa.dictionary(pa.int8(), pa.string())),
+        ('text', pa.string()),
+        ('entities', pa.list_(pa.struct([('text', pa.string()), ('label', pa.string())]))),
+    ])
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        for positions, types, texts, entities in export_chunks(store):
+            writer.write_table(pa.table({
+                'position': pa.array(positions, type=pa.int32()),
+                'type': pa.array(types, type=pa.string()).dictionary_encode().cast(schema.field('type').type),
+                'text': pa.array(texts, type=pa.string()),
+                'entities': pa.array(entities, type=schema.field('entities').type),
+            }, schema=schema))
+
+
+WRITERS = {
+    'csv': write_csv,
+    'jsonl': write_jsonl,
+    'parquet': write_parquet,
+}
@@ -0,0 +1,188 @@
+# jobs.py
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.tracing import add_total, set_gauge
+
+# Analyses running at once across all sessions; more jobs wait in the queue
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+# Queued plus running jobs one user may have
+MAX_JOBS_PER_USER = int(os.environ.get("MAX_JOBS_PER_USER", "2"))
+# Finished jobs remembered so reconnecting sessions can still find them
+FINISHED_JOBS_KEPT = 100
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+ACTIVE = (QUEUED, RUNNING)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job function once cancellation was requested"""
+
+
+class JobLimitError(Exception):
+    """The user already has MAX_JOBS_PER_USER jobs queued or running"""
+
+
+class Job:
+    """One analysis request: status, progress and result, updated by its worker"""
+
+    def __init__(self, owner, key):
+        self.id = uuid.uuid4().hex[:12]
+        self.owner = owner
+        self.key = key
+        self.status = QUEUED
+        self.progress = 0.0
+        self.message = "Waiting for a free worker..."
+        self.batches = []  # clause batches published so far, for a live preview
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._cancel = threading.Event()
+
+    @property
+    def active(self):
+        return self.status in ACTIVE
+
+    @property
+    def wait_seconds(self):
+        return (self.started_at or time.time()) - self.submitted_at
+
+    @property
+    def run_seconds(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+        if self.status == QUEUED:
+            self.message = "Cancelling..."
+
+    def check_cancelled(self):
+        """Call between steps; stops the job if cancellation was requested"""
+        if self.cancel_requested:
+            raise JobCancelled()
+
+    def report(self, progress, message=None, batch=None):
+        self.progress = progress
+        if message is not None:
+            self.message = message
+        if batch is not None:
+            self.batches.append(batch)
+        self.check_cancelled()
+
+
+class JobManager:
+    """
+    Bounded pool running analysis jobs off the Streamlit script thread.
+    Workers share the process-wide models, loaded once by the pool
+    initializer. Successful results go into `result_cache` under the job's
+    key, so any session analyzing the same file and options finds them.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, max_per_user=MAX_JOBS_PER_USER, result_cache=None, initializer=None):
+        self.workers = workers
+        self.max_per_user = max_per_user
+        self.result_cache = result_cache
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis-job",
+                                            initializer=initializer)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, owner, key, func, *args):
+        """
+        Queue func(job, *args); its return value becomes the job result.
+        An active job for the same key is reused instead of starting another.
+        """
+        with self._lock:
+            for job in self._jobs.values():
+                if job.key == key and job.active:
+                    return job
+            if sum(1 for job in self._jobs.values() if job.owner == owner and job.active) >= self.max_per_user:
+                raise JobLimitError(f"At most {self.max_per_user} analyses per user can run at once")
+
+            job = Job(owner, key)
+            self._jobs[job.id] = job
+            self._prune()
+            self._update_gauges()
+        add_total("jobs_submitted")
+        self._executor.submit(self._run, job, func, args)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def find(self, key):
+        """Most recent job for an analysis key, if any"""
+        with self._lock:
+            for job in reversed(self._jobs.values()):
+                if job.key == key:
+                    return job
+        return None
+
+    def stats(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        finished = [job for job in jobs if not job.active and job.started_at is not None]
+        return {
+            'workers': self.workers,
+            'queued': sum(job.status == QUEUED for job in jobs),
+            'running': sum(job.status == RUNNING for job in jobs),
+            'avg_wait_seconds': sum(job.wait_seconds for job in finished) / len(finished) if finished else 0.0,
+            'avg_run_seconds': sum(job.run_seconds for job in finished) / len(finished) if finished else 0.0,
+        }
+
+    def _run(self, job, func, args):
+        if job.cancel_requested:
+            self._finish(job, CANCELLED, "Cancelled before it started")
+            return
+        job.started_at = time.time()
+        job.status = RUNNING
+        job.message = "Starting..."
+        with self._lock:
+            self._update_gauges()
+        add_total("job_wait_seconds", job.wait_seconds)
+
+        try:
+            job.result = func(job, *args)
+            if self.result_cache is not None:
+                self.result_cache.put(job.key, job.result)
+            self._finish(job, DONE, "Done")
+        except JobCancelled:
+            self._finish(job, CANCELLED, "Cancelled")
+        except Exception as e:
+            job.error = str(e)
+            self._finish(job, FAILED, f"Failed: {str(e)}")
+
+    def _finish(self, job, status, message):
+        job.finished_at = time.time()
+        job.status = status
+        job.message = message
+        job.progress = 1.0 if status == DONE else job.progress
+        job.batches = []  # the preview is not needed once the job has ended
+        if job.started_at is None:
+            job.started_at = job.finished_at
+        add_total(f"jobs_{status}")
+        add_total("job_run_seconds", job.run_seconds)
+        with self._lock:
+            self._update_gauges()
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if not job.active]
+        for job_id in finished[:max(0, len(finished) - FINISHED_JOBS_KEPT)]:
+            del self._jobs[job_id]
+
+    def _update_gauges(self):
+        set_gauge("job_queue_depth", sum(job.status == QUEUED for job in self._jobs.values()))
+        set_gauge("jobs_running", sum(job.status == RUNNING for job in self._jobs.values()))
@@ -0,0 +1,85 @@
+# model_registry.py
+import threading
+
+# Models are registered by name with a loader and loaded on first use.
+# Module state lives for the whole process, so every Streamlit session and
+# rerun shares one copy of each model.
+_loaders = {}
+_models = {}
+_errors = {}
+_locks = {}
+_registry_lock = threading.Lock()
+
+
+def register(name, loader):
+    """Register a zero-argument loader; nothing is loaded until get(name)"""
+    with _registry_lock:
+        lock = _locks.setdefault(name, threading.Lock())
+    with lock:
+        # Re-registering replaces the loader and drops what the old one loaded
+        _loaders[name] = loader
+        _models.pop(name, None)
+        _errors.pop(name, None)
+
+
+def get(name):
+    """Return the model, loading it (once, thread-safely) if needed"""
+    try:
+        return _models[name]
+    except KeyError:
+        pass
+    if name not in _loaders:
+        raise KeyError(f"No model registered under '{name}'")
+
+    with _locks[name]:
+        if name not in _models:
+            try:
+                _models[name] = _loaders[name]()
+                _errors.pop(name, None)
+            except Exception as e:
+                _errors[name] = str(e)
+                raise RuntimeError(f"Failed to load {name}: {str(e)}") from e
+    return _models[name]
+
+
+def is_loaded(name):
+    return name in _models
+
+
+def is_ready(names=None):
+    """True when all (or the given) registered models are loaded"""
+    names = list(_loaders) if names is None else names
+    return all(name in _models for name in names)
+
+
+def status():
+    """Loading state of every registered model"""
+    return {
+        name: "ready" if name in _models else (f"failed: {_errors[name]}" if name in _errors else "not loaded")
+        for name in list(_loaders)
+    }
+
+
+def warm_up(names=None):
+    """Load all (or the given) registered models now; returns status()"""
+    for name in list(_loaders) if names is None else names:
+        try:
+            get(name)
+        except Exception:
+            pass  # recorded in status(); get() raises again on real use
+    return status()
+
+
+def _load_punkt():
+    """NLTK's English sentence tokenizer; its data is downloaded only if missing"""
+    import nltk
+    from nltk.tokenize.punkt import PunktTokenizer
+
+    try:
+        nltk.data.find("tokenizers/punkt_tab/english/")
+    except LookupError:
+        nltk.download("punkt_tab", quiet=True)
+    return PunktTokenizer("english")
+
+
+register("punkt", _load_punkt)
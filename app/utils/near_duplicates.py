@@ -0,0 +1,236 @@
+# near_duplicates.py
+import os
+import re
+import threading
+import zlib
+from collections import Counter, OrderedDict
+from difflib import SequenceMatcher
+
+import numpy as np
+
+# Clauses that are near-identical to an analyzed one (the same boilerplate with
+# other party names, dates or amounts) reuse its type and entities. Off by
+# default: a reused type does not always match a full analysis yet, and results
+# would depend on what the process analyzed before rather than on the file and
+# options alone, which the result, export and corpus caches assume
+NEAR_DUPLICATES = os.environ.get("NEAR_DUPLICATES", "0") != "0"
+# Minimum share of matching words (difflib ratio) between a clause and its template
+SIMILARITY_THRESHOLD = float(os.environ.get("NEAR_DUPLICATE_THRESHOLD", "0.85"))
+# Templates kept per process and analysis options; the least recently matched go first
+TEMPLATE_CAPACITY = int(os.environ.get("NEAR_DUPLICATE_CAPACITY", "50000"))
+
+# 64 MinHash values in 16 bands of 4 rows: clauses whose word-pair shingles
+# have a Jaccard similarity of 0.7 share a band 99% of the time
+NUM_PERM = 64
+BANDS = 16
+SHINGLE_WORDS = 2
+CANDIDATES_CHECKED = 4
+# Templates listed per LSH bucket; keeps lookups fast when much boilerplate shares a band
+BUCKET_LIMIT = 64
+# Words of context on each side of a changed span when its entities are re-extracted
+CONTEXT_WORDS = 2
+# A clause that differs from its template in one of these words says something
+# else and is analyzed in full
+MEANING_WORDS = {"not", "no", "nor", "never", "without", "except", "unless", "shall", "may", "must", "will"}
+
+WORD = re.compile(r"\S+")
+_PRIME = (1 << 31) - 1
+_rng = np.random.RandomState(0)
+_A = _rng.randint(1, _PRIME, size=(NUM_PERM, 1)).astype(np.uint64)
+_B = _rng.randint(0, _PRIME, size=(NUM_PERM, 1)).astype(np.uint64)
+
+
+def minhash(words: list) -> np.ndarray:
+    """MinHash signature of the lowercased word-pair shingles"""
+    words = [w.lower() for w in words]
+    shingles = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(max(1, len(words) - SHINGLE_WORDS + 1))}
+    values = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+    return ((_A * values + _B) % _PRIME).min(axis=1)
+
+
+def band_keys(signature: np.ndarray) -> list:
+    rows = NUM_PERM // BANDS
+    return [(band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(BANDS)]
+
+
+class Template:
+    """An analyzed clause: its words, type and entity offsets"""
+
+    __slots__ = ("text", "words", "spans", "type", "entities", "keys")
+
+    def __init__(self, text, spans, clause_type, entities, keys):
+        self.text = text
+        self.words = [text[s:e] for s, e in spans]
+        self.spans = spans  # (start, end) character offsets of the words
+        self.type = clause_type
+        self.entities = entities  # (start, end, label)
+        self.keys = keys
+
+
+class TemplateIndex:
+    """
+    MinHash/LSH index of analyzed clauses. A clause whose words match a
+    template's closely enough (SIMILARITY_THRESHOLD) reuses its type and
+    the entities outside the changed words; only the changed spans need NER.
+    """
+
+    def __init__(self, capacity: int = TEMPLATE_CAPACITY, threshold: float = SIMILARITY_THRESHOLD):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.templates = OrderedDict()  # id -> Template, least recently matched first
+        self.exact = {}  # text -> id
+        self.buckets = {}  # (band, key) -> set of ids
+        self.next_id = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.templates)
+
+    def match(self, text: str):
+        """(template, word opcodes) for the closest template, or None"""
+        spans = [m.span() for m in WORD.finditer(text)]
+        if not spans:
+            return None
+        with self._lock:
+            template_id = self.exact.get(text)
+            if template_id is not None:
+                template = self.templates[template_id]
+                self.templates.move_to_end(template_id)
+                self.hits += 1
+                return template, [("equal", 0, len(spans), 0, len(spans))]
+
+        words = [text[s:e] for s, e in spans]
+        candidates = Counter()
+        with self._lock:
+            for key in band_keys(minhash(words)):
+                candidates.update(self.buckets.get(key, ()))
+            templates = [self.templates[i] for i, _ in candidates.most_common(CANDIDATES_CHECKED)]
+        for template in templates:
+            matcher = SequenceMatcher(None, template.words, words, autojunk=False)
+            if matcher.real_quick_ratio() < self.threshold or matcher.quick_ratio() < self.threshold \
+                    or matcher.ratio() < self.threshold:
+                continue
+            opcodes = matcher.get_opcodes()
+            if any(w.lower().strip(".,;:()") in MEANING_WORDS
+                   for tag, i1, i2, j1, j2 in opcodes if tag != "equal"
+                   for w in template.words[i1:i2] + words[j1:j2]):
+                continue
+            with self._lock:
+                self.hits += 1
+            return template, opcodes
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def add(self, text: str, clause_type: str, entities: list):
+        """Store a fully analyzed clause; `entities` are (text, label, start, end)"""
+        spans = [m.span() for m in WORD.finditer(text)]
+        if not spans:
+            return
+        keys = band_keys(minhash([text[s:e] for s, e in spans]))
+        template = Template(text, spans, clause_type, [(s, e, label) for _, label, s, e in entities], keys)
+        with self._lock:
+            if text in self.exact:
+                return
+            template_id = self.next_id
+            self.next_id += 1
+            self.templates[template_id] = template
+            self.exact[text] = template_id
+            for key in keys:
+                bucket = self.buckets.setdefault(key, set())
+                if len(bucket) < BUCKET_LIMIT:
+                    bucket.add(template_id)
+            while len(self.templates) > self.capacity:
+                self._evict()
+
+    def _evict(self):
+        template_id, template = self.templates.popitem(last=False)
+        del self.exact[template.text]
+        for key in template.keys:
+            bucket = self.buckets.get(key)
+            if bucket is not None:
+                bucket.discard(template_id)
+                if not bucket:
+                    del self.buckets[key]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "templates": len(self.templates),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def carried_entities(template: Template, text: str, opcodes: list) -> list:
+    """Template entities whose words are unchanged, as (start, end, label) offsets in `text`"""
+    spans = [m.span() for m in WORD.finditer(text)]
+    position = [None] * len(template.spans)
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == "equal":
+            position[i1:i2] = range(j1, j2)
+
+    carried = []
+    for start, end, label in template.entities:
+        words = [i for i, (s, e) in enumerate(template.spans) if s < end and e > start]
+        if not words or any(position[i] is None for i in words) \
+                or position[words[-1]] - position[words[0]] != words[-1] - words[0]:
+            continue
+        first, last = template.spans[words[0]], template.spans[words[-1]]
+        new_first, new_last = spans[position[words[0]]], spans[position[words[-1]]]
+        carried.append((new_first[0] + start - first[0], new_last[0] + end - last[0], label))
+    return carried
+
+
+def changed_spans(text: str, opcodes: list) -> list:
+    """(start, end) character ranges around the changed words of `text`, with CONTEXT_WORDS on each side"""
+    spans = [m.span() for m in WORD.finditer(text)]
+    ranges = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == "equal":
+            continue
+        first, last = max(0, j1 - CONTEXT_WORDS), min(len(spans), j2 + CONTEXT_WORDS) - 1
+        if last < first:
+            continue
+        start, end = spans[first][0], spans[last][1]
+        if ranges and start <= ranges[-1][1]:
+            ranges[-1] = (ranges[-1][0], max(end, ranges[-1][1]))
+        else:
+            ranges.append((start, end))
+    return ranges
+
+
+def merge_entities(text: str, carried: list, extracted: list) -> list:
+    """
+    Entities of a near-duplicate clause in document order: the carried ones
+    plus those re-extracted from its changed spans that do not overlap them.
+    `extracted` holds (start, end, label) offsets in `text`.
+    """
+    entities = list(carried)
+    for start, end, label in extracted:
+        if not any(start < e and end > s for s, e, _ in entities):
+            entities.append((start, end, label))
+    return [(text[s:e], label) for s, e, label in sorted(entities)]
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_template_index(options: dict):
+    """The process-wide template index for one combination of analysis options; None when nothing is reused"""
+    key = (bool(options.get('extract_entities')), bool(options.get('classify_clauses')))
+    if not any(key):
+        return None
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = TemplateIndex()
+        return _indexes[key]
+
+
+def clear_template_indexes():
+    with _indexes_lock:
+        _indexes.clear()
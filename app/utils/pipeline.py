@@ -0,0 +1,366 @@
+# pipeline.py
+import os
+import re
+import time
+
+from utils.document_parser import parse_document, split_into_clauses
+from utils.ner_model import extract_entity_spans_batch
+from utils.classifier import classify_clauses, get_embeddings
+from utils.summarizer import generate_summary, section_candidates, summarize_candidates, REDACTED_MARK
+from utils.tracing import document_trace, span, count, observe
+from utils.clause_store import ClauseStoreBuilder
+from utils.corpus_index import CORPUS_INDEXING, get_corpus_index
+from utils.revisions import MODIFIED, REMOVED, align_clauses, clause_hashes, section_bounds, store_hashes
+from utils.near_duplicates import NEAR_DUPLICATES, carried_entities, changed_spans, get_template_index, merge_entities
+from utils import model_registry
+
+# Clauses tagged and classified per step; small enough for a quick first result,
+# large enough to keep spaCy and BERT batches efficient
+CLAUSE_BATCH_SIZE = 32
+# Clauses a background job publishes for the live preview before it finishes
+PREVIEW_CLAUSES = 64
+# Also store clause embeddings for similarity search when saving to the corpus index
+CORPUS_VECTORS = os.environ.get("CORPUS_VECTORS", "1") != "0"
+
+DEFAULT_OPTIONS = {
+    'extract_entities': True,
+    'classify_clauses': True,
+    'summarize': True
+}
+
+# Registry entries each option needs; sentence splitting always needs punkt
+MODELS_BY_OPTION = {
+    'extract_entities': ['ner'],
+    'classify_clauses': ['embedding_cache', 'clause_classifier', 'lexical_classifier',
+                         'legal_bert_tokenizer', 'legal_bert'],
+    'summarize': []
+}
+
+
+def warm_up(options: dict = None) -> dict:
+    """Load the models the given analysis options need; returns their status"""
+    options = {**DEFAULT_OPTIONS, **(options or {})}
+    names = ['punkt'] + [name for option, enabled in options.items() if enabled
+                         for name in MODELS_BY_OPTION.get(option, [])]
+    model_registry.warm_up(names)
+    return {name: state for name, state in model_registry.status().items() if name in names}
+
+
+def clean_display_text(text: str) -> str:
+    text = re.sub(r'(\[REDACTED\]\s*){2,}', '[REDACTED]', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text[:5000] + "..." if len(text) > 5000 else text
+
+
+def prepare_clauses(file_path: str) -> list:
+    """Parse a document and split it into cleaned clause texts"""
+    text = parse_document(file_path)
+    clauses = split_into_clauses(text)
+    with span("clean_clauses"):
+        return [clean_display_text(clause) for clause in clauses if clause.strip()]
+
+
+def iter_clause_batches(texts: list, options: dict = None, batch_size: int = CLAUSE_BATCH_SIZE,
+                        warnings: list = None, reuse: bool = None, stats: dict = None):
+    """
+    Run NER and classification over clause texts one batch at a time.
+    Yields lists of clause dicts ({'text', 'entities', 'type'}) in document order.
+    Failures are appended to `warnings` and leave the batch with default values.
+    With reuse (default: NEAR_DUPLICATES) a clause near-identical to one
+    analyzed before takes its type and entities from the template index and
+    only its changed words go through NER; they are counted in
+    stats['near_duplicates'].
+    """
+    options = {**DEFAULT_OPTIONS, **(options or {})}
+    templates = get_template_index(options) if (NEAR_DUPLICATES if reuse is None else reuse) else None
+
+    for start in range(0, len(texts), batch_size):
+        batch = [
+            {'text': text, 'entities': [], 'type': 'General'}
+            for text in texts[start:start + batch_size]
+        ]
+        if templates is not None:
+            with span("match_templates"):
+                matches = [templates.match(c['text']) for c in batch]
+        else:
+            matches = [None] * len(batch)
+        fresh = [clause for clause, match in zip(batch, matches) if match is None]
+        entity_spans = [[] for _ in fresh]
+        failed = False
+
+        if options['extract_entities'] and fresh:
+            try:
+                entity_spans = extract_entity_spans_batch([c['text'] for c in fresh])
+                for clause, entities in zip(fresh, entity_spans):
+                    clause['entities'] = [{'text': ent[0], 'label': ent[1]} for ent in entities]
+            except Exception as e:
+                failed = True
+                _warn(warnings, f"Entity extraction failed: {str(e)}")
+
+        if options['classify_clauses'] and fresh:
+            try:
+                classifications = classify_clauses([c['text'] for c in fresh])
+                for clause, classification in zip(fresh, classifications):
+                    clause['type'] = classification.get('type', 'General')
+            except Exception as e:
+                failed = True
+                _warn(warnings, f"Classification failed: {str(e)}")
+
+        if templates is not None:
+            # Only complete analyses become templates
+            if not failed:
+                for clause, entities in zip(fresh, entity_spans):
+                    templates.add(clause['text'], clause['type'], entities)
+            reused = len(batch) - len(fresh)
+            if reused:
+                apply_templates(batch, matches, options, warnings)
+            count("near_duplicate_clauses", reused)
+            if stats is not None:
+                stats['near_duplicates'] = stats.get('near_duplicates', 0) + reused
+
+        yield batch
+
+
+def apply_templates(batch: list, matches: list, options: dict, warnings: list = None):
+    """
+    Fill in the near-duplicate clauses of a batch from their templates: the
+    template's type, its entities on unchanged words, and the entities NER
+    finds around the changed words
+    """
+    reused = [(clause, match) for clause, match in zip(batch, matches) if match is not None]
+    snippets = []
+    for k, (clause, (template, opcodes)) in enumerate(reused):
+        clause['type'] = template.type
+        snippets.extend((k, start, clause['text'][start:end]) for start, end in changed_spans(clause['text'], opcodes))
+    if not options['extract_entities']:
+        return
+
+    extracted = [[] for _ in reused]
+    if snippets:
+        try:
+            found = extract_entity_spans_batch([text for _, _, text in snippets])
+            for (k, offset, _), entities in zip(snippets, found):
+                extracted[k].extend((offset + s, offset + e, label) for _, label, s, e in entities)
+        except Exception as e:
+            _warn(warnings, f"Entity extraction failed: {str(e)}")
+    for (clause, (template, opcodes)), entities in zip(reused, extracted):
+        carried = carried_entities(template, clause['text'], opcodes)
+        clause['entities'] = [{'text': text, 'label': label}
+                              for text, label in merge_entities(clause['text'], carried, entities)]
+
+
+def summarize_clauses(clauses: list, warnings: list = None) -> str:
+    """Summary of the whole document, built from the processed clauses"""
+    return summarize_text(" ".join(c['text'] for c in clauses), warnings)
+
+
+def summarize_text(full_text: str, warnings: list = None, selected: list = None) -> str:
+    """Summary of the space-joined clause texts (ClauseStore.text); its sentences go into `selected`"""
+    try:
+        return generate_summary(full_text, selected=selected)
+    except Exception as e:
+        _warn(warnings, f"Summary generation failed: {str(e)}")
+        return "Summary unavailable"
+
+
+def analyze_document(file_path: str, options: dict = None, batch_size: int = CLAUSE_BATCH_SIZE,
+                     warnings: list = None, profile: bool = False) -> dict:
+    """
+    Run the full pipeline without streaming, emitting one trace for the document.
+    Returns: {'clauses': [...], 'summary': str (if summarizing), 'timings': {...},
+              'near_duplicates': clauses that reused a template}
+    """
+    options = {**DEFAULT_OPTIONS, **(options or {})}
+    with document_trace("analyze_document", profile=profile,
+                        source=os.path.basename(file_path), options=options):
+        start_time = time.time()
+        first_clause_time = None
+
+        clauses = []
+        stats = {}
+        for batch in iter_clause_batches(prepare_clauses(file_path), options, batch_size, warnings, stats=stats):
+            if first_clause_time is None:
+                first_clause_time = time.time() - start_time
+            clauses.extend(batch)
+
+        result = {'clauses': clauses}
+        if options['summarize']:
+            result['summary'] = summarize_clauses(clauses, warnings)
+        result['timings'] = {
+            'first_clause': first_clause_time,
+            'total': time.time() - start_time
+        }
+        result['near_duplicates'] = stats.get('near_duplicates', 0)
+        if first_clause_time is not None:
+            observe("time_to_first_clause", first_clause_time)
+    return result
+
+
+def run_analysis_job(job, file_path: str, options: dict = None, profile: bool = False,
+                     source: str = None, file_hash: str = None) -> dict:
+    """
+    Job function for utils.jobs: the same pipeline as analyze_document, with
+    progress reports (which are also the cancellation points) and the first
+    clause batches published for a live preview. With a file_hash the
+    result is also saved to the corpus index for cross-contract search.
+    Returns: {'clauses': ClauseStore, 'summary': str and 'summary_sentences' (if summarizing),
+              'timings': {...}, 'near_duplicates': int, 'warnings': [...]}
+    """
+    options = {**DEFAULT_OPTIONS, **(options or {})}
+    warnings = []
+    with document_trace("analysis_job", profile=profile, source=source or os.path.basename(file_path),
+                        options=options, job_id=job.id) as trace:
+        start_time = time.time()
+        first_clause_time = None
+
+        job.report(0.0, "🔍 Parsing document...")
+        texts = prepare_clauses(file_path)
+        clauses = ClauseStoreBuilder()
+        stats = {}
+        for batch in iter_clause_batches(texts, options, warnings=warnings, stats=stats):
+            if first_clause_time is None:
+                first_clause_time = time.time() - start_time
+            clauses.extend(batch)
+            job.report(len(clauses) / len(texts), f"🔍 Analyzed {len(clauses)} of {len(texts)} clauses...",
+                       batch if len(clauses) <= PREVIEW_CLAUSES else None)
+
+        store = clauses.build()
+        result = {'clauses': store}
+        if options['summarize']:
+            job.report(1.0, "📝 Summarizing...")
+            # Kept as picked, before cleaning, for revise_summary on the next version
+            result['summary_sentences'] = []
+            result['summary'] = summarize_text(store.text, warnings, result['summary_sentences'])
+        result['timings'] = {
+            'first_clause': first_clause_time,
+            'total': time.time() - start_time
+        }
+        result['near_duplicates'] = stats.get('near_duplicates', 0)
+        if file_hash and CORPUS_INDEXING:
+            job.report(1.0, "🗂 Saving to the contract library...")
+            save_to_corpus(file_hash, source or os.path.basename(file_path), store,
+                           result.get('summary'), options, warnings)
+        result['warnings'] = warnings
+        if first_clause_time is not None:
+            observe("time_to_first_clause", first_clause_time)
+    if trace is not None and trace.profile_path:
+        result['profile_path'] = trace.profile_path
+    return result
+
+
+def run_revision_job(job, file_path: str, base: dict, options: dict = None, profile: bool = False,
+                     source: str = None, file_hash: str = None, base_hash: str = None) -> dict:
+    """
+    Job function for a new version of an analyzed document: clauses are
+    aligned against the earlier analysis `base` (same options) by content
+    hash, only inserted and modified clauses go through NER and
+    classification, and the summary is re-ranked from the previous one and
+    the sections that changed.
+    Returns what run_analysis_job does, plus 'revision' (the changes) and
+    'clause_hashes' (for the next version).
+    """
+    options = {**DEFAULT_OPTIONS, **(options or {})}
+    warnings = []
+    with document_trace("revision_job", profile=profile, source=source or os.path.basename(file_path),
+                        options=options, job_id=job.id) as trace:
+        start_time = time.time()
+
+        job.report(0.0, "🔍 Parsing document...")
+        texts = prepare_clauses(file_path)
+        old = base['clauses']
+        hashes = clause_hashes(texts)
+        with span("align_clauses"):
+            source_index, changes = align_clauses(base.get('clause_hashes') or store_hashes(old), hashes)
+        todo = [j for j, i in enumerate(source_index) if i is None]
+        count("revision_clauses_reused", len(texts) - len(todo))
+        count("revision_clauses_analyzed", len(todo))
+
+        analyzed = {}
+        positions = iter(todo)
+        job.report(0.0, f"🔍 {len(todo)} of {len(texts)} clauses changed...")
+        for batch in iter_clause_batches([texts[j] for j in todo], options, warnings=warnings):
+            for clause in batch:
+                analyzed[next(positions)] = clause
+            job.report(len(analyzed) / len(todo), f"🔍 Analyzed {len(analyzed)} of {len(todo)} changed clauses...")
+
+        clauses = ClauseStoreBuilder()
+        clauses.extend(analyzed[j] if i is None else old.clause(i) for j, i in enumerate(source_index))
+        store = clauses.build()
+        result = {'clauses': store, 'clause_hashes': hashes}
+        if options['summarize']:
+            job.report(1.0, "📝 Summarizing changed sections...")
+            result['summary_sentences'] = []
+            result['summary'] = revise_summary(texts, hashes, source_index, store.text,
+                                               base.get('summary_sentences'), warnings, result['summary_sentences'])
+        result['revision'] = {
+            'base': base_hash,
+            'reused': len(texts) - len(todo),
+            'analyzed': len(todo),
+            # Earlier texts are kept only for the changed clauses
+            'changes': [{'kind': kind, 'new': j, 'old_text': old.text_of(i) if kind in (MODIFIED, REMOVED) else None}
+                        for kind, i, j in changes],
+        }
+        result['timings'] = {
+            'first_clause': None,
+            'total': time.time() - start_time
+        }
+        if file_hash and CORPUS_INDEXING:
+            job.report(1.0, "🗂 Saving to the contract library...")
+            save_to_corpus(file_hash, source or os.path.basename(file_path), store,
+                           result.get('summary'), options, warnings)
+        result['warnings'] = warnings
+    if trace is not None and trace.profile_path:
+        result['profile_path'] = trace.profile_path
+    return result
+
+
+def revise_summary(texts: list, hashes: list, source_index: list, full_text: str, previous: list = None,
+                   warnings: list = None, selected: list = None) -> str:
+    """
+    Summary of a new version: the sentences the previous summary was built
+    from (its 'summary_sentences') still in the document, ranked together
+    with the best sentences of each section holding an inserted or modified
+    clause (revisions.section_bounds). The picked sentences go into `selected`.
+    """
+    try:
+        # Summary sentences read [REDACTED] where the document has [*]
+        full_text = REDACTED_MARK.sub('[REDACTED]', full_text)
+        candidates = [s for s in previous or [] if s in full_text]
+        changed = [(start, end) for start, end in section_bounds(hashes)
+                   if any(source_index[j] is None for j in range(start, end))]
+        count("summary_sections_changed", len(changed))
+        for start, end in changed:
+            candidates.extend(s for s in section_candidates(" ".join(texts[start:end])) if s not in candidates)
+        # Ranked in document order; anything not found goes last
+        positions = {s: full_text.find(s) for s in candidates}
+        return summarize_candidates(sorted(candidates, key=lambda s: (positions[s] < 0, positions[s])),
+                                    selected=selected)
+    except Exception as e:
+        _warn(warnings, f"Summary generation failed: {str(e)}")
+        return "Summary unavailable"
+
+
+def save_to_corpus(file_hash: str, source: str, clauses, summary: str = None, options: dict = None,
+                   warnings: list = None) -> bool:
+    """
+    Persist an analysis in the corpus index. Embeddings are stored only when
+    classification ran, so Legal-BERT is already loaded. A failure is a
+    warning, never a failed analysis.
+    """
+    options = {**DEFAULT_OPTIONS, **(options or {})}
+    embed = get_embeddings if CORPUS_VECTORS and options['classify_clauses'] else None
+    try:
+        with span("corpus_index"):
+            get_corpus_index().add_documents(
+                [{'sha256': file_hash, 'source': source, 'clauses': clauses, 'summary': summary,
+                  'options': options}], embed=embed
+            )
+        return True
+    except Exception as e:
+        _warn(warnings, f"Saving for contract search failed: {str(e)}")
+        return False
+
+
+def _warn(warnings, message):
+    if warnings is not None:
+        warnings.append(message)
@@ -0,0 +1,50 @@
+# result_cache.py
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+# Analyses kept in memory across sessions; older ones are dropped first
+MAX_ENTRIES = 8
+
+
+def hash_bytes(data) -> str:
+    """Content hash of an uploaded file"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def analysis_key(file_hash: str, options: dict) -> str:
+    """Key identifying one analysis: file content plus the options it ran with"""
+    payload = json.dumps({"file": file_hash, "options": options}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """Thread-safe LRU mapping bounded by number of entries"""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,77 @@
+# revisions.py
+import hashlib
+import re
+from difflib import SequenceMatcher
+
+# Summary sections hold about this many clauses. A section ends after a
+# clause whose hash is 0 modulo this, so boundaries depend on the clauses
+# themselves and an edit only changes the sections it touches
+SECTION_CLAUSES = 32
+SECTION_MAX_CLAUSES = 4 * SECTION_CLAUSES
+
+MODIFIED, INSERTED, REMOVED = "modified", "inserted", "removed"
+DIFF_TOKEN = re.compile(r"\S+\s*")
+
+
+def clause_hash(text: str) -> int:
+    """64-bit content hash of a cleaned clause text"""
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def clause_hashes(texts) -> list:
+    return [clause_hash(text) for text in texts]
+
+
+def store_hashes(store) -> list:
+    """Clause hashes of a ClauseStore"""
+    return clause_hashes(store.text_of(i) for i in range(len(store)))
+
+
+def align_clauses(old_hashes: list, new_hashes: list):
+    """
+    Match the clauses of a new version against an earlier one.
+    Returns: (source, changes) - source[j] is the index of the identical
+    clause in the earlier version, or None when clause j must be analyzed;
+    changes lists (kind, old index, new index) for every modified, inserted
+    or removed clause, in document order
+    """
+    source = [None] * len(new_hashes)
+    changes = []
+    matcher = SequenceMatcher(None, old_hashes, new_hashes, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            source[j1:j2] = range(i1, i2)
+            continue
+        # A replaced run pairs its clauses up as modifications; the rest were inserted or removed
+        paired = min(i2 - i1, j2 - j1)
+        changes.extend((MODIFIED, i1 + k, j1 + k) for k in range(paired))
+        changes.extend((INSERTED, None, j) for j in range(j1 + paired, j2))
+        changes.extend((REMOVED, i, None) for i in range(i1 + paired, i2))
+    return source, changes
+
+
+def section_bounds(hashes: list) -> list:
+    """(start, end) clause ranges of the summary sections"""
+    bounds, start = [], 0
+    for i, value in enumerate(hashes):
+        if value % SECTION_CLAUSES == 0 or i + 1 - start >= SECTION_MAX_CLAUSES:
+            bounds.append((start, i + 1))
+            start = i + 1
+    if start < len(hashes):
+        bounds.append((start, len(hashes)))
+    return bounds
+
+
+def word_diff(old: str, new: str) -> list:
+    """(tag, text) runs turning old into new; tag is 'equal', 'delete' or 'insert'"""
+    old_words, new_words = DIFF_TOKEN.findall(old), DIFF_TOKEN.findall(new)
+    runs = []
+    for tag, i1, i2, j1, j2 in SequenceMatcher(None, old_words, new_words, autojunk=False).get_opcodes():
+        if tag == "equal":
+            runs.append(("equal", "".join(new_words[j1:j2])))
+            continue
+        if i2 > i1:
+            runs.append(("delete", "".join(old_words[i1:i2])))
+        if j2 > j1:
+            runs.append(("insert", "".join(new_words[j1:j2])))
+    return runs
@@ -1,7 +1,26 @@
 import re
+import numpy as np
+from scipy import sparse
 from sumy.parsers.plaintext import PlaintextParser 
 from sumy.nlp.tokenizers import Tokenizer
 from sumy.summarizers.text_rank import TextRankSummarizer
+from utils import model_registry
+from utils.tracing import span, count
+
+# TextRank parameters (same as sumy's TextRankSummarizer)
+DAMPING = 0.85
+EPSILON = 1e-4
+_ZERO_DIVISION_PREVENTION = 1e-7
+
+# Documents with more sentences than this are summarized hierarchically:
+# each chunk of CHUNK_SENTENCES is ranked on its own, then the chunk
+# summaries are ranked together
+HIERARCHICAL_MIN_SENTENCES = 1500
+CHUNK_SENTENCES = 300
+MIN_TFIDF_SIMILARITY = 0.05
+SUMMARY_INTRO = "This summary outlines the key points of the document:"
+# Redaction placeholders in CUAD texts, read as [REDACTED] before summarizing
+REDACTED_MARK = re.compile(r'\[\s*\*\s*\]')
 
 
 def clean_summary_text(text: str) -> str:
@@ -24,7 +43,7 @@ def enhance_sentences(sentences: list[str]) -> str:
         return ""
 
     # Add intro sentence
-    output = ["This summary outlines the key points of the document:"]
+    output = [SUMMARY_INTRO]
     for s in sentences:
         s = s.strip()
         if not s.endswith('.'):
@@ -34,18 +53,171 @@ def enhance_sentences(sentences: list[str]) -> str:
     return " ".join(output)
 
 
-def generate_summary(text: str, sentence_count: int = 5) -> str:
+def _similarity_textrank(sentence_words: list) -> sparse.csr_matrix:
+    """
+    TextRank edge weights, vectorized: shared-word count (with multiplicity)
+    divided by log(len1) + log(len2), exactly as sumy computes them pairwise.
+    """
+    vocabulary = {}
+    rows, cols = [], []
+    for i, words in enumerate(sentence_words):
+        for word in words:
+            rows.append(i)
+            cols.append(vocabulary.setdefault(word, len(vocabulary)))
+    counts = sparse.csr_matrix(
+        (np.ones(len(rows)), (rows, cols)),
+        shape=(len(sentence_words), max(len(vocabulary), 1))
+    )  # duplicate (row, col) pairs are summed into word counts
+
+    overlap = (counts @ counts.T).tocoo()
+    lengths = np.array([len(words) for words in sentence_words], dtype=float)
+    log_lengths = np.log(np.maximum(lengths, 1))
+    norm = log_lengths[overlap.row] + log_lengths[overlap.col]
+    # Two single-word sentences: sumy keeps the raw overlap
+    weights = np.where(np.isclose(norm, 0.0), overlap.data, overlap.data / np.where(norm == 0, 1, norm))
+    return sparse.csr_matrix((weights, (overlap.row, overlap.col)), shape=overlap.shape)
+
+
+def _similarity_tfidf(sentences: list) -> sparse.csr_matrix:
+    """Cosine similarity of TF-IDF sentence vectors, with weak edges pruned"""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    vectors = TfidfVectorizer(stop_words="english").fit_transform(sentences)
+    similarity = (vectors @ vectors.T).tocsr()
+    similarity.data[similarity.data < MIN_TFIDF_SIMILARITY] = 0
+    similarity.eliminate_zeros()
+    return similarity
+
+
+def rank_sentences(similarity: sparse.csr_matrix) -> np.ndarray:
+    """
+    PageRank by power iteration over a sparse similarity matrix.
+    Equivalent to sumy's dense TextRank matrix: the uniform teleport term is
+    applied as a scalar instead of materializing an n x n matrix.
+    """
+    n = similarity.shape[0]
+    row_sums = np.asarray(similarity.sum(axis=1)).ravel() + _ZERO_DIVISION_PREVENTION
+    transition_t = (sparse.diags(1.0 / row_sums) @ similarity).T.tocsr()
+
+    ranks = np.full(n, 1.0 / n)
+    delta = 1.0
+    while delta > EPSILON:
+        next_ranks = (1.0 - DAMPING) / n * ranks.sum() + DAMPING * (transition_t @ ranks)
+        delta = np.linalg.norm(next_ranks - ranks)
+        ranks = next_ranks
+    return ranks
+
+
+def _best_sentences(ranks: np.ndarray, count: int) -> list:
+    """Indices of the `count` best-ranked sentences, in document order"""
+    best = np.argsort(-ranks, kind="stable")[:count]
+    return sorted(best.tolist())
+
+
+def _summarize_sentences(sentences: list, sentence_count: int, weighting: str) -> list:
+    """Pick the best sentences (sumy Sentence objects) of one block of text"""
+    if not sentences:
+        return []
+    if weighting == "tfidf":
+        similarity = _similarity_tfidf([str(s) for s in sentences])
+    else:
+        similarity = _similarity_textrank([[w.lower() for w in s.words] for s in sentences])
+    return [sentences[i] for i in _best_sentences(rank_sentences(similarity), sentence_count)]
+
+
+def _summarize_hierarchical(sections: list, sentence_count: int, weighting: str) -> list:
+    """Summarize each section (or chunk) first, then summarize the summaries"""
+    per_section = max(sentence_count, 3)
+    candidates = []
+    for sentences in sections:
+        for start in range(0, len(sentences), CHUNK_SENTENCES):
+            chunk = sentences[start:start + CHUNK_SENTENCES]
+            candidates.extend(_summarize_sentences(chunk, per_section, weighting))
+    return _summarize_sentences(candidates, sentence_count, weighting)
+
+
+def section_candidates(text: str, sentence_count: int = 5, weighting: str = "textrank") -> list:
+    """Best sentences of one section, as the hierarchical mode picks them"""
+    text = REDACTED_MARK.sub('[REDACTED]', text)
+    model_registry.get("punkt")
+    sentences = list(PlaintextParser.from_string(text, Tokenizer("english")).document.sentences)
+    per_section = max(sentence_count, 3)
+    return [
+        str(s) for start in range(0, len(sentences), CHUNK_SENTENCES)
+        for s in _summarize_sentences(sentences[start:start + CHUNK_SENTENCES], per_section, weighting)
+    ]
+
+
+def summarize_candidates(candidates: list, sentence_count: int = 5, weighting: str = "textrank",
+                         selected: list = None) -> str:
+    """
+    Summary ranked over candidate sentences in document order, e.g. a
+    previous summary's sentences plus the section_candidates of the sections
+    that changed. The picked sentences, before cleaning, are appended to `selected`.
+    """
+    try:
+        with span("generate_summary", mode="sections"):
+            model_registry.get("punkt")
+            tokenizer = Tokenizer("english")
+            sentences = [s for candidate in candidates
+                         for s in PlaintextParser.from_string(candidate, tokenizer).document.sentences]
+            count("summary_sentences_in", len(sentences))
+            best = [str(s) for s in _summarize_sentences(sentences, sentence_count, weighting)]
+        if selected is not None:
+            selected.extend(best)
+        return clean_summary_text(enhance_sentences(best))
+    except Exception as e:
+        return f"Summary unavailable due to an error: {str(e)}"
+
+
+def generate_summary(text: str, sentence_count: int = 5, mode: str = "auto",
+                     weighting: str = "textrank", sections: list = None, selected: list = None) -> str:
     """
     Generate a short, clean summary of a contract using TextRank.
+    mode: "auto" (sparse for normal documents, hierarchical for very long ones),
+          "sparse", "hierarchical", or "textrank" (sumy's original dense implementation)
+    weighting: "textrank" (word overlap, matches sumy) or "tfidf" (pruned TF-IDF cosine)
+    sections: optional list of section texts for the hierarchical mode; `text` is
+              chunked into runs of sentences when omitted
+    selected: optional list the picked sentences are appended to, before cleaning
+              ([*] already reads [REDACTED]), e.g. to re-rank them for a new version
     Returns a natural-language paragraph summary.
     """
     # Pre-clean
-    text = re.sub(r'\[\s*\*\s*\]', '[REDACTED]', text)
+    text = REDACTED_MARK.sub('[REDACTED]', text)
 
     try:
-        parser = PlaintextParser.from_string(text, Tokenizer("english"))
-        summarizer = TextRankSummarizer()
-        summary_sentences = [str(s) for s in summarizer(parser.document, sentence_count)]
+        with span("generate_summary", mode=mode):
+            model_registry.get("punkt")
+            tokenizer = Tokenizer("english")
+            if mode == "textrank":
+                parser = PlaintextParser.from_string(text, tokenizer)
+                count("summary_sentences_in", len(parser.document.sentences))
+                summarizer = TextRankSummarizer()
+                summary_sentences = [str(s) for s in summarizer(parser.document, sentence_count)]
+            else:
+                if sections:
+                    section_sentences = [
+                        list(PlaintextParser.from_string(
+                            REDACTED_MARK.sub('[REDACTED]', section), tokenizer
+                        ).document.sentences)
+                        for section in sections
+                    ]
+                else:
+                    section_sentences = [list(PlaintextParser.from_string(text, tokenizer).document.sentences)]
+                total = sum(len(s) for s in section_sentences)
+                count("summary_sentences_in", total)
+
+                if mode == "hierarchical" or (mode == "auto" and total > HIERARCHICAL_MIN_SENTENCES):
+                    best = _summarize_hierarchical(section_sentences, sentence_count, weighting)
+                else:
+                    best = _summarize_sentences(
+                        [s for sentences in section_sentences for s in sentences], sentence_count, weighting
+                    )
+                summary_sentences = [str(s) for s in best]
+
+        if selected is not None:
+            selected.extend(summary_sentences)
 
         # Enhance and clean
         joined_summary = enhance_sentences(summary_sentences)
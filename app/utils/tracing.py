@@ -0,0 +1,243 @@
+# tracing.py
+import contextvars
+import cProfile
+import json
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Per-document traces are appended here as one JSON object per line
+TRACE_DIR = os.environ.get("TRACE_DIR", "traces")
+TRACING_ENABLED = os.environ.get("TRACING_ENABLED", "1") != "0"
+# Once traces.jsonl would grow past this it becomes traces.jsonl.1 (replacing
+# the previous one) and a new file is started; 0 lets it grow without limit
+TRACE_MAX_MB = int(os.environ.get("TRACE_MAX_MB", "100"))
+TRACE_FILE = "traces.jsonl"
+# Optional Prometheus text-format file, rewritten after every document
+METRICS_FILE = os.environ.get("TRACE_METRICS_FILE")
+
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+_trace_file_lock = threading.Lock()
+
+# Process-wide totals for the metrics file
+_metrics_lock = threading.Lock()
+_stage_seconds = defaultdict(float)
+_stage_calls = defaultdict(int)
+_counter_totals = defaultdict(float)
+_duration_sums = defaultdict(float)
+_duration_counts = defaultdict(int)
+_gauges = {}
+_documents = 0
+
+
+class Trace:
+    """Spans and counters collected while one document is analyzed"""
+
+    def __init__(self, name, attributes):
+        self.trace_id = uuid.uuid4().hex
+        self.name = name
+        self.attributes = attributes
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.duration = None
+        self.spans = []
+        self.counters = defaultdict(float)
+        self.durations = {}
+        self.profile_path = None
+        self.error = None
+
+    def to_dict(self):
+        stages = defaultdict(float)
+        for s in self.spans:
+            stages[s["name"]] += s["ms"]
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "attributes": self.attributes,
+            "stages_ms": {k: round(v, 3) for k, v in stages.items()},
+            "counters": dict(self.counters),
+            "durations_ms": {k: round(v * 1000, 3) for k, v in self.durations.items()},
+            "spans": self.spans,
+            "profile": self.profile_path,
+            "error": self.error,
+        }
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+@contextmanager
+def document_trace(name, profile=False, **attributes):
+    """
+    Collect a trace for one document and emit it when the block ends.
+    With profile=True the block also runs under cProfile and the stats are
+    saved next to the trace file.
+    """
+    if not TRACING_ENABLED and not profile:
+        yield None
+        return
+
+    trace = Trace(name, attributes)
+    token = _current_trace.set(trace)
+    profiler = cProfile.Profile() if profile else None
+    if profiler:
+        profiler.enable()
+    try:
+        yield trace
+    except Exception as e:
+        trace.error = str(e)
+        raise
+    finally:
+        if profiler:
+            profiler.disable()
+        trace.duration = time.perf_counter() - trace._start
+        _current_trace.reset(token)
+        try:
+            if profiler:
+                os.makedirs(TRACE_DIR, exist_ok=True)
+                trace.profile_path = os.path.join(TRACE_DIR, f"{trace.trace_id}.prof")
+                profiler.dump_stats(trace.profile_path)
+            _emit(trace)
+        except OSError:
+            pass  # tracing must never fail an analysis
+
+
+@contextmanager
+def span(name, **attributes):
+    """Time a block inside the current document trace (no-op without one)"""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        record = {
+            "name": name,
+            "start_ms": round((start - trace._start) * 1000, 3),
+            "ms": round((end - start) * 1000, 3),
+        }
+        if attributes:
+            record.update(attributes)
+        trace.spans.append(record)
+
+
+def count(name, value=1):
+    """Add to a counter of the current document trace (no-op without one)"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.counters[name] += value
+
+
+def observe(name, seconds):
+    """Record a latency of the current document, such as the time to its first clause (no-op without a trace)"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.durations[name] = seconds
+
+
+def add_total(name, value=1):
+    """Add to a process-wide counter outside any document trace"""
+    with _metrics_lock:
+        _counter_totals[name] += value
+        if METRICS_FILE:
+            write_metrics(METRICS_FILE)
+
+
+def set_gauge(name, value):
+    """Set a process-wide gauge such as the job queue depth"""
+    with _metrics_lock:
+        _gauges[name] = value
+        if METRICS_FILE:
+            write_metrics(METRICS_FILE)
+
+
+def _emit(trace):
+    global _documents
+    data = trace.to_dict()
+    _append_trace(json.dumps(data, separators=(",", ":")) + "\n")
+
+    with _metrics_lock:
+        _documents += 1
+        for stage, ms in data["stages_ms"].items():
+            _stage_seconds[stage] += ms / 1000
+            _stage_calls[stage] += 1
+        _stage_seconds["document"] += trace.duration
+        _stage_calls["document"] += 1
+        for counter, value in trace.counters.items():
+            _counter_totals[counter] += value
+        for name, seconds in trace.durations.items():
+            _duration_sums[name] += seconds
+            _duration_counts[name] += 1
+        if METRICS_FILE:
+            write_metrics(METRICS_FILE)
+
+
+def _append_trace(line):
+    path = os.path.join(TRACE_DIR, TRACE_FILE)
+    with _trace_file_lock:
+        os.makedirs(TRACE_DIR, exist_ok=True)
+        try:
+            if TRACE_MAX_MB and os.path.getsize(path) + len(line) > TRACE_MAX_MB * 2**20:
+                # Processes sharing the file (analyze_corpus.py workers) may each rotate it
+                # at the same moment; at worst a few traces are lost, never the size cap
+                os.replace(path, path + ".1")
+        except FileNotFoundError:
+            pass
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+def render_metrics():
+    """Process-wide totals in Prometheus text exposition format"""
+    lines = [
+        "# HELP legallens_documents_total Documents analyzed by this process.",
+        "# TYPE legallens_documents_total counter",
+        f"legallens_documents_total {_documents}",
+        "# HELP legallens_stage_seconds_total Time spent per pipeline stage.",
+        "# TYPE legallens_stage_seconds_total counter",
+    ]
+    lines += [f'legallens_stage_seconds_total{{stage="{k}"}} {v:.6f}' for k, v in sorted(_stage_seconds.items())]
+    lines += [
+        "# HELP legallens_stage_calls_total Documents that ran each pipeline stage.",
+        "# TYPE legallens_stage_calls_total counter",
+    ]
+    lines += [f'legallens_stage_calls_total{{stage="{k}"}} {v}' for k, v in sorted(_stage_calls.items())]
+    lines += [
+        "# HELP legallens_events_total Clauses, tokens, cache hits, bytes read, etc.",
+        "# TYPE legallens_events_total counter",
+    ]
+    lines += [f'legallens_events_total{{name="{k}"}} {v:g}' for k, v in sorted(_counter_totals.items())]
+    lines += [
+        "# HELP legallens_duration_seconds Per-document latencies such as the time to the first clause.",
+        "# TYPE legallens_duration_seconds summary",
+    ]
+    for k in sorted(_duration_sums):
+        lines.append(f'legallens_duration_seconds_sum{{name="{k}"}} {_duration_sums[k]:.6f}')
+        lines.append(f'legallens_duration_seconds_count{{name="{k}"}} {_duration_counts[k]}')
+    lines += [
+        "# HELP legallens_gauge Current values such as job queue depth and running jobs.",
+        "# TYPE legallens_gauge gauge",
+    ]
+    lines += [f'legallens_gauge{{name="{k}"}} {v:g}' for k, v in sorted(_gauges.items())]
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path):
+    """Atomically rewrite the metrics file so a scraper never sees a partial one"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(render_metrics())
+    os.replace(tmp_path, path)
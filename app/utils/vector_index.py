@@ -0,0 +1,290 @@
+# vector_index.py
+import json
+import os
+import shutil
+
+import numpy as np
+# filelock comes with transformers and torch
+from filelock import FileLock, Timeout
+
+# Vectors per inverted list the index aims for when it is built
+LIST_SIZE = 1000
+# Inverted lists scanned per query; more lists give better recall and slower queries
+NPROBE = int(os.environ.get("VECTOR_NPROBE", "16"))
+# k-means is trained on about this many vectors per list
+TRAIN_PER_LIST = 40
+KMEANS_ITERATIONS = 10
+# Rows read, assigned or written at once while building
+CHUNK_ROWS = 65536
+META_NAME = "meta.json"
+# Held briefly by add() and by build() while it switches generations
+WRITE_LOCK_NAME = "write.lock"
+# Held by build() for as long as it runs, so only one process builds at a time
+BUILD_LOCK_NAME = "build.lock"
+LOCK_TIMEOUT = 60.0  # seconds to wait for another writer
+
+
+def normalize(vectors):
+    """Unit-length float32 rows, so inner product is cosine similarity"""
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class VectorIndex:
+    """
+    On-disk inverted-file (IVF) index for cosine similarity search.
+
+    build() clusters the vectors with spherical k-means and stores them as
+    float32 rows sorted by cluster, so each inverted list is one contiguous
+    slice of a memory-mapped file (float16 would halve the file but
+    converting the probed rows costs several times the dot products). A query scores the centroids and scans
+    only the NPROBE closest lists. add() appends to an unindexed tail that
+    queries scan in full until the next build().
+
+    Every build writes a new generation directory and then switches
+    meta.json, so readers in other processes keep using the files they
+    opened and pick up the new ones on their next query. Writers in any
+    process are serialized by a lock file in the index directory; a build
+    clusters a snapshot of the vectors without holding it and only takes
+    it to carry over the vectors added meanwhile and switch generations.
+    """
+
+    def __init__(self, path, dim):
+        self.path = path
+        self.dim = int(dim)
+        self._meta_mtime = None
+        os.makedirs(path, exist_ok=True)
+        with self._lock(WRITE_LOCK_NAME):
+            if not os.path.exists(self._meta_path):
+                self._write_meta({'dim': self.dim, 'generation': 0, 'count': 0, 'nlist': 0})
+        self._load()
+
+    def _lock(self, name, timeout=LOCK_TIMEOUT):
+        # A new FileLock per use: instances are re-entrant, and one shared across threads would let them all in
+        return FileLock(os.path.join(self.path, name), timeout=timeout)
+
+    @property
+    def _meta_path(self):
+        return os.path.join(self.path, META_NAME)
+
+    def _generation_dir(self, generation):
+        return os.path.join(self.path, f"{generation:06d}")
+
+    def _write_meta(self, meta):
+        os.makedirs(self._generation_dir(meta['generation']), exist_ok=True)
+        temporary = self._meta_path + ".tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(temporary, self._meta_path)
+
+    def _load(self):
+        """(Re)open the current generation if meta.json changed since the last query"""
+        mtime = os.stat(self._meta_path).st_mtime_ns
+        if mtime == self._meta_mtime:
+            return
+        with open(self._meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta['dim'] != self.dim:
+            raise ValueError(f"Vector index at {self.path} holds {meta['dim']}-d vectors, not {self.dim}-d")
+
+        self.generation = meta['generation']
+        self.count = meta['count']
+        directory = self._generation_dir(self.generation)
+        if self.count:
+            self.centroids = np.load(os.path.join(directory, "centroids.npy"))
+            self.offsets = np.load(os.path.join(directory, "offsets.npy"))
+            self.ids = np.load(os.path.join(directory, "ids.npy"), mmap_mode="r")
+            self.vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode="r")
+        else:
+            self.centroids = np.zeros((0, self.dim), dtype=np.float32)
+            self.offsets = np.zeros(1, dtype=np.int64)
+            self.ids = np.zeros(0, dtype=np.int64)
+            self.vectors = np.zeros((0, self.dim), dtype=np.float32)
+        self._pending_ids_path = os.path.join(directory, "pending_ids.i64")
+        self._pending_vectors_path = os.path.join(directory, "pending_vectors.f32")
+        self._meta_mtime = mtime
+
+    def _pending(self):
+        """The unindexed tail; ids are appended after their vectors, so they bound the row count"""
+        if not os.path.exists(self._pending_ids_path):
+            return np.zeros(0, dtype=np.int64), np.zeros((0, self.dim), dtype=np.float32)
+        rows = os.path.getsize(self._pending_ids_path) // 8
+        if rows == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros((0, self.dim), dtype=np.float32)
+        ids = np.memmap(self._pending_ids_path, dtype=np.int64, mode="r", shape=(rows,))
+        vectors = np.memmap(self._pending_vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+        return ids, vectors
+
+    @property
+    def pending_count(self):
+        self._load()
+        return os.path.getsize(self._pending_ids_path) // 8 if os.path.exists(self._pending_ids_path) else 0
+
+    def __len__(self):
+        return self.count + self.pending_count
+
+    def add(self, ids, vectors):
+        """Append vectors to the unindexed tail"""
+        self._load()
+        vectors = normalize(vectors)
+        ids = np.asarray(ids, dtype=np.int64)
+        if len(ids) != len(vectors):
+            raise ValueError("ids and vectors differ in length")
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-d vectors, got {vectors.shape[1]}-d")
+        with self._lock(WRITE_LOCK_NAME):
+            # A build may have switched generations while this one waited
+            self._load()
+            with open(self._pending_vectors_path, "ab") as f:
+                f.write(vectors.tobytes())
+            with open(self._pending_ids_path, "ab") as f:
+                f.write(ids.tobytes())
+
+    def search(self, vector, k=10, nprobe=NPROBE):
+        """
+        Approximate nearest neighbours of one vector.
+        Returns: (ids, cosine similarities), best first
+        """
+        self._load()
+        query = normalize(vector)[0]
+        candidate_ids, candidate_scores = [], []
+
+        if self.count:
+            probe = np.argsort(self.centroids @ query)[::-1][:nprobe]
+            for cluster in probe:
+                start, end = self.offsets[cluster], self.offsets[cluster + 1]
+                if end > start:
+                    candidate_scores.append(self.vectors[start:end] @ query)
+                    candidate_ids.append(self.ids[start:end])
+
+        pending_ids, pending_vectors = self._pending()
+        for start in range(0, len(pending_ids), CHUNK_ROWS):
+            candidate_scores.append(pending_vectors[start:start + CHUNK_ROWS] @ query)
+            candidate_ids.append(pending_ids[start:start + CHUNK_ROWS])
+
+        if not candidate_ids:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        scores = np.concatenate(candidate_scores)
+        ids = np.concatenate(candidate_ids)
+        if len(scores) > k:
+            top = np.argpartition(-scores, k)[:k]
+            ids, scores = ids[top], scores[top]
+        order = np.argsort(-scores)
+        return np.asarray(ids[order]), scores[order]
+
+    def build(self, nlist=None, seed=0, live_ids=None, wait=True):
+        """
+        Cluster the indexed vectors and the tail into a new generation.
+        `live_ids()` returns the ids still in use; vectors of any other id
+        (e.g. of replaced documents) are dropped. It is called after the
+        vectors to cluster are fixed, so ids added meanwhile need not be in it.
+        With wait=False, returns False at once when another build is running.
+        Returns True once the new generation is in place.
+        """
+        try:
+            build_lock = self._lock(BUILD_LOCK_NAME, timeout=-1 if wait else 0).acquire()
+        except Timeout:
+            return False
+        with build_lock:
+            self._load()
+            # The files of this generation only grow until the switch below, so the
+            # first `pending` tail rows and the indexed rows can be read without a lock
+            generation, count = self.generation, self.count
+            indexed_ids, indexed_vectors = self.ids, self.vectors
+            pending_ids, pending_vectors = self._pending()
+            pending = len(pending_ids)
+            old_ids_path, old_vectors_path = self._pending_ids_path, self._pending_vectors_path
+
+            def rows(positions):
+                """float32 rows by position across the indexed vectors and the tail"""
+                positions = np.asarray(positions)
+                out = np.empty((len(positions), self.dim), dtype=np.float32)
+                indexed = positions < count
+                out[indexed] = indexed_vectors[positions[indexed]]
+                out[~indexed] = pending_vectors[positions[~indexed] - count]
+                return out
+
+            def all_ids(positions):
+                positions = np.asarray(positions)
+                out = np.empty(len(positions), dtype=np.int64)
+                indexed = positions < count
+                out[indexed] = indexed_ids[positions[indexed]]
+                out[~indexed] = pending_ids[positions[~indexed] - count]
+                return out
+
+            kept = np.arange(count + pending)
+            if live_ids is not None:
+                live = np.asarray(live_ids(), dtype=np.int64)
+                kept = np.concatenate([chunk[np.isin(all_ids(chunk), live)]
+                                       for chunk in np.array_split(kept, max(1, len(kept) // CHUNK_ROWS))])
+            total = len(kept)
+
+            directory = self._generation_dir(generation + 1)
+            os.makedirs(directory, exist_ok=True)
+            nlist = min(nlist or max(1, int(round(total / LIST_SIZE))), total)
+            if total:
+                rng = np.random.default_rng(seed)
+                sample = np.sort(rng.choice(total, size=min(total, nlist * TRAIN_PER_LIST), replace=False))
+                centroids = train_centroids(normalize(rows(kept[sample])), nlist, rng)
+
+                labels = np.empty(total, dtype=np.int32)
+                for start in range(0, total, CHUNK_ROWS):
+                    chunk = kept[start:start + CHUNK_ROWS]
+                    labels[start:start + len(chunk)] = np.argmax(rows(chunk) @ centroids.T, axis=1)
+                order = kept[np.argsort(labels, kind="stable")]
+                offsets = np.zeros(nlist + 1, dtype=np.int64)
+                np.cumsum(np.bincount(labels, minlength=nlist), out=offsets[1:])
+
+                vectors = np.lib.format.open_memmap(os.path.join(directory, "vectors.npy"), mode="w+",
+                                                    dtype=np.float32, shape=(total, self.dim))
+                ids = np.lib.format.open_memmap(os.path.join(directory, "ids.npy"), mode="w+",
+                                                dtype=np.int64, shape=(total,))
+                for start in range(0, total, CHUNK_ROWS):
+                    positions = order[start:start + CHUNK_ROWS]
+                    vectors[start:start + len(positions)] = rows(positions)
+                    ids[start:start + len(positions)] = all_ids(positions)
+                vectors.flush()
+                ids.flush()
+                del vectors, ids
+                np.save(os.path.join(directory, "centroids.npy"), centroids)
+                np.save(os.path.join(directory, "offsets.npy"), offsets)
+            del pending_ids, pending_vectors
+
+            with self._lock(WRITE_LOCK_NAME):
+                # Vectors added while this build ran start the new generation's tail
+                added = os.path.getsize(old_ids_path) // 8 - pending if os.path.exists(old_ids_path) else 0
+                if added:
+                    with open(old_vectors_path, "rb") as f:
+                        f.seek(pending * self.dim * 4)
+                        tail_vectors = f.read(added * self.dim * 4)
+                    with open(old_ids_path, "rb") as f:
+                        f.seek(pending * 8)
+                        tail_ids = f.read(added * 8)
+                    with open(os.path.join(directory, "pending_vectors.f32"), "wb") as f:
+                        f.write(tail_vectors)
+                    with open(os.path.join(directory, "pending_ids.i64"), "wb") as f:
+                        f.write(tail_ids)
+                self._write_meta({'dim': self.dim, 'generation': generation + 1, 'count': int(total),
+                                  'nlist': int(nlist)})
+            self._load()
+            # Readers still holding the old files keep them open; on Windows removal waits until they are closed
+            shutil.rmtree(self._generation_dir(generation), ignore_errors=True)
+        return True
+
+
+def train_centroids(sample, nlist, rng, iterations=KMEANS_ITERATIONS):
+    """Spherical k-means over unit-length rows; empty clusters are re-seeded from the sample"""
+    centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+    for _ in range(iterations):
+        labels = np.argmax(sample @ centroids.T, axis=1)
+        order = np.argsort(labels, kind="stable")
+        counts = np.bincount(labels, minlength=nlist)
+        occupied = np.flatnonzero(counts)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[occupied]
+        centroids[occupied] = np.add.reduceat(sample[order], starts, axis=0)
+        empty = np.flatnonzero(counts == 0)
+        if len(empty):
+            centroids[empty] = sample[rng.choice(len(sample), size=len(empty), replace=False)]
+        centroids = normalize(centroids)
+    return centroids
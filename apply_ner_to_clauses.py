@@ -1,10 +1,17 @@
 # apply_ner_to_clauses.py
+import argparse
 import os
 import json
-import spacy
+import sys
 
-# Load trained model
-nlp = spacy.load("output/model-best")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "app"))
+
+from utils.ner_model import extract_entities_batch, BATCH_SIZE, N_PROCESS
+
+parser = argparse.ArgumentParser(description="Apply the trained NER model to parsed clauses")
+parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+parser.add_argument("--n-process", type=int, default=N_PROCESS)
+args = parser.parse_args()
 
 # Input and output folders
 input_dir = "parsed_output"
@@ -20,10 +27,10 @@ for filename in os.listdir(input_dir):
         with open(input_path, "r", encoding="utf-8") as infile:
             data = json.load(infile)
 
+        clauses = data.get("clauses", [])
+        batch_entities = extract_entities_batch(clauses, batch_size=args.batch_size, n_process=args.n_process)
         results = []
-        for clause_text in data.get("clauses", []):
-            doc = nlp(clause_text)
-            entities = [(ent.text, ent.label_) for ent in doc.ents]
+        for clause_text, entities in zip(clauses, batch_entities):
             results.append({
                 "clause": clause_text,
                 "entities": entities
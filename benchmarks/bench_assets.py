@@ -0,0 +1,74 @@
+"""
+Bytes the app ships to the browser per rerun of the login page and of the
+dashboard, split into the largest elements, plus the time to prepare the
+static assets (stylesheet bundle, logo, login background) cold and cached.
+Run from the repository root: python benchmarks/bench_assets.py
+"""
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "app"))
+
+from streamlit.testing.v1 import AppTest
+
+
+def shipped(at):
+    """(total protobuf bytes of the page's elements, [(bytes, element type), ...] largest first)"""
+    sizes, stack = [], [at._tree]
+    while stack:
+        node = stack.pop()
+        proto = getattr(node, "proto", None)
+        if proto is not None and hasattr(proto, "ByteSize"):
+            sizes.append((proto.ByteSize(), node.type))
+        stack.extend(getattr(node, "children", {}).values())
+    return sum(size for size, _ in sizes), sorted(sizes, reverse=True)
+
+
+def page_bytes(authenticated, reruns):
+    at = AppTest.from_file(os.path.join(ROOT, "app", "main.py"), default_timeout=120)
+    if authenticated:
+        at.session_state["authenticated"] = True
+        at.session_state["username"] = "Guest"
+    at.run()
+    times = []
+    for _ in range(reruns):
+        start = time.perf_counter()
+        at.run()
+        times.append(time.perf_counter() - start)
+    total, sizes = shipped(at)
+    return total, sizes, sorted(times)[len(times) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reruns", type=int, default=10)
+    args = parser.parse_args()
+    os.chdir(ROOT)
+
+    try:
+        from utils import assets
+    except ImportError:
+        assets = None  # a tree from before the asset layer
+    if assets is not None:
+        start = time.perf_counter()
+        assets.style_bundle()
+        assets.image_data_uri(assets.LOGO, 60)
+        assets.background_data_uri()
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        assets.style_bundle()
+        assets.image_data_uri(assets.LOGO, 60)
+        assets.background_data_uri()
+        print(f"Assets prepared in {cold * 1000:.1f} ms, then {(time.perf_counter() - start) * 1e6:.1f} us per rerun")
+
+    for name, authenticated in (("login page", False), ("dashboard", True)):
+        total, sizes, rerun = page_bytes(authenticated, args.reruns)
+        largest = ", ".join(f"{kind} {size / 1024:.1f} KB" for size, kind in sizes[:3])
+        print(f"{name:<12} {total / 1024:8.1f} KB per rerun  (rerun {rerun * 1000:.0f} ms; largest: {largest})")
+
+
+if __name__ == "__main__":
+    main()
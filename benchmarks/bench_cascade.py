@@ -0,0 +1,62 @@
+"""
+Evaluate the two-tier classifier cascade against the BERT-only path:
+throughput, share of clauses the lexical tier decides and label agreement,
+for several confidence thresholds.
+
+By default a fresh lexical tier is trained on --train synthetic clauses
+labelled by the BERT head (a different seed than the evaluation clauses);
+--train 0 evaluates the model saved at LEXICAL_CLASSIFIER_PATH instead.
+Run from the repository root: python benchmarks/bench_cascade.py --stand-in
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from synthetic import make_clauses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clauses", type=int, default=5000)
+    parser.add_argument("--train", type=int, default=5000)
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.7, 0.8, 0.9, 0.95, 0.99])
+    parser.add_argument("--stand-in", action="store_true", help="use small local stand-in models (offline)")
+    args = parser.parse_args()
+
+    if args.stand_in:
+        from stand_in_models import install
+        install()
+
+    from utils import classifier, model_registry
+
+    model_registry.warm_up()  # keep model loading out of the timings
+    if args.train:
+        train_texts = make_clauses(args.train, seed=1)
+        label_ids = {name: label for label, name in classifier.TYPE_MAP.items()}
+        labels = [label_ids[r["type"]] for r in classifier.classify_clauses(train_texts, cascade=False, use_cache=False)]
+        model = classifier.build_lexical_classifier(train_texts, labels)
+        model_registry.register("lexical_classifier", lambda: model)
+    if classifier.get_lexical_classifier() is None:
+        sys.exit(f"No lexical classifier at '{classifier.LEXICAL_MODEL_PATH}'; train one or pass --train N")
+
+    clauses = make_clauses(args.clauses, seed=0)
+    start = time.perf_counter()
+    reference = [r["type"] for r in classifier.classify_clauses(clauses, cascade=False, use_cache=False)]
+    bert_seconds = time.perf_counter() - start
+    print(f"{'BERT only':<16}: {len(clauses) / bert_seconds:8.1f} clauses/sec ({bert_seconds:.2f}s)")
+
+    for threshold in args.thresholds:
+        start = time.perf_counter()
+        results = classifier.classify_clauses(clauses, cascade=True, threshold=threshold, use_cache=False)
+        seconds = time.perf_counter() - start
+        lexical = sum(r["tier"] == "lexical" for r in results) / len(results)
+        agreement = sum(r["type"] == ref for r, ref in zip(results, reference)) / len(results)
+        print(f"cascade @ {threshold:<6}: {len(clauses) / seconds:8.1f} clauses/sec ({seconds:.2f}s), "
+              f"speed-up {bert_seconds / seconds:5.2f}x, lexical tier {lexical:6.1%}, agreement {agreement:.2%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Compare per-clause and batched Legal-BERT classification throughput.
+Run from the repository root: python benchmarks/bench_classifier.py
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from synthetic import make_clauses
+from utils import classifier, model_registry
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clauses", type=int, default=600)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[8, 16, 32, 64])
+    args = parser.parse_args()
+
+    clauses = make_clauses(args.clauses)
+    model_registry.warm_up()  # keep model loading out of the timings
+
+    start = time.perf_counter()
+    single = [classifier.classify_clauses(c, use_cache=False)["type"] for c in clauses]
+    elapsed = time.perf_counter() - start
+    print(f"per-clause       : {len(clauses) / elapsed:8.1f} clauses/sec ({elapsed:.2f}s)")
+
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        batched = [r["type"] for r in classifier.classify_clauses(clauses, batch_size=batch_size, use_cache=False)]
+        elapsed = time.perf_counter() - start
+        agreement = sum(a == b for a, b in zip(single, batched)) / len(clauses)
+        print(f"batch_size={batch_size:<5}: {len(clauses) / elapsed:8.1f} clauses/sec ({elapsed:.2f}s), "
+              f"label agreement {agreement:.1%}")
+
+    if classifier.get_embedding_cache() is not None:
+        classifier.classify_clauses(clauses)  # warm the cache
+        start = time.perf_counter()
+        classifier.classify_clauses(clauses)
+        elapsed = time.perf_counter() - start
+        print(f"cached           : {len(clauses) / elapsed:8.1f} clauses/sec ({elapsed:.2f}s)")
+        print(f"cache stats      : {classifier.cache_stats()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Per-document clause index: build time and memory at analysis time, and the
+time of a filter change (type, entity label, keyword search) answered from
+the index versus a scan over every clause, at growing document sizes.
+Run from the repository root: python benchmarks/bench_clause_index.py --pages 10 100 1000
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from bench_clause_store import make_clause_dicts
+from synthetic import make_contract_lines
+from utils.clause_store import ClauseIndex, ClauseStore
+from utils.document_parser import clean_text, split_into_clauses
+from utils.pipeline import clean_display_text
+
+FILTERS = [
+    ("Risky", None, None),
+    (None, "PARTY", None),
+    (None, None, "indemnif"),
+    ("Important", "TERM", "written notice"),
+]
+
+
+def scan(clauses, clause_type, label, query):
+    """Filtering by walking every clause dict, with the index's word-prefix matching"""
+    patterns = [re.compile(r"\b" + re.escape(w)) for w in re.findall(r"\w\w+", (query or "").lower())]
+    return [
+        c for c in clauses
+        if (clause_type is None or c['type'] == clause_type)
+        and (label is None or any(e['label'] == label for e in c['entities']))
+        and all(p.search(c['text'].lower()) for p in patterns)
+    ]
+
+
+def best_of(func, repeat=5):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 1000])
+    args = parser.parse_args()
+
+    for pages in args.pages:
+        text = clean_text("\n".join(make_contract_lines(pages, seed=pages)))
+        clauses = make_clause_dicts([clean_display_text(c) for c in split_into_clauses(text) if c.strip()])
+        store = ClauseStore.from_clauses(clauses)
+        build = best_of(lambda: ClauseIndex(store), repeat=3)
+        print(f"{pages} pages, {len(store)} clauses: index built in {build * 1000:.1f} ms, "
+              f"{store.index.nbytes / 2**20:.2f} MB ({len(store.index.vocabulary)} words)")
+
+        for clause_type, label, query in FILTERS:
+            expected = scan(clauses, clause_type, label, query)
+            assert [store.clause(i) for i in store.filter(clause_type, label, query).indices] == expected
+
+            scan_time = best_of(lambda: scan(clauses, clause_type, label, query))
+            store.index._selections.clear()
+            start = time.perf_counter()
+            store.filter(clause_type, label, query)
+            uncached = time.perf_counter() - start
+            repeat = best_of(lambda: store.filter(clause_type, label, query))
+            name = "/".join(f for f in (clause_type, label, query and f'"{query}"') if f)
+            print(f"  {name:<30} {len(expected):>6} hits  scan {scan_time * 1000:8.2f} ms  "
+                  f"index {uncached * 1000:7.3f} ms  memoized {repeat * 1000:7.4f} ms")
+
+
+if __name__ == "__main__":
+    main()
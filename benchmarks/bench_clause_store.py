@@ -0,0 +1,89 @@
+"""
+Memory held per session for one analyzed document: the previous list of
+clause dicts versus the packed ClauseStore, plus the time to filter and
+build the analysis DataFrame on a rerun.
+Run from the repository root: python benchmarks/bench_clause_store.py --pages 1000
+"""
+import argparse
+import gc
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+import pandas as pd
+from synthetic import make_contract_lines
+from utils.clause_store import ClauseStore
+from utils.document_parser import clean_text, split_into_clauses
+from utils.pipeline import clean_display_text
+
+# Stand-in entities so the benchmark does not need the NER model
+ENTITY_PATTERN = re.compile(r"Supplier|Licensee|Distributor|Company|Licensor|Customer|Delaware|New York|"
+                            r"California|Texas|\d+ days|\$\d+")
+ENTITY_LABELS = {"days": "TERM", "$": "AMOUNT"}
+TYPES = ["Standard", "Important", "Risky"]
+
+
+def make_clause_dicts(texts):
+    clauses = []
+    for i, text in enumerate(texts):
+        entities = [{'text': m.group(), 'label': next((v for k, v in ENTITY_LABELS.items() if k in m.group()), "PARTY")}
+                    for m in ENTITY_PATTERN.finditer(text)]
+        # Fresh strings, as the pipeline creates them for every clause
+        clauses.append({'text': "".join(text), 'entities': entities, 'type': TYPES[i % 3]})
+    return clauses
+
+
+def retained(build):
+    """Bytes still allocated after build() returns, and its result"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def legacy_frame(clauses, type_filter):
+    filtered = clauses if type_filter == "All" else [c for c in clauses if c.get('type') == type_filter]
+    return pd.DataFrame([{
+        'Clause': c['text'][:200] + ('...' if len(c['text']) > 200 else ''),
+        'Type': c.get('type', 'Unknown'),
+        'Entities': ', '.join([e['text'] for e in c.get('entities', [])])
+    } for c in filtered])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 1000])
+    args = parser.parse_args()
+
+    for pages in args.pages:
+        text = clean_text("\n".join(make_contract_lines(pages, seed=pages)))
+        texts = [clean_display_text(c) for c in split_into_clauses(text) if c.strip()]
+
+        clauses, dict_bytes = retained(lambda: make_clause_dicts(texts))
+        store, store_bytes = retained(lambda: ClauseStore.from_clauses(clauses))
+        entities = sum(len(c['entities']) for c in clauses)
+        assert all(store.clause(i) == clauses[i] for i in range(len(clauses)))
+
+        print(f"{pages} pages, {len(clauses)} clauses, {entities} entities")
+        print(f"  clause dicts : {dict_bytes / 2**20:8.2f} MB")
+        print(f"  ClauseStore  : {store_bytes / 2**20:8.2f} MB ({dict_bytes / store_bytes:.1f}x smaller)")
+
+        for type_filter in ["All", "Risky"]:
+            start = time.perf_counter()
+            legacy_frame(clauses, type_filter)
+            legacy_time = time.perf_counter() - start
+            start = time.perf_counter()
+            store.filter(type_filter).to_frame()
+            store_time = time.perf_counter() - start
+            print(f"  filter {type_filter:<5} + DataFrame: dicts {legacy_time:.3f}s, store {store_time:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
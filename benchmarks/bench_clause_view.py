@@ -0,0 +1,105 @@
+"""
+Clause view render time per rerun and the size of the markdown it sends,
+for the previous renderer (one markdown block and entity expander per
+clause) and the paged view over cached clause HTML, at growing clause counts.
+Each rerun is driven through Streamlit's AppTest.
+Run from the repository root: python benchmarks/bench_clause_view.py --clauses 100 1000 10000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from streamlit.testing.v1 import AppTest
+from synthetic import make_clauses
+from utils.clause_store import ClauseStore
+
+ENTITY_WORDS = {"Supplier": "PARTY", "Customer": "PARTY", "Delaware": "GOVERNING_LAW", "days": "TERM"}
+TYPES = ["Standard", "Important", "Risky"]
+
+
+def legacy_view(clauses):
+    """The previous display_clause_view, kept for comparison"""
+    import re
+    import streamlit as st
+
+    for clause in clauses:
+        text = clause['text'].strip()
+        if not (len(text) > 30 and len(text.split()) > 5 and not re.match(r'^[-\d\s]+$', text)):
+            continue
+        border_color = {'Risky': '#ff4444', 'Important': '#ffbb33', 'Standard': '#00C851'}.get(clause['type'], '#aaaaaa')
+        with st.container():
+            st.markdown(f"""
+                <div style='border-left: 4px solid {border_color}; padding: 1rem; margin: 1rem 0; background: #f8f9fa; border-radius: 0 8px 8px 0; line-height: 1.6;'>
+                    <div style='display: flex; justify-content: space-between; margin-bottom: 0.5rem;'>
+                        <strong>{clause['type']}</strong>
+                        <span style='background: {border_color}; color: white; padding: 0.2rem 0.8rem; border-radius: 12px; font-size: 0.8rem;'>
+                            {clause['type']}
+                        </span>
+                    </div>
+                    <div style='margin: 0.5rem 0;'>{clause['text']}</div>
+            """, unsafe_allow_html=True)
+            if clause['entities']:
+                with st.expander("🔍 Identified Entities", expanded=False):
+                    cols = st.columns(4)
+                    for i, entity in enumerate(clause['entities']):
+                        with cols[i % 4]:
+                            st.markdown(f"<span style='background: #4285F4; color: white; padding: 2px 8px; "
+                                        f"border-radius: 8px; font-size: 0.8em;'>{entity['text']} ({entity['label']})</span>",
+                                        unsafe_allow_html=True)
+            st.markdown("</div>", unsafe_allow_html=True)
+
+
+def legacy_script():
+    import streamlit as st
+    from bench_clause_view import legacy_view
+    legacy_view(st.session_state['clause_dicts'])
+
+
+def paged_script():
+    import streamlit as st
+    from components.contract_display import display_clause_view
+    display_clause_view(st.session_state['clauses'].view())
+
+
+def make_clause_dicts(n):
+    clauses = []
+    for i, text in enumerate(make_clauses(n, seed=n)):
+        entities = [{'text': word, 'label': label} for word, label in ENTITY_WORDS.items() if word in text]
+        clauses.append({'text': text, 'type': TYPES[i % 3], 'entities': entities})
+    return clauses
+
+
+def measure(script, state, reruns):
+    """Seconds per rerun (after the first) and markdown bytes per rerun"""
+    at = AppTest.from_function(script, default_timeout=600)
+    for key, value in state.items():
+        at.session_state[key] = value
+    at.run()
+    start = time.perf_counter()
+    for _ in range(reruns):
+        at.run()
+    elapsed = (time.perf_counter() - start) / reruns
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return elapsed, sum(len(m.value.encode("utf-8")) for m in at.markdown)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clauses", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--reruns", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'clauses':>8} {'legacy s':>9} {'legacy KB':>10} {'paged s':>8} {'paged KB':>9}")
+    for n in args.clauses:
+        clauses = make_clause_dicts(n)
+        legacy_time, legacy_bytes = measure(legacy_script, {'clause_dicts': clauses}, args.reruns)
+        paged_time, paged_bytes = measure(paged_script, {'clauses': ClauseStore.from_clauses(clauses)}, args.reruns)
+        print(f"{n:>8} {legacy_time:>9.3f} {legacy_bytes / 1024:>10.1f} {paged_time:>8.3f} {paged_bytes / 1024:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Builds a cross-contract CorpusIndex (SQLite + FTS5 + IVF vector index)
+from synthetic documents and measures ingest throughput, index size and
+query latency (p50/p99) for keyword, structured and similarity queries,
+plus the recall@10 of the vector index against an exact scan.
+
+Embeddings are synthetic clustered vectors so that a million clauses can be
+indexed without running Legal-BERT; they exercise the same index code.
+Run from the repository root: python benchmarks/bench_corpus_index.py --clauses 1000000
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+import numpy as np
+from synthetic import make_clauses
+from utils.corpus_index import CorpusIndex
+
+CLAUSES_PER_DOCUMENT = 50
+DOCUMENTS_PER_BATCH = 200
+STATES = ["Delaware", "New York", "California", "Texas"]
+PARTIES = ["Supplier", "Licensee", "Distributor", "Company", "Licensor", "Customer"]
+TYPES = ["Standard"] * 6 + ["Important"] * 3 + ["Risky"]
+TOPICS = 2000  # clusters in the synthetic embedding space
+
+QUERIES = {
+    "keyword 'indemnif' (ranked)": dict(query="indemnif"),
+    "keyword 'indemnif' (unranked)": dict(query="indemnif", ranked=False),
+    "keyword 'written consent assign'": dict(query="written consent assign"),
+    "Risky + 'indemnif' + Delaware law": dict(query="indemnif", clause_type="Risky",
+                                              entity_label="GOVERNING_LAW", entity_text="Delaware"),
+    "Risky + Delaware law": dict(clause_type="Risky", entity_label="GOVERNING_LAW", entity_text="Delaware"),
+    "clause mentions Licensor": dict(entity_label="PARTY", entity_text="Licensor", entity_scope="clause"),
+}
+
+
+class SyntheticEmbedder:
+    """Clustered unit vectors: a random topic centre plus noise per clause"""
+
+    def __init__(self, dim, seed=0):
+        self.rng = np.random.default_rng(seed)
+        self.centres = self.rng.normal(size=(TOPICS, dim)).astype(np.float32)
+
+    def __call__(self, texts):
+        topics = self.rng.integers(0, TOPICS, size=len(texts))
+        noise = self.rng.normal(scale=0.6, size=(len(texts), self.centres.shape[1])).astype(np.float32)
+        return self.centres[topics] + noise
+
+
+def make_documents(start, count, rng):
+    documents = []
+    for d in range(start, start + count):
+        state = rng.choice(STATES)
+        clauses = []
+        for text in make_clauses(CLAUSES_PER_DOCUMENT, seed=d):
+            entities = [{'text': party, 'label': 'PARTY'} for party in PARTIES if party in text]
+            if "governed by" in text:
+                text = text.replace(next(s for s in STATES if s in text), state)
+                entities.append({'text': state, 'label': 'GOVERNING_LAW'})
+            clauses.append({'text': text, 'type': rng.choice(TYPES), 'entities': entities})
+        documents.append({'sha256': f"{d:064x}", 'source': f"contract-{d:07d}.pdf", 'clauses': clauses})
+    return documents
+
+
+def percentiles(func, runs):
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return np.percentile(times, 50) * 1000, np.percentile(times, 99) * 1000, result
+
+
+def exact_top(index, query, k):
+    """Exact cosine top-k over every stored vector, for recall"""
+    vectors = index.vectors()
+    query = query / np.linalg.norm(query)
+    best_ids, best_scores = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+    for start in range(0, vectors.count, 262144):
+        scores = vectors.vectors[start:start + 262144].astype(np.float32) @ query
+        ids = np.asarray(vectors.ids[start:start + 262144])
+        best_ids = np.concatenate([best_ids, ids])
+        best_scores = np.concatenate([best_scores, scores])
+        top = np.argsort(-best_scores)[:k]
+        best_ids, best_scores = best_ids[top], best_scores[top]
+    return set(best_ids.tolist())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clauses", type=int, default=100000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--runs", type=int, default=50, help="timed runs per query")
+    parser.add_argument("--workdir", default=os.path.join("cache", "bench_corpus"))
+    parser.add_argument("--reuse", action="store_true", help="query an index built by a previous run")
+    args = parser.parse_args()
+
+    db_path = os.path.join(args.workdir, "corpus.db")
+    vector_dir = os.path.join(args.workdir, "vectors")
+    if not args.reuse:
+        shutil.rmtree(args.workdir, ignore_errors=True)
+        os.makedirs(args.workdir)
+        index = CorpusIndex(db_path, vector_dir)
+        embed = SyntheticEmbedder(args.dim)
+        rng = random.Random(0)
+        documents = args.clauses // CLAUSES_PER_DOCUMENT
+        start = time.perf_counter()
+        for first in range(0, documents, DOCUMENTS_PER_BATCH):
+            batch = make_documents(first, min(DOCUMENTS_PER_BATCH, documents - first), rng)
+            # One build at the end, as corpus_search.py ingest does
+            index.add_documents(batch, embed=embed, rebuild=False)
+            done = min(documents, first + DOCUMENTS_PER_BATCH)
+            print(f"  {done * CLAUSES_PER_DOCUMENT} clauses ingested "
+                  f"({done * CLAUSES_PER_DOCUMENT / (time.perf_counter() - start):.0f}/s)", end="\r")
+        ingest = time.perf_counter() - start
+        start = time.perf_counter()
+        index.build_vectors()
+        build = time.perf_counter() - start
+        print(f"\n{documents} documents, {documents * CLAUSES_PER_DOCUMENT} clauses: ingest {ingest:.1f}s "
+              f"(incl. synthetic data), final vector build {build:.1f}s")
+    index = CorpusIndex(db_path, vector_dir)
+
+    size = sum(os.path.getsize(os.path.join(root, name))
+               for root, _, files in os.walk(args.workdir) for name in files)
+    print(f"On disk: {os.path.getsize(db_path) / 2**20:.0f} MB SQLite, {size / 2**20:.0f} MB total; {index.stats()}")
+
+    print(f"{'query':<40} {'hits':>5} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, query in QUERIES.items():
+        index.search(**query)  # warm the page cache
+        p50, p99, hits = percentiles(lambda: index.search(**query), args.runs)
+        print(f"{name:<40} {len(hits):>5} {p50:>8.1f} {p99:>8.1f}")
+
+    rng = np.random.default_rng(1)
+    embed = SyntheticEmbedder(args.dim)
+    probes = embed([""] * 20) + rng.normal(scale=0.3, size=(20, args.dim)).astype(np.float32)
+    truth = [exact_top(index, probe, 10) for probe in probes[:10]]
+    for nprobe in args.nprobe:
+        found = [index.similar(probe, k=10, nprobe=nprobe) for probe in probes[:10]]
+        recall = np.mean([len({r['clause_id'] for r in f} & t) / 10 for f, t in zip(found, truth)])
+        times = []
+        for _ in range(max(1, args.runs // len(probes))):
+            for probe in probes:
+                start = time.perf_counter()
+                index.similar(probe, k=10, nprobe=nprobe)
+                times.append(time.perf_counter() - start)
+        print(f"{f'similar k=10 nprobe={nprobe}':<40} {'':>5} {np.percentile(times, 50) * 1000:>8.1f} "
+              f"{np.percentile(times, 99) * 1000:>8.1f}  recall@10 {recall:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Export of one analyzed document: the previous CSV download (DataFrame to
+one string, base64 data URI in the page) versus the streaming exporter's
+CSV, JSONL and Parquet files. Reports time, peak memory while exporting
+and the bytes a download costs, at growing clause counts.
+Run from the repository root: python benchmarks/bench_export.py --clauses 1000 10000 100000
+"""
+import argparse
+import base64
+import gc
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+import pyarrow as pa
+from bench_clause_store import make_clause_dicts
+from synthetic import make_clauses
+from utils import exporter
+from utils.clause_store import ClauseStore
+
+
+def legacy_link(store):
+    """The previous export: CSV string, base64-encoded into an HTML anchor"""
+    csv_text = store.view().to_frame(max_chars=200).to_csv(index=False)
+    b64 = base64.b64encode(csv_text.encode()).decode()
+    return f'<a href="data:text/csv;base64,{b64}" download="contract_analysis.csv">Download</a>'
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def peak_memory(func):
+    """Peak bytes allocated by Python and by Arrow while running func"""
+    gc.collect()
+    pool = pa.default_memory_pool()
+    arrow_start = pool.max_memory() or 0
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak + max(0, (pool.max_memory() or 0) - arrow_start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clauses", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    exporter.EXPORT_DIR = tempfile.mkdtemp(prefix="bench_export_")
+    try:
+        print(f"{'clauses':>8} {'export':<14} {'time ms':>9} {'peak MB':>8} {'bytes sent MB':>14}")
+        for count in args.clauses:
+            store = ClauseStore.from_clauses(make_clause_dicts(make_clauses(count, seed=count)))
+            link, elapsed = timed(lambda: legacy_link(store))
+            peak = peak_memory(lambda: legacy_link(store))
+            print(f"{count:>8} {'legacy CSV':<14} {elapsed * 1000:>9.1f} {peak / 2**20:>8.1f} {len(link) / 2**20:>14.2f}"
+                  "  (200-char clauses)")
+            del link
+            for fmt in exporter.EXPORT_FORMATS:
+                path, elapsed = timed(lambda: exporter.export_analysis(f"bench-{count}", store, fmt))
+                _, cached = timed(lambda: exporter.export_analysis(f"bench-{count}", store, fmt))
+                peak = peak_memory(lambda: exporter.export_analysis(f"memory-{count}", store, fmt))
+                print(f"{count:>8} {fmt:<14} {elapsed * 1000:>9.1f} {peak / 2**20:>8.1f} "
+                      f"{os.path.getsize(path) / 2**20:>14.2f}  (cached: {cached * 1000:.2f} ms)")
+    finally:
+        shutil.rmtree(exporter.EXPORT_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
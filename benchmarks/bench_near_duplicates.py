@@ -0,0 +1,116 @@
+"""
+Near-duplicate clause reuse in the bulk pipeline: analyze_document over a
+synthetic corpus with and without the MinHash/LSH template index. Reports
+the share of clauses that reused a template, the speed-up, and how often
+the reused types and entities agree with a full analysis.
+With the stand-in models, model time is tiny and the wall times mostly
+measure pipeline overhead; the "NER text" and "classified" columns give the
+share of model input left with reuse, which is what bounds the speed-up
+with the real models.
+
+Each run starts with an empty embedding cache, so the exact-hash cache
+helps both sides only with repeats inside the run. --bespoke shuffles the
+words of that share of the body lines, for clauses that are not boilerplate.
+Run from the repository root: python benchmarks/bench_near_duplicates.py --stand-in --documents 40 --pages 10
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from synthetic import make_contract_lines, write_txt
+
+
+def make_corpus(directory, documents, pages, bespoke):
+    rng = random.Random(0)
+    paths = []
+    for seed in range(documents):
+        lines = make_contract_lines(pages, seed=seed)
+        for i, line in enumerate(lines):
+            if line and not line[0].isdigit() and rng.random() < bespoke:
+                words = line.split()
+                rng.shuffle(words)
+                lines[i] = " ".join(words)
+        path = os.path.join(directory, f"contract-{seed:04d}.txt")
+        write_txt(lines, path)
+        paths.append(path)
+    return paths
+
+
+def run(paths, options, reuse):
+    """
+    (clause dicts per document, near-duplicate count, seconds, model input)
+    with a fresh embedding cache; model input counts the characters sent to
+    NER and the clauses sent to the classifier
+    """
+    from utils import classifier, model_registry, pipeline
+    from utils.embedding_cache import EmbeddingCache
+    from utils.near_duplicates import clear_template_indexes
+
+    cache = classifier.get_embedding_cache()
+    if cache is not None:
+        fresh = EmbeddingCache(cache.model_id, cache.dim, cache_dir=tempfile.mkdtemp(prefix="bench_embeddings_"),
+                               lowercase=cache.lowercase)
+        model_registry.register("embedding_cache", lambda: fresh)
+    clear_template_indexes()
+    pipeline.NEAR_DUPLICATES = reuse
+    model_input = {'ner_chars': 0, 'classified': 0}
+    extract, classify = pipeline.extract_entity_spans_batch, pipeline.classify_clauses
+
+    def counted_extract(texts, *args, **kwargs):
+        model_input['ner_chars'] += sum(len(t) for t in texts)
+        return extract(texts, *args, **kwargs)
+
+    def counted_classify(texts, *args, **kwargs):
+        model_input['classified'] += len(texts)
+        return classify(texts, *args, **kwargs)
+
+    pipeline.extract_entity_spans_batch, pipeline.classify_clauses = counted_extract, counted_classify
+    results, near_duplicates = [], 0
+    start = time.perf_counter()
+    try:
+        for path in paths:
+            result = pipeline.analyze_document(path, options)
+            results.append(result['clauses'])
+            near_duplicates += result['near_duplicates']
+    finally:
+        pipeline.extract_entity_spans_batch, pipeline.classify_clauses = extract, classify
+    return results, near_duplicates, time.perf_counter() - start, model_input
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=40)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--bespoke", type=float, nargs="+", default=[0.0, 0.3])
+    parser.add_argument("--stand-in", action="store_true", help="use small local stand-in models")
+    args = parser.parse_args()
+    if args.stand_in:
+        from stand_in_models import install
+        install()
+
+    from utils.pipeline import warm_up
+    options = {'extract_entities': True, 'classify_clauses': True, 'summarize': False}
+    warm_up(options)
+
+    print(f"{'bespoke':>8} {'clauses':>8} {'reused':>8} {'full s':>8} {'reuse s':>8} {'speed-up':>9} "
+          f"{'NER text':>9} {'classified':>11} {'types':>7} {'entities':>9}")
+    for bespoke in args.bespoke:
+        paths = make_corpus(tempfile.mkdtemp(prefix="bench_near_duplicates_"), args.documents, args.pages, bespoke)
+        full, _, full_time, full_input = run(paths, options, reuse=False)
+        reused, near_duplicates, reuse_time, reuse_input = run(paths, options, reuse=True)
+        pairs = [(a, b) for doc_a, doc_b in zip(full, reused) for a, b in zip(doc_a, doc_b)]
+        types = sum(a['type'] == b['type'] for a, b in pairs) / len(pairs)
+        entities = sum(a['entities'] == b['entities'] for a, b in pairs) / len(pairs)
+        print(f"{bespoke:>8.0%} {len(pairs):>8} {near_duplicates / len(pairs):>8.1%} {full_time:>8.2f} "
+              f"{reuse_time:>8.2f} {full_time / reuse_time:>8.1f}x "
+              f"{reuse_input['ner_chars'] / full_input['ner_chars']:>9.1%} "
+              f"{reuse_input['classified'] / full_input['classified']:>11.1%} {types:>7.1%} {entities:>9.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Compare per-clause and nlp.pipe NER throughput on a CUAD-sized clause set
+and check that both paths return identical entities.
+Run from the repository root: python benchmarks/bench_ner.py
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from synthetic import make_clauses
+from utils import ner_model
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    # CUAD v1 has roughly 13k labelled clauses across 510 contracts
+    parser.add_argument("--clauses", type=int, default=13000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[32, 64, 256])
+    parser.add_argument("--n-process", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    clauses = make_clauses(args.clauses)
+    print(f"pipeline: {ner_model.get_nlp().pipe_names}")
+
+    start = time.perf_counter()
+    reference = [ner_model.extract_entities(c) for c in clauses]
+    elapsed = time.perf_counter() - start
+    print(f"per-clause                  : {len(clauses) / elapsed:8.1f} clauses/sec ({elapsed:.2f}s)")
+
+    for n_process in args.n_process:
+        for batch_size in args.batch_sizes:
+            start = time.perf_counter()
+            batched = ner_model.extract_entities_batch(clauses, batch_size=batch_size, n_process=n_process)
+            elapsed = time.perf_counter() - start
+            identical = "identical" if batched == reference else "MISMATCH"
+            print(f"batch_size={batch_size:<4} n_process={n_process:<2}: "
+                  f"{len(clauses) / elapsed:8.1f} clauses/sec ({elapsed:.2f}s), {identical}")
+
+if __name__ == "__main__":
+    main()
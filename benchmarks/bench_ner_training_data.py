@@ -0,0 +1,140 @@
+"""
+NER training-data build: the notebook's loop (df.iterrows() per column
+pair, then nlp.make_doc into one in-memory DocBin) against
+build_ner_training_data.py (vectorized examples, DocBin shards written by
+worker processes), on a synthetic CSV shaped like CUAD's
+master_clauses.csv. Checks that both give the same examples and the same
+Docs and entities, and reports the peak memory of the in-process builds
+(a separate run under tracemalloc; with workers the Docs are built in the
+worker processes).
+Run from the repository root: python benchmarks/bench_ner_training_data.py --rows 510 5000 --workers 1 4
+"""
+import argparse
+import glob
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pandas as pd
+
+from synthetic import write_master_clauses
+
+
+def notebook_examples(df):
+    """Cell 3 of NER_training_notebook.ipynb"""
+    df.columns = df.columns.str.strip()
+    column_pairs = []
+    for col in df.columns:
+        if col.endswith("-Answer"):
+            base_col = col.replace("-Answer", "").strip()
+            if base_col in df.columns:
+                column_pairs.append((base_col, col))
+
+    TRAIN_DATA = []
+    for base_col, ans_col in column_pairs:
+        label = base_col.upper().replace(" ", "_")
+        for _, row in df.iterrows():
+            context = str(row[base_col])
+            answer = str(row[ans_col])
+            if pd.isna(context) or pd.isna(answer) or answer.strip().lower() == "no":
+                continue
+            start = context.lower().find(answer.lower())
+            if start == -1:
+                continue
+            end = start + len(answer)
+            TRAIN_DATA.append((context, {"entities": [(start, end, label)]}))
+    return TRAIN_DATA
+
+
+def notebook_docbin(TRAIN_DATA, path):
+    """Cell 5 of NER_training_notebook.ipynb"""
+    import spacy
+    from spacy.tokens import DocBin
+
+    nlp = spacy.blank("en")
+    doc_bin = DocBin()
+    for text, annot in TRAIN_DATA:
+        doc = nlp.make_doc(text)
+        ents = []
+        for start, end, label in annot["entities"]:
+            span = doc.char_span(start, end, label=label)
+            if span:
+                ents.append(span)
+        doc.ents = ents
+        doc_bin.add(doc)
+    doc_bin.to_disk(path)
+
+
+def peak_memory(func):
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def read_docs(paths):
+    """(text, entities) of every Doc in the given .spacy files, in order"""
+    import spacy
+    from spacy.tokens import DocBin
+
+    vocab = spacy.blank("en").vocab
+    return [(doc.text, [(e.start_char, e.end_char, e.label_) for e in doc.ents])
+            for path in paths for doc in DocBin().from_disk(path).get_docs(vocab)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[510, 5000], help="CSV rows (CUAD has 510)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--shard-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    import spacy
+    from build_ner_training_data import build_examples, build_training_data
+    spacy.blank("en")  # keep importing spaCy out of the timings; spawned workers still pay for it
+
+    directory = tempfile.mkdtemp(prefix="bench_ner_data_")
+    print(f"{'rows':>6} {'examples':>9} {'build':<12} {'examples s':>11} {'docs s':>8} {'total s':>8} "
+          f"{'speed-up':>9} {'peak MB':>8}  same")
+    for rows in args.rows:
+        csv_path = write_master_clauses(rows, os.path.join(directory, f"master_clauses-{rows}.csv"), seed=rows)
+
+        start = time.perf_counter()
+        train_data = notebook_examples(pd.read_csv(csv_path))
+        examples_time = time.perf_counter() - start
+        notebook_path = os.path.join(directory, f"notebook-{rows}.spacy")
+        start = time.perf_counter()
+        notebook_docbin(train_data, notebook_path)
+        docs_time = time.perf_counter() - start
+        notebook_total = examples_time + docs_time
+        peak = peak_memory(lambda: notebook_docbin(notebook_examples(pd.read_csv(csv_path)), notebook_path))
+        print(f"{rows:>6} {len(train_data):>9} {'notebook':<12} {examples_time:>11.2f} {docs_time:>8.2f} "
+              f"{notebook_total:>8.2f} {'':>9} {peak / 2**20:>8.1f}")
+        reference = read_docs([notebook_path])
+
+        start = time.perf_counter()
+        examples = build_examples(pd.read_csv(csv_path))
+        examples_time = time.perf_counter() - start
+        same_examples = [(t, {"entities": [(s, e, l)]}) for t, s, e, l in examples.itertuples(index=False)] == train_data
+        for workers in args.workers:
+            output = os.path.join(directory, f"module-{rows}-{workers}")
+            # Worker start-up is part of the cost, so the whole build is timed
+            start = time.perf_counter()
+            build_training_data(csv_path, output, dev=0.0, shard_size=args.shard_size, workers=workers)
+            total = time.perf_counter() - start
+            same = same_examples and read_docs(sorted(glob.glob(os.path.join(output, "train", "*.spacy")))) == reference
+            peak = "-"
+            if workers == 1:
+                peak = f"{peak_memory(lambda: build_training_data(csv_path, output, 0.0, args.shard_size, 1)) / 2**20:.1f}"
+            print(f"{rows:>6} {len(examples):>9} {f'module x{workers}':<12} {examples_time:>11.2f} "
+                  f"{total - examples_time:>8.2f} {total:>8.2f} {notebook_total / total:>8.1f}x {peak:>8}  {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Parity and speed check of the int8-quantized Legal-BERT mode against fp32.
+
+Each mode runs in its own process (so memory numbers are not mixed up) over
+the same synthetic clauses. The script reports model load time, clauses/sec,
+resident memory and how often the Standard/Important/Risky labels of the
+logistic-regression head agree, and exits non-zero when the agreement falls
+below --min-agreement.
+Run from the repository root: python benchmarks/bench_quantized.py --stand-in
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from synthetic import make_clauses
+
+
+def peak_rss_mb():
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return (usage / 2**20) if sys.platform == "darwin" else usage / 1024
+
+
+def run_mode(args):
+    """Child process: classify the clauses in one mode and dump labels and timings"""
+    import numpy as np
+    from utils import classifier
+
+    clauses = make_clauses(args.clauses)
+    start = time.perf_counter()
+    classifier.get_classifier()
+    classifier.get_tokenizer()
+    classifier.get_bert_model()
+    load_seconds = time.perf_counter() - start
+    rss_loaded = peak_rss_mb()
+
+    classifier.classify_clauses(clauses[:args.batch_size], use_cache=False)  # warm-up
+    start = time.perf_counter()
+    embeddings = classifier.get_embeddings(clauses, batch_size=args.batch_size, use_cache=False)
+    labels = classifier.get_classifier().predict(embeddings)
+    seconds = time.perf_counter() - start
+
+    np.save(args.result + ".npy", embeddings)
+    with open(args.result, "w", encoding="utf-8") as f:
+        json.dump({
+            "load_seconds": load_seconds,
+            "seconds": seconds,
+            "clauses_per_sec": len(clauses) / seconds,
+            "rss_loaded_mb": rss_loaded,
+            "peak_rss_mb": peak_rss_mb(),
+            "labels": [classifier.TYPE_MAP.get(int(label), "Unknown") for label in labels],
+        }, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clauses", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=0, help="TORCH_THREADS for both modes (0 = torch default)")
+    parser.add_argument("--min-agreement", type=float, default=0.98)
+    parser.add_argument("--stand-in", action="store_true", help="use small local stand-in models (offline)")
+    parser.add_argument("--run", choices=["fp32", "int8"], help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run:
+        run_mode(args)
+        return
+
+    if args.stand_in:
+        from stand_in_models import install
+        install()
+
+    import numpy as np
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for mode in ("fp32", "int8"):
+            result_path = os.path.join(workdir, f"{mode}.json")
+            env = dict(os.environ, LEGAL_BERT_QUANTIZE="1" if mode == "int8" else "0",
+                       TORCH_THREADS=str(args.threads))
+            subprocess.run([sys.executable, os.path.abspath(__file__), "--run", mode, "--result", result_path,
+                            "--clauses", str(args.clauses), "--batch-size", str(args.batch_size)],
+                           env=env, check=True)
+            with open(result_path, "r", encoding="utf-8") as f:
+                results[mode] = json.load(f)
+            results[mode]["embeddings"] = np.load(result_path + ".npy")
+
+    for mode, r in results.items():
+        print(f"{mode:<5}: load {r['load_seconds']:6.2f}s  {r['clauses_per_sec']:8.1f} clauses/sec  "
+              f"RSS after load {r['rss_loaded_mb']:7.1f} MB  peak {r['peak_rss_mb']:7.1f} MB")
+
+    fp32, int8 = results["fp32"], results["int8"]
+    agreement = sum(a == b for a, b in zip(fp32["labels"], int8["labels"])) / len(fp32["labels"])
+    a, b = fp32["embeddings"], int8["embeddings"]
+    cosine = (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+    print(f"speed-up {int8['clauses_per_sec'] / fp32['clauses_per_sec']:.2f}x, "
+          f"embedding cosine mean {cosine.mean():.4f} / min {cosine.min():.4f}, "
+          f"label agreement {agreement:.2%}")
+    for label in sorted(set(fp32["labels"])):
+        rows = [i for i, l in enumerate(fp32["labels"]) if l == label]
+        same = sum(int8["labels"][i] == label for i in rows)
+        print(f"  {label:<10} {same}/{len(rows)} kept")
+
+    if agreement < args.min_agreement:
+        print(f"Label agreement below {args.min_agreement:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
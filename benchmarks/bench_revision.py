@@ -0,0 +1,85 @@
+"""
+Incremental re-analysis of a revised contract: a full analysis of the new
+version versus run_revision_job against the analysis of the previous one,
+for edits of growing size. Also checks that both give the same clauses,
+types and entities.
+Run from the repository root: python benchmarks/bench_revision.py --stand-in --pages 100 1000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from synthetic import make_contract_lines, write_txt
+
+AMENDMENTS = ["as amended from time to time", "subject to Section 4.2", "unless otherwise agreed in writing"]
+
+
+def revise(lines, edits, seed):
+    """A redline: `edits` body lines modified, followed by a new paragraph, or deleted"""
+    rng = random.Random(seed)
+    body = [i for i, line in enumerate(lines) if line and not line[0].isdigit() and not line.isupper()]
+    chosen = set(rng.sample(body, min(edits, len(body))))
+    revised = []
+    for i, line in enumerate(lines):
+        if i not in chosen:
+            revised.append(line)
+            continue
+        edit = rng.randrange(3)
+        if edit == 0:
+            revised.append(line.rstrip(".") + ", " + rng.choice(AMENDMENTS) + ".")
+        elif edit == 1:
+            revised.extend([line, "", f"{rng.randint(10, 99)}.{rng.randint(1, 9)} Additional Terms",
+                            f"The parties further agree that this clause applies {rng.choice(AMENDMENTS)}.", ""])
+        # edit == 2 deletes the line
+    return revised
+
+
+def same_clauses(a, b):
+    return len(a) == len(b) and all(a.clause(i) == b.clause(i) for i in range(len(a)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--edits", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--stand-in", action="store_true", help="use small local stand-in models")
+    args = parser.parse_args()
+    if args.stand_in:
+        from stand_in_models import install
+        install()
+
+    from utils import pipeline
+    from utils.jobs import Job
+    from utils.pipeline import run_analysis_job, run_revision_job, warm_up
+    warm_up()
+    # Near-duplicate reuse is measured by bench_near_duplicates.py; here both sides analyze every clause they run,
+    # even with NEAR_DUPLICATES=1 in the environment
+    pipeline.NEAR_DUPLICATES = False
+
+    directory = tempfile.mkdtemp(prefix="bench_revision_")
+    print(f"{'pages':>6} {'edits':>6} {'clauses':>8} {'analyzed':>9} {'full s':>8} {'revision s':>11} {'speed-up':>9}  same")
+    for pages in args.pages:
+        lines = make_contract_lines(pages, seed=pages)
+        write_txt(lines, os.path.join(directory, "v1.txt"))
+        base = run_analysis_job(Job("bench", "v1"), os.path.join(directory, "v1.txt"))
+        for edits in args.edits:
+            path = os.path.join(directory, f"v2-{edits}.txt")
+            write_txt(revise(lines, edits, seed=edits), path)
+            start = time.perf_counter()
+            full = run_analysis_job(Job("bench", "full"), path)
+            full_time = time.perf_counter() - start
+            start = time.perf_counter()
+            revision = run_revision_job(Job("bench", "revision"), path, base)
+            revision_time = time.perf_counter() - start
+            print(f"{pages:>6} {edits:>6} {len(revision['clauses']):>8} {revision['revision']['analyzed']:>9} "
+                  f"{full_time:>8.2f} {revision_time:>11.2f} {full_time / revision_time:>8.1f}x  "
+                  f"{same_clauses(full['clauses'], revision['clauses'])}")
+
+
+if __name__ == "__main__":
+    main()
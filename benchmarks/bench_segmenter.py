@@ -0,0 +1,159 @@
+"""
+Check the offset-based clause segmenter against the previous string-based
+implementation (kept verbatim below) and time both at several sizes.
+
+The golden corpus is synthetic contracts of every requested size plus
+hand-written edge cases (headings at the start and end, headings without
+text, connectors, short and numeric-only sentences, odd whitespace).
+Clause strings must be identical; the script exits non-zero otherwise.
+Run from the repository root: python benchmarks/bench_segmenter.py
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from nltk.tokenize import sent_tokenize
+from synthetic import make_clauses, make_contract_lines
+from utils.document_parser import clean_text, segment_clauses, split_into_clauses
+
+EDGE_CASES = [
+    "",
+    "   \n\n  ",
+    "\n1.1 Definitions\n",
+    "\n1.1 Definitions\n\n1.2 Term\n\n2.1 Payment\n",
+    "1.1 Not a heading because there is no leading newline. The Supplier shall deliver the goods.",
+    "\n1.1 Scope\nThe Supplier shall deliver the goods on time and in full. Short one. "
+    "The Customer shall pay: net thirty days; interest applies, and fees, "
+    "as set out in Schedule 2, apply.\n2.1\nGoverning Law\n   The laws of Delaware govern this Agreement in all respects.",
+    "- 1 2 3 - 4 5 6 7. 1.2. 12 - 13 - 14 - 15. This sentence has five words.",
+    "\n3.1    Term and Termination\n\n\n  Either party may terminate this Agreement upon thirty days notice.  \n\n",
+    "Preamble text before any heading that is long enough to stand alone as a clause.\n"
+    "\n1.1 Definitions\nA. B. C. D. Words words words words words words words words.",
+    "\n1.1 Fees\nThe fee is $1,000.00 per month, payable in advance; late fees apply. "
+    "The Licensee shall not sublicense the Software to any third party whatsoever. \n",
+]
+
+
+def legacy_split_into_clauses(text):
+    # First split by major sections
+    sections = re.split(r'(\n\d+\.\d+\s+.+?\n)', text)
+
+    clauses = []
+    current_section = ""
+
+    for part in sections:
+        if re.match(r'\n\d+\.\d+\s+.+?\n', part):
+            current_section = part.strip()
+        else:
+            # Split into sentences but keep context
+            sentences = sent_tokenize(part)
+            for sentence in sentences:
+                if legacy_is_valid_clause(sentence):
+                    clause = f"{current_section}: {sentence}" if current_section else sentence
+                    clauses.append(clause.strip())
+
+    return legacy_merge_split_clauses([c for c in clauses if legacy_is_valid_clause(c)])
+
+
+def legacy_is_valid_clause(text):
+    text = text.strip()
+    if not text:
+        return False
+    if len(text.split()) < 4:
+        return False
+    if re.match(r'^[-\d\s]+$', text):
+        return False
+    if re.match(r'^\d+\.\d+$', text):
+        return False
+    return True
+
+
+def legacy_merge_split_clauses(clauses):
+    merged = []
+    buffer = ""
+
+    for clause in clauses:
+        # If clause ends with connector or is short, buffer it
+        if clause.endswith((':', ';', ',')) or len(clause.split()) < 8:
+            buffer += " " + clause
+        else:
+            if buffer:
+                merged.append(buffer.strip())
+                buffer = ""
+            merged.append(clause)
+
+    if buffer:
+        merged.append(buffer.strip())
+
+    return [c for c in merged if legacy_is_valid_clause(c)]
+
+
+def check(text):
+    """Differences between the legacy and current segmenters for one text"""
+    expected = legacy_split_into_clauses(text)
+    clauses = split_into_clauses(text)
+    segments = segment_clauses(text)
+    problems = []
+    if clauses != expected:
+        first = next((i for i, (a, b) in enumerate(zip(clauses, expected)) if a != b), min(len(clauses), len(expected)))
+        problems.append(f"clause {first} differs ({len(clauses)} vs {len(expected)} clauses)")
+    if len(segments) != len(expected):
+        problems.append(f"{len(segments)} segments for {len(expected)} clauses")
+    previous_end = 0
+    for start, end, _ in segments:
+        if start < previous_end or start >= end or text[start].isspace() or text[end - 1].isspace():
+            problems.append(f"bad boundaries ({start}, {end})")
+            break
+        previous_end = end
+    return problems
+
+
+def timed(func, text, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(text)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    corpus = [(f"edge case {i}", text) for i, text in enumerate(EDGE_CASES)]
+    corpus += [(f"clauses seed {seed}", " ".join(make_clauses(50, seed=seed))) for seed in range(5)]
+    for pages in args.pages:
+        raw = "\n".join(make_contract_lines(pages, seed=pages))
+        corpus += [(f"{pages}p raw", raw), (f"{pages}p cleaned", clean_text(raw))]
+
+    failures = 0
+    for name, text in corpus:
+        for problem in check(text):
+            failures += 1
+            print(f"MISMATCH {name}: {problem}")
+    print(f"golden corpus: {len(corpus)} documents, {failures} mismatches")
+
+    print(f"{'pages':>6} {'clauses':>8} {'legacy':>10} {'split':>10} {'segment':>10}  retained (strings -> offsets)")
+    for pages in args.pages:
+        text = clean_text("\n".join(make_contract_lines(pages, seed=pages)))
+        clauses, legacy_time = timed(legacy_split_into_clauses, text, args.repeat)
+        _, split_time = timed(split_into_clauses, text, args.repeat)
+        segments, segment_time = timed(segment_clauses, text, args.repeat)
+        string_bytes = sum(sys.getsizeof(c) for c in clauses) + sys.getsizeof(clauses)
+        offset_bytes = sum(sys.getsizeof(s) for s in segments) + sys.getsizeof(segments)
+        print(f"{pages:>6} {len(clauses):>8} {legacy_time:9.3f}s {split_time:9.3f}s {segment_time:9.3f}s  "
+              f"{string_bytes / 2**20:.1f} MB -> {offset_bytes / 2**20:.1f} MB")
+
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Measure cold-start latency of the app: how long the login page takes to
+render, how long importing the analysis stack takes and how long the
+background warm-up needs until every model is loaded. Each measurement
+runs in a fresh interpreter so nothing is already imported or cached.
+Run from the repository root: python benchmarks/bench_startup.py --stand-in
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PRELUDE = f"""
+import json, sys, time
+sys.path.insert(0, {os.path.join(ROOT, "app")!r})
+"""
+
+# First script run of the login page, as a new browser session would see it
+LOGIN_PAGE = PRELUDE + f"""
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+app = AppTest.from_file({os.path.join(ROOT, "app", "main.py")!r}, default_timeout=600)
+app.run()
+print(json.dumps({{"seconds": time.perf_counter() - start, "errors": [str(e.value) for e in app.exception]}}))
+"""
+
+IMPORT_PIPELINE = PRELUDE + """
+start = time.perf_counter()
+import utils.pipeline
+print(json.dumps({"seconds": time.perf_counter() - start}))
+"""
+
+WARM_UP = PRELUDE + """
+from utils.pipeline import warm_up
+start = time.perf_counter()
+status = warm_up()
+print(json.dumps({"seconds": time.perf_counter() - start, "status": status}))
+"""
+
+
+def run(script):
+    completed = subprocess.run([sys.executable, "-c", script], cwd=ROOT, env=os.environ.copy(),
+                               capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr else "failed")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stand-in", action="store_true", help="use small local stand-in models (offline)")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.stand_in:
+        from stand_in_models import install
+        install()
+
+    for label, script in [("login page first run", LOGIN_PAGE),
+                          ("import utils.pipeline", IMPORT_PIPELINE),
+                          ("warm up all models", WARM_UP)]:
+        results = [run(script) for _ in range(args.repeat)]
+        best = min(r["seconds"] for r in results)
+        print(f"{label:<24}: best {best:7.3f}s of {args.repeat}")
+        for key in ("errors", "status"):
+            if results[-1].get(key):
+                print(f"{'':<24}  {key}: {results[-1][key]}")
+
+
+if __name__ == "__main__":
+    main()
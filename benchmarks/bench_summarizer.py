@@ -0,0 +1,46 @@
+"""
+Compare sumy's dense TextRank with the sparse and hierarchical summarizers
+across document sizes, reporting time and whether the summaries agree.
+Run from the repository root: python benchmarks/bench_summarizer.py
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from synthetic import make_contract_lines
+from utils.summarizer import generate_summary
+
+
+def timed(text, **kwargs):
+    start = time.perf_counter()
+    summary = generate_summary(text, **kwargs)
+    return summary, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 5, 20, 100, 1000])
+    parser.add_argument("--dense-max-pages", type=int, default=20,
+                        help="skip sumy's quadratic TextRank above this size")
+    args = parser.parse_args()
+
+    print(f"{'pages':>6} {'chars':>10} {'textrank':>10} {'sparse':>10} {'hierarch.':>10} {'tfidf':>10}  agreement")
+    for pages in args.pages:
+        text = " ".join(" ".join(make_contract_lines(pages, seed=pages)).split())
+
+        dense, dense_time = timed(text, mode="textrank") if pages <= args.dense_max_pages else (None, None)
+        flat, flat_time = timed(text, mode="sparse")
+        hierarchical, hierarchical_time = timed(text, mode="hierarchical")
+        _, tfidf_time = timed(text, mode="hierarchical", weighting="tfidf")
+
+        agreement = "-" if dense is None else ("identical" if dense == flat else "DIFFERENT")
+        dense_column = f"{dense_time:9.3f}s" if dense_time is not None else f"{'skipped':>10}"
+        print(f"{pages:>6} {len(text):>10} {dense_column} {flat_time:9.3f}s "
+              f"{hierarchical_time:9.3f}s {tfidf_time:9.3f}s  {agreement}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Load test for api_server.py: latency percentiles and throughput of
+/classify and /entities at several concurrency levels, with cross-request
+micro-batching on and off. Each level starts a fresh server process.
+Run from the repository root: python benchmarks/load_test_api.py --stand-in
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+from synthetic import make_clauses
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def post(url, clauses):
+    body = json.dumps({'clauses': clauses}).encode("utf-8")
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=120) as response:
+        return json.loads(response.read())
+
+
+def start_server(port, batching, max_wait_ms):
+    command = [sys.executable, os.path.join(ROOT, "api_server.py"), "--port", str(port),
+               "--max-wait-ms", str(max_wait_ms)]
+    if not batching:
+        command.append("--no-batching")
+    server = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 300
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                if json.loads(response.read())['ready']:
+                    return server
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        if server.poll() is not None:
+            raise RuntimeError("api_server.py exited during start-up")
+        time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("api_server.py did not become ready")
+
+
+def run_load(url, clauses, concurrency, requests_per_client, clauses_per_request):
+    """Each client sends its requests back to back; returns latencies and wall time"""
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def client(offset):
+        for i in range(requests_per_client):
+            start = (offset * requests_per_client + i) * clauses_per_request % len(clauses)
+            payload = clauses[start:start + clauses_per_request] or clauses[:clauses_per_request]
+            began = time.perf_counter()
+            try:
+                post(url, payload)
+            except Exception as e:
+                with lock:
+                    errors.append(str(e))
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - began)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    began = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors, time.perf_counter() - began
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoint", choices=["classify", "entities"], nargs="+", default=["classify", "entities"])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=20, help="requests per client")
+    parser.add_argument("--clauses-per-request", type=int, default=2)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--port", type=int, default=8611)
+    parser.add_argument("--stand-in", action="store_true", help="use small local stand-in models (offline)")
+    args = parser.parse_args()
+
+    if args.stand_in:
+        from stand_in_models import install
+        install()
+        # The server runs from the repository root; make the stand-in paths absolute for it
+        for name in ("LEGAL_BERT_MODEL", "CLAUSE_CLASSIFIER_PATH", "NER_MODEL_PATH"):
+            os.environ[name] = os.path.abspath(os.environ[name])
+
+    clauses = make_clauses(2000, seed=0)
+    print(f"{'endpoint':<9} {'batching':<8} {'clients':>7} {'p50 ms':>8} {'p99 ms':>8} {'req/s':>8} {'errors':>6}")
+    for batching in (False, True):
+        server = start_server(args.port, batching, args.max_wait_ms)
+        try:
+            for endpoint in args.endpoint:
+                url = f"http://127.0.0.1:{args.port}/{endpoint}"
+                post(url, clauses[:8])  # first call pays one-off costs
+                for concurrency in args.concurrency:
+                    latencies, errors, wall = run_load(url, clauses, concurrency, args.requests,
+                                                       args.clauses_per_request)
+                    p50, p99 = (np.percentile(latencies, [50, 99]) * 1000) if latencies else (0.0, 0.0)
+                    print(f"{endpoint:<9} {'on' if batching else 'off':<8} {concurrency:>7} "
+                          f"{p50:>8.1f} {p99:>8.1f} {len(latencies) / wall:>8.1f} {len(errors):>6}")
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
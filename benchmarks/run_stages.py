@@ -0,0 +1,200 @@
+"""
+Stage-level benchmark of the analysis pipeline on synthetic contracts.
+
+Generates contracts of the requested page counts as TXT, DOCX and PDF,
+then times parse_document, split_into_clauses, extract_entities,
+classify_clauses and generate_summary separately, recording the peak
+resident memory of each stage. Results are written as JSON; --compare
+flags stages that got slower than a stored baseline.
+
+Run from the repository root:
+    python benchmarks/run_stages.py --stand-in --output bench.json
+    python benchmarks/run_stages.py --stand-in --compare bench.json --output bench-new.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app"))
+
+from synthetic import write_contract
+
+STAGES = ["parse_document", "split_into_clauses", "extract_entities", "classify_clauses", "generate_summary"]
+
+
+def current_rss():
+    """Resident set size in bytes (Linux /proc; falls back to the process peak)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if sys.platform == "darwin" else usage * 1024
+
+
+class PeakRSS:
+    """Samples resident memory in a background thread while a stage runs"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss())
+
+    def __enter__(self):
+        self.peak = current_rss()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss())
+
+
+def run_stage(stage, func, *args):
+    with PeakRSS() as rss:
+        start = time.perf_counter()
+        output = func(*args)
+        seconds = time.perf_counter() - start
+    return output, {"stage": stage, "seconds": round(seconds, 4), "peak_rss_mb": round(rss.peak / 2**20, 1)}
+
+
+def benchmark_document(path, stages):
+    from utils.document_parser import parse_document, split_into_clauses
+    from utils.pipeline import clean_display_text
+
+    from utils.pipeline import warm_up
+    # Models load lazily; keep loading time out of the stage timings
+    warm_up({
+        'extract_entities': "extract_entities" in stages,
+        'classify_clauses': "classify_clauses" in stages,
+        'summarize': "generate_summary" in stages
+    })
+
+    results = []
+    text, result = run_stage("parse_document", parse_document, path)
+    result["items"] = len(text)
+    results.append(result)
+
+    clauses, result = run_stage("split_into_clauses", split_into_clauses, text)
+    result["items"] = len(clauses)
+    results.append(result)
+    clauses = [clean_display_text(c) for c in clauses if c.strip()]
+
+    if "extract_entities" in stages:
+        from utils.ner_model import extract_entities_batch
+        _, result = run_stage("extract_entities", extract_entities_batch, clauses)
+        result["items"] = len(clauses)
+        results.append(result)
+
+    if "classify_clauses" in stages:
+        from utils.classifier import classify_clauses
+        _, result = run_stage("classify_clauses", lambda c: classify_clauses(c, use_cache=False), clauses)
+        result["items"] = len(clauses)
+        results.append(result)
+
+    if "generate_summary" in stages:
+        from utils.summarizer import generate_summary
+        full_text = " ".join(clauses)
+        _, result = run_stage("generate_summary", generate_summary, full_text)
+        result["items"] = len(full_text)
+        results.append(result)
+
+    return results
+
+
+def compare(current, baseline, threshold, min_seconds):
+    """Return human-readable regressions of `current` against `baseline`"""
+    def key(r):
+        return (r["format"], r["pages"], r["stage"])
+
+    previous = {key(r): r for r in baseline["results"]}
+    regressions = []
+    for r in current["results"]:
+        old = previous.get(key(r))
+        if old is None:
+            continue
+        slower = r["seconds"] - old["seconds"]
+        if slower > min_seconds and r["seconds"] > old["seconds"] * (1 + threshold):
+            regressions.append(
+                f"{r['format']:>4} {r['pages']:>5}p {r['stage']:<20} "
+                f"{old['seconds']:.3f}s -> {r['seconds']:.3f}s (+{slower / old['seconds']:.0%})"
+            )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--formats", nargs="+", default=["txt", "docx", "pdf"], choices=["txt", "docx", "pdf"])
+    parser.add_argument("--stages", nargs="+", default=STAGES, choices=STAGES,
+                        help="parsing and splitting always run; model stages are optional")
+    parser.add_argument("--stand-in", action="store_true", help="use small local stand-in models (offline)")
+    parser.add_argument("--output", help="result file (default: bench_results.json; required with --compare)")
+    parser.add_argument("--compare", metavar="BASELINE", help="flag regressions against a stored result file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown (0.2 = 20%%)")
+    parser.add_argument("--min-seconds", type=float, default=0.05, help="ignore smaller absolute slowdowns")
+    args = parser.parse_args()
+    if args.output is None:
+        if args.compare:
+            parser.error("--compare needs --output, so the new results do not overwrite the baseline")
+        args.output = "bench_results.json"
+    elif args.compare and os.path.abspath(args.output) == os.path.abspath(args.compare):
+        parser.error("--output must differ from the --compare baseline")
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    if args.stand_in:
+        from stand_in_models import install
+        install()
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "stand_in_models": args.stand_in,
+        },
+        "results": [],
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for pages in args.pages:
+            for fmt in args.formats:
+                path = write_contract(pages, fmt, os.path.join(workdir, f"contract_{pages}.{fmt}"))
+                for result in benchmark_document(path, args.stages):
+                    result.update({"format": fmt, "pages": pages})
+                    report["results"].append(result)
+                    print(f"{fmt:>4} {pages:>5}p {result['stage']:<20} {result['seconds']:>9.3f}s "
+                          f"{result['peak_rss_mb']:>8.1f} MB  ({result['items']} items)")
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results saved to '{args.output}'")
+
+    if baseline is not None:
+        regressions = compare(report, baseline, args.threshold, args.min_seconds)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.compare}:")
+            print("\n".join("  " + line for line in regressions))
+            sys.exit(1)
+        print(f"No regressions against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
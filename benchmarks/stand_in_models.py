@@ -0,0 +1,90 @@
+"""
+Small local stand-ins for the NER, Legal-BERT and classifier-head models.
+
+They have the same interfaces as the real models but are tiny and built
+offline, so the benchmarks can exercise the model-dependent stages without
+downloading anything. Timings measure pipeline overhead, not model quality.
+"""
+import os
+
+from synthetic import CLAUSE_TEMPLATES, SECTION_TITLES
+
+STAND_IN_DIR = os.path.join("cache", "stand_in_models")
+HIDDEN_SIZE = 64
+
+
+def _vocabulary():
+    words = set()
+    for text in CLAUSE_TEMPLATES + SECTION_TITLES:
+        for word in text.lower().replace(".", " ").replace(",", " ").split():
+            words.add(word.strip("{}$"))
+    specials = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+    characters = list("abcdefghijklmnopqrstuvwxyz0123456789.,;:()[]*$-")
+    return specials + sorted(words - set(specials)) + characters
+
+
+def build_bert(path):
+    import torch
+    from transformers import BertConfig, BertModel, BertTokenizer
+
+    os.makedirs(path, exist_ok=True)
+    vocab_file = os.path.join(path, "vocab.txt")
+    with open(vocab_file, "w", encoding="utf-8") as f:
+        f.write("\n".join(_vocabulary()) + "\n")
+
+    torch.manual_seed(0)
+    BertTokenizer(vocab_file, do_lower_case=True).save_pretrained(path)
+    config = BertConfig(
+        vocab_size=len(_vocabulary()),
+        hidden_size=HIDDEN_SIZE,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=HIDDEN_SIZE * 2,
+    )
+    BertModel(config).save_pretrained(path)
+
+
+def build_classifier_head(path):
+    import joblib
+    import numpy as np
+    from sklearn.linear_model import LogisticRegression
+
+    rng = np.random.default_rng(0)
+    features = rng.normal(size=(300, HIDDEN_SIZE))
+    labels = np.arange(300) % 3
+    joblib.dump(LogisticRegression(max_iter=200).fit(features, labels), path)
+
+
+def build_ner(path):
+    import spacy
+
+    nlp = spacy.blank("en")
+    ruler = nlp.add_pipe("entity_ruler")
+    ruler.add_patterns(
+        [{"label": "GOVERNING_LAW", "pattern": state}
+         for state in ["Delaware", "New York", "California", "Texas"]]
+        + [{"label": "PARTY", "pattern": party}
+           for party in ["Supplier", "Licensee", "Distributor", "Company", "Licensor", "Customer"]]
+        + [{"label": "TERM", "pattern": [{"LIKE_NUM": True}, {"LOWER": "days"}]}]
+    )
+    nlp.to_disk(path)
+
+
+def install(base_dir=STAND_IN_DIR):
+    """
+    Build the stand-ins (once) and point the app's model settings at them.
+    Must run before any `utils` model module is imported.
+    """
+    paths = {
+        "LEGAL_BERT_MODEL": os.path.join(base_dir, "bert"),
+        "CLAUSE_CLASSIFIER_PATH": os.path.join(base_dir, "logreg_model.pkl"),
+        "NER_MODEL_PATH": os.path.join(base_dir, "ner"),
+    }
+    if not os.path.exists(paths["LEGAL_BERT_MODEL"]):
+        build_bert(paths["LEGAL_BERT_MODEL"])
+    if not os.path.exists(paths["CLAUSE_CLASSIFIER_PATH"]):
+        build_classifier_head(paths["CLAUSE_CLASSIFIER_PATH"])
+    if not os.path.exists(paths["NER_MODEL_PATH"]):
+        build_ner(paths["NER_MODEL_PATH"])
+    os.environ.update(paths)
+    return paths
@@ -0,0 +1,183 @@
+"""
+Synthetic legal text used by the benchmark scripts.
+"""
+import random
+
+CLAUSE_TEMPLATES = [
+    "This Agreement shall be governed by the laws of the State of {state}.",
+    "Either party may terminate this Agreement upon {days} days prior written notice to the other party.",
+    "The {party} shall indemnify and hold harmless the {other} from any and all claims, losses and damages arising out of {subject}.",
+    "All notices under this Agreement shall be in writing and delivered to the addresses set forth above.",
+    "If any provision of this Agreement is held invalid, the remaining provisions shall continue in full force and effect.",
+    "The {party} shall pay the {other} a fee of ${amount} within {days} days of receipt of each invoice, and late payments shall accrue interest at the maximum rate permitted by applicable law.",
+    "Neither party shall assign this Agreement without the prior written consent of the other party.",
+]
+
+def make_clauses(n, seed=0):
+    rng = random.Random(seed)
+    clauses = []
+    for _ in range(n):
+        clause = rng.choice(CLAUSE_TEMPLATES).format(
+            state=rng.choice(["Delaware", "New York", "California", "Texas"]),
+            days=rng.choice([10, 30, 60, 90]),
+            party=rng.choice(["Supplier", "Licensee", "Distributor"]),
+            other=rng.choice(["Company", "Licensor", "Customer"]),
+            subject=rng.choice(["its negligence", "any breach of this Agreement", "the Products"]),
+            amount=rng.randint(1000, 99999),
+        )
+        # Vary lengths the way real clause lists do
+        clauses.append(" ".join([clause] * rng.randint(1, 3)))
+    return clauses
+
+SECTION_TITLES = [
+    "Definitions", "Term and Termination", "Payment Terms", "Confidentiality",
+    "Indemnification", "Limitation of Liability", "Governing Law", "Notices",
+    "Assignment", "Severability", "Intellectual Property", "Audit Rights",
+]
+
+LINES_PER_PAGE = 55
+LINE_WIDTH = 90
+
+def make_contract_lines(pages, seed=0):
+    """
+    Lines of a synthetic contract, LINES_PER_PAGE per page.
+    Numbered sections ("3.2 Payment Terms"), redactions ("[*]"),
+    confidentiality markers and boilerplate clauses, wrapped like PDF text.
+    """
+    rng = random.Random(seed)
+    lines = ["MASTER SERVICES AGREEMENT", ""]
+    article, section = 1, 0
+    target = pages * LINES_PER_PAGE
+
+    while len(lines) < target:
+        section += 1
+        if section > rng.randint(3, 6):
+            article, section = article + 1, 1
+        lines.append("")
+        lines.append(f"{article}.{section} {rng.choice(SECTION_TITLES)}")
+
+        paragraph = []
+        for clause in make_clauses(rng.randint(2, 6), seed=rng.random()):
+            if rng.random() < 0.15:
+                clause = clause.replace(" the ", " the [*] ", 1)
+            if rng.random() < 0.05:
+                clause = "*Confidential treatment requested* " + clause
+            paragraph.append(clause)
+        lines.extend(wrap(" ".join(paragraph), LINE_WIDTH))
+
+    lines = lines[:target]
+    # Page-number artifacts at the bottom of every page
+    for page in range(1, pages + 1):
+        lines[page * LINES_PER_PAGE - 1] = f"- {page} -"
+    return lines
+
+def wrap(text, width):
+    lines, current = [], ""
+    for word in text.split():
+        if current and len(current) + 1 + len(word) > width:
+            lines.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        lines.append(current)
+    return lines
+
+def write_txt(lines, path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+
+def write_docx(lines, path):
+    import docx
+
+    document = docx.Document()
+    for line in lines:
+        document.add_paragraph(line)
+    document.save(path)
+
+def write_pdf(lines, path):
+    """Minimal text-only PDF writer (Helvetica, one content stream per page)"""
+    def escape(line):
+        return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)]
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in below
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    ]
+    page_ids = []
+    for page_lines in pages:
+        body = ["BT", "/F1 10 Tf", "13 TL", "50 760 Td"]
+        body.extend(f"({escape(line)}) Tj T*" for line in page_lines)
+        body.append("ET")
+        stream = "\n".join(body).encode("latin-1", errors="replace")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        page_ids.append(len(objects))
+    kids = " ".join(f"{i} 0 R" for i in page_ids).encode()
+    objects[1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(page_ids)
+
+    with open(path, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        offsets = []
+        for number, obj in enumerate(objects, 1):
+            offsets.append(f.tell())
+            f.write(b"%d 0 obj\n" % number + obj + b"\nendobj\n")
+        xref = f.tell()
+        f.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+        for offset in offsets:
+            f.write(b"%010d 00000 n \n" % offset)
+        f.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+
+WRITERS = {"txt": write_txt, "docx": write_docx, "pdf": write_pdf}
+
+# CUAD-style categories: (context column, answer values)
+CUAD_CATEGORIES = [
+    ("Document Name", lambda rng: rng.choice(["MASTER SERVICES AGREEMENT", "DISTRIBUTOR AGREEMENT", "LICENSE AGREEMENT"])),
+    ("Parties", lambda rng: rng.choice(["Supplier", "Licensee", "Distributor", "Company", "Licensor", "Customer"])),
+    ("Agreement Date", lambda rng: f"{rng.choice(['January', 'March', 'June', 'October'])} {rng.randint(1, 28)}, {rng.randint(1998, 2020)}"),
+    ("Governing Law", lambda rng: rng.choice(["Delaware", "New York", "California", "Texas"])),
+    ("Notice Period To Terminate Renewal", lambda rng: f"{rng.choice([10, 30, 60, 90])} days"),
+    ("Non-Compete", lambda rng: rng.choice(["Yes", "No"])),
+    ("Exclusivity", lambda rng: rng.choice(["Yes", "No"])),
+    ("Cap On Liability", lambda rng: f"${rng.randint(1000, 99999)}"),
+]
+
+def write_master_clauses(rows, path, seed=0):
+    """
+    A CSV shaped like CUAD's master_clauses.csv: per category a context
+    column of clause excerpts and a "<category>-Answer" column. Answers
+    usually occur in the context (in another case now and then), some are
+    "No" and some cells are empty.
+    """
+    import pandas as pd
+
+    rng = random.Random(seed)
+    data = {"Filename": [f"contract_{i:05d}.pdf" for i in range(rows)]}
+    for category, answer_of in CUAD_CATEGORIES:
+        contexts, answers = [], []
+        for _ in range(rows):
+            if rng.random() < 0.05:
+                contexts.append(None)
+                answers.append(None)
+                continue
+            answer = answer_of(rng)
+            excerpts = make_clauses(rng.randint(1, 4), seed=rng.random())
+            if answer not in ("Yes", "No"):
+                mention = answer.upper() if rng.random() < 0.1 else answer
+                excerpts.insert(rng.randrange(len(excerpts) + 1), f"The {category.lower()} is {mention}.")
+            contexts.append(str(excerpts))
+            answers.append(answer if rng.random() < 0.95 else "not stated")
+        data[category] = contexts
+        data[f"{category}-Answer"] = answers
+    pd.DataFrame(data).to_csv(path, index=False)
+    return path
+
+def write_contract(pages, fmt, path, seed=0):
+    WRITERS[fmt](make_contract_lines(pages, seed), path)
+    return path
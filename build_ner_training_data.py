@@ -0,0 +1,191 @@
+# build_ner_training_data.py
+"""
+Build spaCy NER training data from CUAD's master_clauses.csv.
+
+The examples are the ones NER_training_notebook.ipynb builds: for every
+context column with a "<column>-Answer" column, each row whose answer is
+not "No" and occurs in the context (ignoring case) becomes the context
+labelled COLUMN_NAME over the answer. Empty cells read as "nan", as they
+do in the notebook.
+
+Examples are located with vectorized pandas operations, turned into Docs
+by a pool of worker processes (--workers, default one per CPU) and written as DocBin shards of at most
+--shard-size examples under <output>/train and <output>/dev, so memory
+stays bounded however large the CSV is. spacy train reads the shard
+directories:
+
+Example:
+    python build_ner_training_data.py master_clauses.csv --output ner_data --workers 4
+    python -m spacy train config.cfg --paths.train ner_data/train --paths.dev ner_data/dev
+"""
+import argparse
+import multiprocessing
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import nullcontext
+
+import numpy as np
+import pandas as pd
+
+ANSWER_SUFFIX = "-Answer"
+SHARD_SIZE = 2000
+
+_nlp = None
+
+
+def column_pairs(columns) -> list:
+    """(context column, answer column) pairs, in column order"""
+    pairs = []
+    for col in columns:
+        if col.endswith(ANSWER_SUFFIX):
+            base_col = col.replace(ANSWER_SUFFIX, "").strip()
+            if base_col in columns:
+                pairs.append((base_col, col))
+    return pairs
+
+
+def as_text(column: pd.Series) -> pd.Series:
+    """The column as str(value) per cell, missing values included"""
+    return column.astype(object).where(column.notna(), "nan").astype(str)
+
+
+def build_examples(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per training example, in the notebook's order (column pair, then CSV row)
+    Returns: DataFrame with 'text', 'start', 'end' and 'label' columns
+    """
+    df = df.rename(columns=lambda col: col.strip())
+    frames = []
+    for base_col, ans_col in column_pairs(list(df.columns)):
+        context, answer = as_text(df[base_col]), as_text(df[ans_col])
+        frame = pd.DataFrame({"text": context, "answer": answer})
+        frame["label"] = base_col.upper().replace(" ", "_")
+        frames.append(frame[answer.str.strip().str.lower() != "no"])
+    if not frames:
+        return pd.DataFrame({"text": [], "start": [], "end": [], "label": []})
+
+    examples = pd.concat(frames, ignore_index=True)
+    # No vectorized substring search for per-row needles; both sides are lowered in bulk
+    examples["start"] = [context.find(answer) for context, answer in
+                         zip(examples["text"].str.lower(), examples["answer"].str.lower())]
+    examples = examples[examples["start"] >= 0].reset_index(drop=True)
+    examples["end"] = examples["start"] + examples["answer"].str.len()
+    return examples[["text", "start", "end", "label"]]
+
+
+def split_examples(count: int, dev: float, seed: int = 0):
+    """Train and dev row positions, each in the original order"""
+    order = np.random.default_rng(seed).permutation(count)
+    split = count - int(count * dev)
+    return np.sort(order[:split]), np.sort(order[split:])
+
+
+def _init_worker(lang):
+    global _nlp
+    import spacy
+    _nlp = spacy.blank(lang)
+
+
+def write_shard(path: str, texts: list, starts: list, ends: list, labels: list) -> tuple:
+    """Write one DocBin shard; returns (path, docs, entities kept)"""
+    from spacy.tokens import DocBin
+
+    doc_bin = DocBin()
+    entities = 0
+    for text, start, end, label in zip(texts, starts, ends, labels):
+        doc = _nlp.make_doc(text)
+        # Answers that do not line up with token boundaries are left out, as in the notebook
+        span = doc.char_span(start, end, label=label)
+        doc.ents = [span] if span is not None else []
+        entities += span is not None
+        doc_bin.add(doc)
+    doc_bin.to_disk(path)
+    return path, len(texts), entities
+
+
+def write_shards(examples: pd.DataFrame, directory: str, pool=None, shard_size: int = SHARD_SIZE,
+                 in_flight_limit: int = 8) -> tuple:
+    """
+    Write the examples as numbered DocBin shards under `directory`, in the
+    worker pool when there is one
+    Returns: (docs, entities kept)
+    """
+    os.makedirs(directory, exist_ok=True)
+    name = os.path.basename(os.path.normpath(directory))
+    totals = [0, 0]
+
+    def done(futures):
+        for future in futures:
+            _, docs, entities = future.result()
+            totals[0], totals[1] = totals[0] + docs, totals[1] + entities
+
+    in_flight = set()
+    for shard, start in enumerate(range(0, len(examples), shard_size)):
+        chunk = examples.iloc[start:start + shard_size]
+        task = (os.path.join(directory, f"{name}-{shard:05d}.spacy"), chunk["text"].tolist(),
+                chunk["start"].tolist(), chunk["end"].tolist(), chunk["label"].tolist())
+        if pool is None:
+            _, docs, entities = write_shard(*task)
+            totals[0], totals[1] = totals[0] + docs, totals[1] + entities
+            continue
+        in_flight.add(pool.submit(write_shard, *task))
+        # Bounded submission: only a few chunks of examples are queued at once
+        if len(in_flight) >= in_flight_limit:
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            done(finished)
+    done(wait(in_flight).done)
+    return totals[0], totals[1]
+
+
+def build_training_data(csv_path: str, output: str, dev: float = 0.2, shard_size: int = SHARD_SIZE,
+                        workers: int = None, lang: str = "en", seed: int = 0) -> dict:
+    """
+    Build the examples from `csv_path` and write <output>/train and <output>/dev
+    Returns: counts of examples, docs and entities per split and per label
+    """
+    workers = workers or max(1, os.cpu_count() or 1)
+    examples = build_examples(pd.read_csv(csv_path))
+    train, dev_rows = split_examples(len(examples), dev, seed)
+
+    stats = {"examples": len(examples), "labels": Counter(examples["label"])}
+    if workers == 1:
+        # Starting a worker would only add the cost of loading spaCy again
+        _init_worker(lang)
+        pool = nullcontext()
+    else:
+        # spawn, as in analyze_corpus.py: workers start clean and only load a blank pipeline
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_init_worker, initargs=(lang,))
+    with pool as executor:
+        for split, rows in (("train", train), ("dev", dev_rows)):
+            docs, entities = write_shards(examples.iloc[rows], os.path.join(output, split), executor,
+                                          shard_size, in_flight_limit=workers * 2)
+            stats[split] = {"docs": docs, "entities": entities}
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build spaCy NER training data from CUAD master_clauses.csv")
+    parser.add_argument("csv", help="CUAD master_clauses.csv")
+    parser.add_argument("--output", default="ner_data", help="directory for the train/ and dev/ shards")
+    parser.add_argument("--dev", type=float, default=0.2, help="share of examples kept for evaluation")
+    parser.add_argument("--shard-size", type=int, default=SHARD_SIZE, help="examples per .spacy file")
+    parser.add_argument("--workers", type=int, default=max(1, os.cpu_count() or 1))
+    parser.add_argument("--lang", default="en", help="language of the blank pipeline used to tokenize")
+    args = parser.parse_args()
+
+    start_time = time.time()
+    stats = build_training_data(args.csv, args.output, args.dev, args.shard_size, args.workers, args.lang)
+    print(f"✅ Total training examples: {stats['examples']}")
+    print("Label counts in training data:")
+    print(stats["labels"])
+    for split in ("train", "dev"):
+        print(f"{split}: {stats[split]['docs']} docs, {stats[split]['entities']} entities "
+              f"-> {os.path.join(args.output, split)}")
+    print(f"Built in {time.time() - start_time:.1f} seconds")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+# corpus_search.py
+"""
+Cross-contract search over every analyzed document.
+
+Analyses finished in the app are saved automatically; results of
+analyze_corpus.py are loaded in bulk with `ingest`. Either way a document
+already stored is only replaced by an analysis that ran all of its stages
+and more, e.g. one with entities after a --no-entities run.
+
+Examples:
+    python corpus_search.py ingest corpus_result/
+    python corpus_search.py search indemnification --type Risky --entity GOVERNING_LAW=Delaware
+    python corpus_search.py similar "The Supplier shall indemnify the Customer" --k 10
+    python corpus_search.py stats
+"""
+import argparse
+import os
+import sys
+import time
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app")
+sys.path.insert(0, APP_DIR)
+
+from utils.corpus_index import CorpusIndex, DB_PATH, VECTOR_DIR, SEARCH_LIMIT, read_batch_output
+
+DOCUMENTS_PER_BATCH = 100
+
+
+def embedder():
+    from utils.classifier import get_embeddings
+    from utils.pipeline import warm_up
+    warm_up({'extract_entities': False, 'classify_clauses': True, 'summarize': False})
+    # The embedding cache is sized for interactive use; a bulk load would only churn it
+    return lambda texts: get_embeddings(texts, use_cache=False)
+
+
+def ingest(index, args):
+    embed = None if args.no_vectors else embedder()
+    start_time = time.time()
+    batch, seen, added = [], 0, 0
+    for record in read_batch_output(args.inputs):
+        batch.append(record)
+        seen += 1
+        if len(batch) >= DOCUMENTS_PER_BATCH:
+            added += index.add_documents(batch, embed=embed, replace=args.replace, rebuild=False)
+            batch = []
+            print(f"{seen} documents read, {added} added ({seen / (time.time() - start_time):.1f} docs/sec)", end="\r")
+    if batch:
+        added += index.add_documents(batch, embed=embed, replace=args.replace, rebuild=False)
+    # Built once at the end rather than in the background as the tail grows
+    if embed is not None:
+        print("\nBuilding the vector index...")
+        index.build_vectors()
+    print(f"\n{seen} documents read, {added} added in {time.time() - start_time:.1f}s")
+
+
+def show(results):
+    for result in results:
+        score = f"{result['score']:.3f}  " if result['score'] is not None else ""
+        text = result['text'] if len(result['text']) <= 160 else result['text'][:160] + "..."
+        print(f"{score}[{result['type']}] {result['source']}\n    {text}")
+    print(f"{len(results)} clauses")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=DB_PATH, help="SQLite file (shared with the app's users)")
+    parser.add_argument("--vectors", default=VECTOR_DIR, help="vector index directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    ingest_parser = commands.add_parser("ingest", help="load analyze_corpus.py output")
+    ingest_parser.add_argument("inputs", nargs="+", help="output directories or JSONL shards")
+    ingest_parser.add_argument("--no-vectors", action="store_true", help="skip clause embeddings")
+    ingest_parser.add_argument("--replace", action="store_true",
+                               help="replace documents already stored, whatever options they ran with")
+
+    search_parser = commands.add_parser("search", help="keyword and filter search")
+    search_parser.add_argument("query", nargs="*", help="words every clause must contain (prefixes match)")
+    search_parser.add_argument("--type", help="clause type, e.g. Risky")
+    search_parser.add_argument("--entity", help="LABEL or LABEL=text, e.g. GOVERNING_LAW=Delaware")
+    search_parser.add_argument("--in-clause", action="store_true",
+                               help="match the entity within the clause instead of anywhere in its document")
+    search_parser.add_argument("--limit", type=int, default=SEARCH_LIMIT)
+    search_parser.add_argument("--unranked", action="store_true", help="skip bm25 ranking")
+
+    similar_parser = commands.add_parser("similar", help="clauses similar to a text")
+    similar_parser.add_argument("text")
+    similar_parser.add_argument("--type", help="clause type, e.g. Risky")
+    similar_parser.add_argument("--k", type=int, default=10)
+
+    commands.add_parser("build", help="re-cluster the vector index")
+    commands.add_parser("stats", help="documents, clauses and vectors stored")
+    args = parser.parse_args()
+
+    index = CorpusIndex(args.db, args.vectors)
+    if args.command == "ingest":
+        ingest(index, args)
+    elif args.command == "search":
+        label, _, text = (args.entity or "").partition("=")
+        start = time.perf_counter()
+        results = index.search(" ".join(args.query), clause_type=args.type, entity_label=label or None,
+                               entity_text=text or None, entity_scope="clause" if args.in_clause else "document",
+                               limit=args.limit, ranked=not args.unranked)
+        show(results)
+        print(f"({(time.perf_counter() - start) * 1000:.1f} ms)")
+    elif args.command == "similar":
+        vector = embedder()([args.text])[0]
+        start = time.perf_counter()
+        results = index.similar(vector, k=args.k, clause_type=args.type)
+        show(results)
+        print(f"({(time.perf_counter() - start) * 1000:.1f} ms)")
+    elif args.command == "build":
+        index.build_vectors()
+    else:
+        print(index.stats())
+
+
+if __name__ == "__main__":
+    main()
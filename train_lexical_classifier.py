@@ -0,0 +1,66 @@
+# train_lexical_classifier.py
+import argparse
+import os
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "app"))
+
+from utils import classifier
+
+LABEL_IDS = {name.lower(): label for label, name in classifier.TYPE_MAP.items()}
+
+
+def parse_label(value):
+    """Accept 0/1/2 or Standard/Important/Risky (any case)"""
+    if isinstance(value, str) and value.strip().lower() in LABEL_IDS:
+        return LABEL_IDS[value.strip().lower()]
+    return int(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the lexical first tier of the clause classifier cascade")
+    parser.add_argument("data", help="CSV file with one clause per row")
+    parser.add_argument("--text-column", default="text")
+    parser.add_argument("--label-column",
+                        help="labels to train on; without it the clauses are labelled by the Legal-BERT head")
+    parser.add_argument("--output", default=classifier.LEXICAL_MODEL_PATH)
+    parser.add_argument("--threshold", type=float, default=classifier.CASCADE_THRESHOLD,
+                        help="confidence threshold to report coverage for")
+    parser.add_argument("--holdout", type=float, default=0.2, help="share of clauses kept for evaluation")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.data).dropna(subset=[args.text_column])
+    texts = df[args.text_column].astype(str).tolist()
+    if args.label_column:
+        labels = np.array([parse_label(v) for v in df[args.label_column]])
+    else:
+        print(f"Labelling {len(texts)} clauses with the Legal-BERT head...")
+        names = [r["type"] for r in classifier.classify_clauses(texts, cascade=False)]
+        labels = np.array([LABEL_IDS[name.lower()] for name in names])
+
+    order = np.random.default_rng(0).permutation(len(texts))
+    split = int(len(texts) * (1 - args.holdout))
+    train, test = order[:split], order[split:]
+
+    model = classifier.build_lexical_classifier([texts[i] for i in train], labels[train])
+    if len(test):
+        probabilities = model.predict_proba([texts[i] for i in test])
+        predicted = model.classes_[probabilities.argmax(axis=1)]
+        confident = probabilities.max(axis=1) >= args.threshold
+        print(f"Held-out accuracy: {np.mean(predicted == labels[test]):.2%}")
+        print(f"At threshold {args.threshold}: {confident.mean():.1%} of clauses decided by the lexical tier, "
+              f"{np.mean(predicted[confident] == labels[test][confident]) if confident.any() else 0:.2%} correct")
+
+    # Final model uses every clause
+    model = classifier.build_lexical_classifier(texts, labels)
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    joblib.dump(model, args.output)
+    print(f"Lexical classifier saved to '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()